@@ -5,10 +5,13 @@ import time
 import threading
 import subprocess
 import numpy as np
-import matplotlib.pyplot as plt
 import psutil
 
 from fwk.shared.variables_util import varc
+from analysis_utils.plot_worker_util import PlotWorker, save_series
+from analysis_utils.phase_marker_util import PhaseMarker, phase_statistics
+from generic_utils.status_server_util import RunStatus
+from generic_utils.metrics_registry_util import VRAM_PEAK_MB, PROCESS_MEMORY_GB
 from cloudevents.http import CloudEvent
 from kratos_pycloudevents.client import TelemetryClient
 
@@ -45,6 +48,10 @@ class DSRecorder:
         self.process_memory = []
         self.kit_pid = None
 
+        # (timestamp, phase) of every capture, index aligned with the sample lists
+        self.vram_stamps = []
+        self.process_memory_stamps = []
+
     def _get_vram_usage(self):
         """
         Gets the current VRAM usage using nvidia-smi
@@ -58,6 +65,7 @@ class DSRecorder:
             smi_cmd = smi_cmd.split()
             report = subprocess.run(smi_cmd, capture_output=True)
             report = report.stdout.splitlines()
+        self.vram_stamps.append((time.time(), PhaseMarker.current()))
         for gpu in report:
             gpu_data = gpu.decode().split(",")
             name = gpu_data[0]
@@ -67,6 +75,8 @@ class DSRecorder:
             if not unique_name in self.gpu_dict:
                 self.gpu_dict[unique_name] = []
             self.gpu_dict[unique_name].append(int(vram))
+            RunStatus.telemetry(f'vram-mb {unique_name}', int(vram))
+            VRAM_PEAK_MB.set_max(int(vram), gpu=unique_name)
             self.kratos_dict[f'total_vram_{gpu_data[4].strip()}']=int(gpu_data[3].split()[0])
             
         #threshold check
@@ -117,6 +127,9 @@ class DSRecorder:
                 memory_info = process.memory_info()
                 # Record RSS (Resident Set Size) in GB
                 self.process_memory.append(round(memory_info.rss / 1024 / 1024 / 1024, 2))
+                self.process_memory_stamps.append((time.time(), PhaseMarker.current()))
+                RunStatus.telemetry('process-memory-gb', self.process_memory[-1])
+                PROCESS_MEMORY_GB.set(self.process_memory[-1])
                 #print(f"Process Memory: {self.process_memory[-1]} GB") 
             except psutil.NoSuchProcess:
                 print("Kit process no longer exists")
@@ -215,6 +228,8 @@ class DSRecorder:
         """
         if not self.recording:
             self.recording = True
+            # peaks are per test
+            VRAM_PEAK_MB.clear()
             self.vram_recorder_thread = threading.Thread(target=self._record_vram)
             varc.thread_list.append(self.vram_recorder_thread)
             self.vram_recorder_thread.start()
@@ -244,41 +259,56 @@ class DSRecorder:
             print("[SDG_BATCH_RUNNER] : DSecorder : Saving Process Memory data")
             with open(self.filename + "_process_memory.json", "w") as json_file:
                 json.dump(self.process_memory, json_file)
-        
-    def _plot(self,type):
+
+        self._save_phase_stats(type)
+
+    def _save_phase_stats(self,type):
         """
-        plots the captured data in a graph and saves it as png file
+        Saves per-phase peak/mean/delta of the captured data, so a spike can be attributed to a test step
         
         Args:
             type (str): For what data this function is called
         """
         if type=='vram':
-            print("[SDG_BATCH_RUNNER] : DSecorder : Plotting VRAM data")
-            num_entries = len(next(iter(self.gpu_dict.values())))
-            endTime = num_entries * self.interval
-            time = np.arange(0, endTime, self.interval)
+            phase_stats = {
+                gpu: phase_statistics([(t, phase, value) for (t, phase), value in zip(self.vram_stamps, values)])
+                for gpu, values in self.gpu_dict.items()
+            }
+            report_key = "vram-phase-stats-mb"
+        elif type=='process_memory':
+            phase_stats = phase_statistics(
+                [(t, phase, value) for (t, phase), value in zip(self.process_memory_stamps, self.process_memory)]
+            )
+            report_key = "process-memory-phase-stats-gb"
+        else:
+            return
 
-            gpu_names = []
-            maxMemory = 0
-            for gpu_data in self.gpu_dict.items():
-                name, memory = gpu_data
-                if len(time) != len(memory):
-                    print("Incorrect number of GPU entries. Found " + str(len(memory)) + " but expected " + str(len(time)))
+        print(f"[SDG_BATCH_RUNNER] : DSecorder : Saving {type} phase statistics")
+        with open(self.filename + f"_{type}_phase_stats.json", "w") as json_file:
+            json.dump({"phases": PhaseMarker.transitions(), "stats": phase_stats}, json_file, indent=4)
 
-                maxMemory = max(math.ceil(max(memory) / 1000) * 1000, maxMemory)
-                # The plt.scatter() method doesn’t start the plotting process visually. It just prepares the data to be displayed.
-                plt.scatter(time, memory)
-                gpu_names.append(name)
-            # When plt.legend(gpu_names, fontsize="5") is called, it uses the list gpu_names to label the plotted scatter points in the order in which they were plotted.
-            plt.legend(gpu_names,fontsize="5")
-            plt.yticks(np.arange(0, maxMemory + 1000, 1000))
-            plt.title(self.title)
-            plt.xlabel("Time (s)")
-            plt.ylabel("Memory (MB)")
-            plt.grid()
+        if "--perf-data-record" in self.test_dict['automation_flags_dict'] or "--perf-data-record" in self.test_dict['automation_suite_flags_dict']:
+            self.test_dict['subtest_dict'].setdefault('perf-test', {})[report_key] = phase_stats
+        
+    def _plot(self,type):
+        """
+        saves the captured data in compact binary form (.npz) and queues a png plot of it on the background plot worker,
+        so the runner does not wait for rendering
+        
+        Args:
+            type (str): For what data this function is called
+        """
+        if type=='vram':
+            print("[SDG_BATCH_RUNNER] : DSecorder : Queueing VRAM plot")
+            start = self.vram_stamps[0][0] if self.vram_stamps else 0
+            elapsed = [t - start for t, _ in self.vram_stamps]
+            series = {}
+            for name, memory in self.gpu_dict.items():
+                series[name] = (elapsed[:len(memory)], memory)
+            markers = [(t - start, phase) for t, phase in PhaseMarker.transitions() if t >= start]
+            save_series(self.filename + "_vram_data.npz", series, title=self.title, ylabel="Memory (MB)", markers=markers)
             print(self.filename + ".png")
-            plt.savefig(self.filename + ".png", dpi=300)
-            plt.close()
+            PlotWorker.submit(self.filename + "_vram_data.npz", self.filename + ".png")
     
     def _kratos_json_create(self,type):
         """
@@ -0,0 +1,242 @@
+'''This module samples GPU throttle reasons, SM clock, temperature and power through NVML so that
+performance metrics measured while the GPU was throttled can be flagged instead of compared as regressions'''
+
+# Standard library imports
+import json
+import time
+import threading
+
+try:
+    import pynvml
+    PYNVML_AVAILABLE = True
+except ImportError:
+    PYNVML_AVAILABLE = False
+
+# Local imports
+from fwk.shared.constants import GPU_THROTTLE_SAMPLE_INTERVAL
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from analysis_utils.phase_marker_util import PhaseMarker
+from generic_utils.status_server_util import RunStatus
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# NVML clocksThrottleReasons bits (nvml.h)
+THROTTLE_REASONS = {
+    0x0000000000000001: 'gpu_idle',
+    0x0000000000000002: 'applications_clocks_setting',
+    0x0000000000000004: 'sw_power_cap',
+    0x0000000000000008: 'hw_slowdown',
+    0x0000000000000010: 'sync_boost',
+    0x0000000000000020: 'sw_thermal_slowdown',
+    0x0000000000000040: 'hw_thermal_slowdown',
+    0x0000000000000080: 'hw_power_brake_slowdown',
+    0x0000000000000100: 'display_clock_setting',
+}
+
+# Reasons that lower clocks under load and make timings incomparable; idle/app-clock/display reasons are benign
+PERF_INVALIDATING_MASK = 0x4 | 0x8 | 0x20 | 0x40 | 0x80
+
+VALID = "VALID"
+UNKNOWN = "UNKNOWN"
+
+
+def decode_throttle_reasons(mask):
+    '''Return the reason names set in an NVML throttle reasons bitmask'''
+    return [name for bit, name in THROTTLE_REASONS.items() if mask & bit]
+
+
+class NvmlBackend:
+    '''Reads GPU state through pynvml'''
+
+    def init(self):
+        pynvml.nvmlInit()
+        self._handles = [pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())]
+
+    def device_count(self):
+        return len(self._handles)
+
+    def sample(self, index):
+        '''
+        Returns:
+            dict: throttle-mask, sm-clock-mhz, temperature-c, power-w, power-limit-w
+        '''
+        handle = self._handles[index]
+        return {
+            'throttle-mask': pynvml.nvmlDeviceGetCurrentClocksThrottleReasons(handle),
+            'sm-clock-mhz': pynvml.nvmlDeviceGetClockInfo(handle, pynvml.NVML_CLOCK_SM),
+            'temperature-c': pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU),
+            'power-w': round(pynvml.nvmlDeviceGetPowerUsage(handle) / 1000, 1),
+            'power-limit-w': round(pynvml.nvmlDeviceGetEnforcedPowerLimit(handle) / 1000, 1),
+        }
+
+    def shutdown(self):
+        pynvml.nvmlShutdown()
+
+
+class FakeNvmlBackend:
+    '''Deterministic NVML stand-in for machines without a GPU (e.g. Linux CI).
+    Replays a scripted list of samples per GPU; the last sample repeats once the script runs out.'''
+
+    def __init__(self, scripts):
+        '''
+        Args:
+            scripts (list): One list of sample dicts (same keys as NvmlBackend.sample) per GPU
+        '''
+        self.scripts = scripts
+        self._positions = [0] * len(scripts)
+
+    def init(self):
+        self._positions = [0] * len(self.scripts)
+
+    def device_count(self):
+        return len(self.scripts)
+
+    def sample(self, index):
+        script = self.scripts[index]
+        position = min(self._positions[index], len(script) - 1)
+        self._positions[index] += 1
+        return dict(script[position])
+
+    def shutdown(self):
+        pass
+
+
+class GpuThrottleMonitor:
+    '''Samples all GPUs in a background thread and records the intervals where throttling was active'''
+
+    def __init__(self, filename, test_dict, backend=None, interval=GPU_THROTTLE_SAMPLE_INTERVAL):
+        '''
+        Args:
+            filename (str): Output path prefix for the json file
+            test_dict (dict): A dictionary consisting of ATF test information
+            backend: NvmlBackend (default) or FakeNvmlBackend
+            interval (float): Seconds between samples
+        '''
+        self.filename = filename
+        self.test_dict = test_dict
+        self.backend = backend or (NvmlBackend() if PYNVML_AVAILABLE else None)
+        self.interval = interval
+
+        self.samples = []
+        # [start, end, gpu index, set of reasons]
+        self.intervals = []
+        self._open_intervals = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.available = False
+
+    def sample_once(self, timestamp=None):
+        '''Take one sample of every GPU (called by the thread; callable directly with a fake backend)'''
+        timestamp = timestamp or time.time()
+        for index in range(self.backend.device_count()):
+            try:
+                data = self.backend.sample(index)
+            except Exception as e:
+                logger.debug(f"NVML sample failed for GPU {index}: {e}")
+                continue
+            reasons = decode_throttle_reasons(data['throttle-mask'] & PERF_INVALIDATING_MASK)
+            data.update({'t': timestamp, 'gpu': index, 'phase': PhaseMarker.current(), 'throttled': reasons})
+            self.samples.append(data)
+            RunStatus.telemetry(f'gpu-{index}', data)
+            self._update_interval(index, timestamp, reasons)
+
+    def _update_interval(self, index, timestamp, reasons):
+        current = self._open_intervals.get(index)
+        if reasons:
+            if current is None:
+                current = self._open_intervals[index] = [timestamp, timestamp, index, set()]
+                self.intervals.append(current)
+            current[1] = timestamp
+            current[3].update(reasons)
+        elif current is not None:
+            # the throttled state lasted at least until this sample
+            current[1] = timestamp
+            del self._open_intervals[index]
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self.sample_once()
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        '''Start sampling; does nothing if NVML is not available'''
+        if self.backend is None:
+            logger.warning("pynvml not available, GPU throttle detection disabled")
+            return
+        try:
+            self.backend.init()
+        except Exception as e:
+            logger.warning(f"NVML init failed, GPU throttle detection disabled: {e}")
+            return
+        self.available = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        varc.thread_list.append(self._thread)
+        self._thread.start()
+
+    def stop(self):
+        '''Stop sampling and save samples and throttle intervals'''
+        if not self.available:
+            return
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 5)
+        try:
+            self.backend.shutdown()
+        except Exception:
+            pass
+
+        intervals = self.throttle_intervals()
+        with open(self.filename + "_gpu_throttle.json", "w") as json_file:
+            json.dump({'intervals': intervals, 'samples': self.samples}, json_file, indent=4)
+
+        if intervals:
+            total = sum(item['duration-s'] for item in intervals)
+            reasons = sorted({reason for item in intervals for reason in item['reasons']})
+            self.test_dict['subtest_dict']['gpu-throttle-test'] = (
+                f"GPU throttled for {total:.1f}s ({', '.join(reasons)}), performance numbers of this run are not comparable"
+            )
+
+    def throttle_intervals(self):
+        '''Return throttle intervals as json-friendly dicts'''
+        return [
+            {'gpu': gpu, 'start': start, 'end': end, 'duration-s': round(end - start, 1), 'reasons': sorted(reasons)}
+            for start, end, gpu, reasons in self.intervals
+        ]
+
+    def validity(self, start, end):
+        '''Return the performance validity of a measurement window
+
+        Args:
+            start (float): Window start (epoch seconds)
+            end (float): Window end (epoch seconds)
+
+        Returns:
+            str: VALID, UNKNOWN (not monitored) or "THROTTLED: <reasons>"
+        '''
+        if not self.available:
+            return UNKNOWN
+        reasons = set()
+        for interval_start, interval_end, _, interval_reasons in self.intervals:
+            if interval_start <= end and interval_end >= start:
+                reasons.update(interval_reasons)
+        return f"THROTTLED: {', '.join(sorted(reasons))}" if reasons else VALID
+
+    def attach_validity(self, metrics, start):
+        '''Add a performance_validity entry per timing metric
+
+        Args:
+            metrics (dict): TestResult.metrics with launch_time and total_execution_time
+            start (float): Start of the run (epoch seconds), the origin of the timing windows
+        '''
+        windows = {
+            'launch_time': (start, start + metrics.get('launch_time', 0.0)),
+            'total_execution_time': (start, start + metrics.get('total_execution_time', 0.0)),
+        }
+        # metrics without a known window (e.g. FPS measured inside the scenario) get the whole-run validity
+        run_window = windows['total_execution_time']
+        metrics['performance_validity'] = {
+            name: self.validity(*windows.get(name, run_window))
+            for name, value in metrics.items()
+            if name != 'performance_validity' and isinstance(value, (int, float))
+        }
@@ -0,0 +1,258 @@
+'''This module samples disk I/O of the processes launched by the runner and the growth of test output directories'''
+
+# Standard library imports
+import os
+import json
+import time
+import threading
+
+# Third-party imports
+import psutil
+
+# Local imports
+from fwk.shared.constants import IO_PROBE_INTERVAL
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from analysis_utils.phase_marker_util import PhaseMarker
+from analysis_utils.plot_worker_util import PlotWorker, save_series
+from generic_utils.status_server_util import RunStatus
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+MB = 1024 * 1024
+
+
+class DirectorySizeTracker:
+    '''Tracks the total size of directory trees without re-walking unchanged subtrees.
+
+    A directory is only listed again when its mtime changes (files added, removed or renamed).
+    Files that were new or grew in the previous sample are re-stat'ed individually, since writing
+    into an existing file does not change its directory's mtime. full_scan() gives exact final numbers.
+    '''
+
+    def __init__(self, roots):
+        '''
+        Args:
+            roots (list): Directories to track; missing ones are picked up once they appear
+        '''
+        self.roots = [str(root) for root in roots if root]
+        # dir path -> {'mtime': ns, 'files': {file path: size}, 'subdirs': [dir paths]}
+        self._dirs = {}
+        # files that changed in the last sample and are likely still being written
+        self._hot = set()
+        # directories listed again during the current sample
+        self._relisted = set()
+
+    def _forget(self, path):
+        entry = self._dirs.pop(path, None)
+        if entry:
+            self._hot.difference_update(entry['files'])
+            for subdir in entry['subdirs']:
+                self._forget(subdir)
+
+    def _refresh(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._forget(path)
+            return
+
+        entry = self._dirs.get(path)
+        if entry is None or entry['mtime'] != mtime:
+            old_files = entry['files'] if entry else {}
+            files, subdirs = {}, []
+            try:
+                with os.scandir(path) as entries:
+                    for item in entries:
+                        try:
+                            if item.is_dir(follow_symlinks=False):
+                                subdirs.append(item.path)
+                            elif item.is_file(follow_symlinks=False):
+                                files[item.path] = item.stat(follow_symlinks=False).st_size
+                        except OSError:
+                            continue
+            except OSError:
+                self._forget(path)
+                return
+
+            for file_path, size in files.items():
+                if old_files.get(file_path) != size:
+                    self._hot.add(file_path)
+            self._hot.difference_update(set(old_files) - set(files))
+            for subdir in set(entry['subdirs'] if entry else []) - set(subdirs):
+                self._forget(subdir)
+            entry = self._dirs[path] = {'mtime': mtime, 'files': files, 'subdirs': subdirs}
+            self._relisted.add(path)
+
+        for subdir in entry['subdirs']:
+            self._refresh(subdir)
+
+    def _restat(self, file_paths):
+        for file_path in file_paths:
+            directory = os.path.dirname(file_path)
+            entry = self._dirs.get(directory)
+            # files of a re-listed directory are already fresh
+            if entry is None or directory in self._relisted or file_path not in entry['files']:
+                continue
+            try:
+                size = os.stat(file_path).st_size
+            except OSError:
+                continue
+            if entry['files'][file_path] != size:
+                entry['files'][file_path] = size
+                self._hot.add(file_path)
+
+    def sample(self):
+        '''Update the cache and return the current total size in bytes'''
+        previously_hot, self._hot = self._hot, set()
+        self._relisted.clear()
+        for root in self.roots:
+            self._refresh(root)
+        self._restat(previously_hot)
+        return self.total_bytes()
+
+    def full_scan(self):
+        '''Drop the cache and walk everything again'''
+        self._dirs.clear()
+        self._hot.clear()
+        for root in self.roots:
+            self._refresh(root)
+        self._hot.clear()
+        return self.total_bytes()
+
+    def total_bytes(self):
+        return sum(size for entry in self._dirs.values() for size in entry['files'].values())
+
+    def breakdown_by_extension(self):
+        '''Return {extension: {'files': count, 'size-mb': size}} sorted by size, largest first'''
+        breakdown = {}
+        for entry in self._dirs.values():
+            for file_path, size in entry['files'].items():
+                extension = os.path.splitext(file_path)[1].lower() or '<none>'
+                item = breakdown.setdefault(extension, {'files': 0, 'bytes': 0})
+                item['files'] += 1
+                item['bytes'] += size
+        return {
+            extension: {'files': item['files'], 'size-mb': round(item['bytes'] / MB, 2)}
+            for extension, item in sorted(breakdown.items(), key=lambda kv: kv[1]['bytes'], reverse=True)
+        }
+
+
+class IOProbe:
+    '''Samples read/write bytes of every process started by the runner (psutil io_counters)
+    and the size of the test output directories, in a background thread'''
+
+    def __init__(self, filename, test_dict, directories, interval=IO_PROBE_INTERVAL):
+        '''
+        Args:
+            filename (str): Output path prefix for the json/npz/png files
+            test_dict (dict): A dictionary consisting of ATF test information
+            directories (list): Output directories to track
+            interval (float): Seconds between samples
+        '''
+        self.filename = filename
+        self.test_dict = test_dict
+        self.interval = interval
+        self.tracker = DirectorySizeTracker(directories)
+
+        self.samples = []
+        # pid -> (process name, last read bytes, last write bytes); kept after exit so totals stay cumulative
+        self._process_io = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _read_process_io(self):
+        '''Return cumulative (read, write) bytes of the runner's descendant processes'''
+        try:
+            children = psutil.Process().children(recursive=True)
+        except psutil.Error:
+            children = []
+        for child in children:
+            try:
+                counters = child.io_counters()
+                self._process_io[child.pid] = (child.name(), counters.read_bytes, counters.write_bytes)
+            except (psutil.Error, AttributeError):
+                # process exited, access denied, or io_counters not supported on this platform
+                continue
+        read_bytes = sum(value[1] for value in self._process_io.values())
+        write_bytes = sum(value[2] for value in self._process_io.values())
+        return read_bytes, write_bytes
+
+    def _run(self):
+        last_time = time.time()
+        last_read, last_write = self._read_process_io()
+        while not self._stop_event.wait(self.interval):
+            now = time.time()
+            read_bytes, write_bytes = self._read_process_io()
+            try:
+                output_bytes = self.tracker.sample()
+            except Exception as e:
+                logger.debug(f"Directory size sampling failed: {e}")
+                output_bytes = self.tracker.total_bytes()
+            elapsed = max(now - last_time, 1e-6)
+            self.samples.append({
+                't': now,
+                'phase': PhaseMarker.current(),
+                'read-mb-s': round((read_bytes - last_read) / MB / elapsed, 3),
+                'write-mb-s': round((write_bytes - last_write) / MB / elapsed, 3),
+                'output-mb': round(output_bytes / MB, 2),
+            })
+            RunStatus.telemetry('io', self.samples[-1])
+            last_time, last_read, last_write = now, read_bytes, write_bytes
+
+    def start(self):
+        '''Starts sampling in a daemon thread'''
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        varc.thread_list.append(self._thread)
+        self._thread.start()
+        logger.info(f"I/O probe started for {self.tracker.roots}")
+
+    def stop(self):
+        '''Stops sampling, saves the throughput curve and output breakdown and updates the perf-test entry
+
+        Returns:
+            dict: Summary of the run
+        '''
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 5)
+        self._read_process_io()
+
+        output_bytes = self.tracker.full_scan()
+        per_process = {}
+        for name, read_bytes, write_bytes in self._process_io.values():
+            item = per_process.setdefault(name, {'read-mb': 0.0, 'write-mb': 0.0})
+            item['read-mb'] += read_bytes / MB
+            item['write-mb'] += write_bytes / MB
+        per_process = {
+            name: {key: round(value, 2) for key, value in item.items()} for name, item in per_process.items()
+        }
+        summary = {
+            'total-read-mb': round(sum(item['read-mb'] for item in per_process.values()), 2),
+            'total-write-mb': round(sum(item['write-mb'] for item in per_process.values()), 2),
+            'peak-read-mb-s': max((s['read-mb-s'] for s in self.samples), default=0),
+            'peak-write-mb-s': max((s['write-mb-s'] for s in self.samples), default=0),
+            'output-size-mb': round(output_bytes / MB, 2),
+            'output-by-type': self.tracker.breakdown_by_extension(),
+        }
+
+        with open(self.filename + "_io_probe.json", "w") as json_file:
+            json.dump({'summary': summary, 'per-process': per_process, 'samples': self.samples}, json_file, indent=4)
+
+        if self.samples:
+            start = self.samples[0]['t']
+            elapsed = [s['t'] - start for s in self.samples]
+            series = {
+                'read': (elapsed, [s['read-mb-s'] for s in self.samples]),
+                'write': (elapsed, [s['write-mb-s'] for s in self.samples]),
+            }
+            markers = [(t - start, phase) for t, phase in PhaseMarker.transitions() if t >= start]
+            save_series(self.filename + "_io_probe.npz", series, title="Disk I/O throughput",
+                        ylabel="Throughput (MB/s)", markers=markers)
+            PlotWorker.submit(self.filename + "_io_probe.npz", self.filename + "_io_probe.png")
+
+        if "--perf-data-record" in self.test_dict['automation_flags_dict'] or "--perf-data-record" in self.test_dict['automation_suite_flags_dict']:
+            self.test_dict['subtest_dict'].setdefault('perf-test', {})['disk-io'] = summary
+
+        logger.info(f"I/O probe stopped: wrote {summary['total-write-mb']} MB, output size {summary['output-size-mb']} MB")
+        return summary
@@ -0,0 +1,116 @@
+'''This module tracks the pipeline phase of the running test so that recorder samples can be attributed to test steps'''
+
+# Standard library imports
+import time
+import threading
+
+# Local imports
+from fwk.shared.constants import PHASE_MARKER_TAG, DEFAULT_PHASE_NAME
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+
+class PhaseMarker:
+    '''Holds the current phase of the running test. Phases are set by the runner directly or
+    parsed from "[DMF_PHASE] <name>" lines in the test output.'''
+
+    _lock = threading.Lock()
+    _current = DEFAULT_PHASE_NAME
+    _transitions = []
+
+    @classmethod
+    def reset(cls):
+        '''Start a new test at the default phase'''
+        with cls._lock:
+            cls._current = DEFAULT_PHASE_NAME
+            cls._transitions = [(time.time(), DEFAULT_PHASE_NAME)]
+
+    @classmethod
+    def mark(cls, name, timestamp=None):
+        '''Switch to a new phase; samples taken from now on are stamped with it
+
+        Args:
+            name (str): Phase name
+            timestamp (float): Time of the switch, defaults to now
+        '''
+        name = name.strip()
+        if not name:
+            return
+        with cls._lock:
+            if name == cls._current:
+                return
+            cls._current = name
+            cls._transitions.append((timestamp or time.time(), name))
+        logger.info(f"Phase changed to '{name}'")
+
+    @classmethod
+    def current(cls):
+        '''Return the current phase name'''
+        return cls._current
+
+    @classmethod
+    def transitions(cls):
+        '''Return a copy of the (timestamp, phase) list for the running test'''
+        with cls._lock:
+            return list(cls._transitions)
+
+    @classmethod
+    def parse_line(cls, line):
+        '''Mark a phase if the output line carries the phase tag
+
+        Args:
+            line (str): One line of test output with ansi codes removed
+
+        Returns:
+            bool: True if the line was a phase marker
+        '''
+        index = line.find(PHASE_MARKER_TAG)
+        if index == -1:
+            return False
+        words = line[index + len(PHASE_MARKER_TAG):].split()
+        if words:
+            cls.mark(words[0])
+        return True
+
+
+def phase_statistics(samples):
+    '''Aggregate phase-stamped samples into per-phase statistics
+
+    Args:
+        samples (list): (timestamp, phase, value) tuples in capture order
+
+    Returns:
+        dict: phase -> {samples, peak, mean, delta, start, duration-s}. Delta is the change from the last
+        value before the phase started (or its first value) to its last value, so growth that begins
+        right at the phase boundary is attributed to the phase.
+    '''
+    stats = {}
+    previous_value = None
+    for timestamp, phase, value in samples:
+        entry = stats.get(phase)
+        if entry is None:
+            entry = stats[phase] = {
+                'samples': 0, 'peak': value, 'total': 0.0,
+                'entry': value if previous_value is None else previous_value,
+                'last': value, 'start': timestamp, 'end': timestamp,
+            }
+        entry['samples'] += 1
+        entry['peak'] = max(entry['peak'], value)
+        entry['total'] += value
+        entry['last'] = value
+        entry['end'] = timestamp
+        previous_value = value
+
+    return {
+        phase: {
+            'samples': entry['samples'],
+            'peak': round(entry['peak'], 2),
+            'mean': round(entry['total'] / entry['samples'], 2),
+            'delta': round(entry['last'] - entry['entry'], 2),
+            'start': round(entry['start'], 3),
+            'duration-s': round(entry['end'] - entry['start'], 1),
+        }
+        for phase, entry in stats.items()
+    }
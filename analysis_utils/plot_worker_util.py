@@ -0,0 +1,228 @@
+'''This module renders recorder plots in a background worker process so that test turnaround does not depend on sample count'''
+
+# Standard library imports
+import os
+import sys
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+# Third-party imports
+import numpy as np
+
+# Local imports
+from fwk.shared.constants import RECORDER_PLOT_MAX_POINTS
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+
+def lttb_downsample(x, y, threshold=RECORDER_PLOT_MAX_POINTS):
+    '''Downsample a series with Largest-Triangle-Three-Buckets, keeping its visual shape
+
+    Args:
+        x (array-like): Sample timestamps (monotonic)
+        y (array-like): Sample values
+        threshold (int): Number of points to keep
+
+    Returns:
+        tuple: (x, y) numpy arrays with at most threshold points
+    '''
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    length = len(x)
+    if threshold >= length or threshold < 3:
+        return x, y
+
+    sampled = np.empty(threshold, dtype=np.int64)
+    sampled[0] = 0
+    sampled[-1] = length - 1
+
+    # Buckets exclude first and last point, which are always kept
+    bucket_edges = np.linspace(1, length - 1, threshold - 1).astype(np.int64)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        next_start = end
+        next_end = bucket_edges[i + 2] if i + 2 < len(bucket_edges) else length
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Pick the point in this bucket forming the largest triangle with the previous pick and next bucket average
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        sampled[i + 1] = a
+
+    return x[sampled], y[sampled]
+
+
+def save_series(npz_path, series, title="", xlabel="Time (s)", ylabel="", markers=None):
+    '''Save raw recorder series in compressed numpy format so plots can be regenerated later
+
+    Args:
+        npz_path (str): Output file path (.npz)
+        series (dict): Mapping of series name to (x, y) sequences
+        title (str): Plot title stored as metadata
+        xlabel (str): X axis label stored as metadata
+        ylabel (str): Y axis label stored as metadata
+        markers (list): Optional (x, label) pairs drawn as vertical lines, e.g. test phase changes
+    '''
+    markers = markers or []
+    arrays = {
+        'names': np.array(list(series.keys())),
+        'meta': np.array([title, xlabel, ylabel]),
+        'marker_x': np.array([x for x, _ in markers], dtype=np.float64),
+        'marker_labels': np.array([label for _, label in markers], dtype=str),
+    }
+    for index, (x, y) in enumerate(series.values()):
+        arrays[f'x_{index}'] = np.asarray(x, dtype=np.float32)
+        arrays[f'y_{index}'] = np.asarray(y, dtype=np.float32)
+    np.savez_compressed(npz_path, **arrays)
+
+
+def load_series(npz_path):
+    '''Load series saved by save_series
+
+    Returns:
+        tuple: (series dict, title, xlabel, ylabel, markers list)
+    '''
+    with np.load(npz_path) as data:
+        title, xlabel, ylabel = [str(value) for value in data['meta']]
+        series = {
+            str(name): (data[f'x_{index}'], data[f'y_{index}'])
+            for index, name in enumerate(data['names'])
+        }
+        markers = []
+        if 'marker_x' in data:
+            markers = [(float(x), str(label)) for x, label in zip(data['marker_x'], data['marker_labels'])]
+    return series, title, xlabel, ylabel, markers
+
+
+def render_plot(npz_path, png_path, max_points=RECORDER_PLOT_MAX_POINTS):
+    '''Render a PNG from a saved series file using the Agg backend. Runs inside the worker process.
+
+    Args:
+        npz_path (str): Series file written by save_series
+        png_path (str): Output png path
+        max_points (int): LTTB threshold per series
+
+    Returns:
+        str: png_path
+    '''
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    series, title, xlabel, ylabel, markers = load_series(npz_path)
+
+    fig, ax = plt.subplots()
+    max_value = 0
+    for name, (x, y) in series.items():
+        if len(y) == 0:
+            continue
+        x_ds, y_ds = lttb_downsample(x, y, max_points)
+        ax.plot(x_ds, y_ds, marker='.', markersize=2, linewidth=0.6, label=name)
+        max_value = max(max_value, float(np.max(y)))
+
+    for x, label in markers:
+        ax.axvline(x, color='grey', linestyle='--', linewidth=0.5)
+        ax.text(x, 1.0, label, rotation=90, fontsize=4, va='top', ha='right', transform=ax.get_xaxis_transform())
+
+    ax.legend(fontsize="5")
+    if ylabel == "Memory (MB)" and max_value:
+        top = int(np.ceil(max_value / 1000) * 1000)
+        ax.set_yticks(np.arange(0, top + 1000, 1000))
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.grid()
+    fig.savefig(png_path, dpi=300)
+    plt.close(fig)
+    return png_path
+
+
+class PlotWorker:
+    '''Single background process shared by all recorders to render plots off the critical path'''
+
+    _executor = None
+    _pending = []
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_executor(cls):
+        if cls._executor is None:
+            # spawn keeps the worker free of the runner's threads and open handles on every platform
+            cls._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(cls.shutdown)
+        return cls._executor
+
+    @classmethod
+    def submit(cls, npz_path, png_path, max_points=RECORDER_PLOT_MAX_POINTS):
+        '''Queue a plot for rendering and return immediately
+
+        Args:
+            npz_path (str): Series file written by save_series
+            png_path (str): Output png path
+            max_points (int): LTTB threshold per series
+        '''
+        try:
+            future = cls._get_executor().submit(render_plot, npz_path, png_path, max_points)
+        except Exception as e:
+            logger.warning(f"Plot worker unavailable ({e}), rendering {png_path} inline")
+            return render_plot(npz_path, png_path, max_points)
+
+        future.png_path = os.path.abspath(png_path)
+        future.add_done_callback(cls._log_result)
+        with cls._lock:
+            cls._pending = [f for f in cls._pending if not f.done()] + [future]
+        return future
+
+    @staticmethod
+    def _log_result(future):
+        error = future.exception()
+        if error:
+            logger.error(f"Plot rendering failed: {error}")
+        else:
+            logger.debug(f"Plot rendered: {future.result()}")
+
+    @classmethod
+    def wait_for_pending(cls, timeout=None):
+        '''Block until queued plots are rendered (used at suite end)'''
+        with cls._lock:
+            pending, cls._pending = cls._pending, []
+        if pending:
+            logger.info(f"Waiting for {len(pending)} queued plot(s) to finish rendering")
+            wait(pending, timeout=timeout)
+
+    @classmethod
+    def wait_for_folder(cls, folder, timeout=None):
+        '''Block until the queued plots inside a folder are rendered (before the folder is uploaded)
+
+        Returns:
+            list: png paths still rendering when the timeout expired
+        '''
+        folder = os.path.join(os.path.abspath(folder), '')
+        with cls._lock:
+            pending = [future for future in cls._pending if not future.done() and future.png_path.startswith(folder)]
+        if pending:
+            logger.info(f"Waiting for {len(pending)} plot(s) of {folder} to finish rendering")
+            wait(pending, timeout=timeout)
+        return [future.png_path for future in pending if not future.done()]
+
+    @classmethod
+    def shutdown(cls):
+        '''Finish queued plots and stop the worker process'''
+        if cls._executor is not None:
+            cls.wait_for_pending()
+            cls._executor.shutdown(wait=True)
+            cls._executor = None
+
+
+if __name__ == '__main__':
+    # Regenerate plots from saved series: python -m analysis_utils.plot_worker_util <file.npz> [...]
+    for npz_path in sys.argv[1:]:
+        print(render_plot(npz_path, npz_path.rsplit('.npz', 1)[0] + '.png'))
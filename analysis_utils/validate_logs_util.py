@@ -14,14 +14,28 @@ import re
 import select
 import logging
 # Local imports
-from fwk.shared.constants import SCENARIO_SUCCESS_MESSAGE_LIST
+from fwk.shared.constants import SCENARIO_SUCCESS_MESSAGE_LIST, KIT_LOG_COPY_FILE_NAME
 from fwk.shared.variables_util import varc
 from generic_utils.helper_util import HelperMethods
+from generic_utils.metrics_registry_util import LOG_CLASSIFICATIONS_TOTAL
+from analysis_utils.phase_marker_util import PhaseMarker
 from fwk.fwk_logger.fwk_logging import get_logger
+from fwk.fwk_profiler.fwk_profiling import profile_span
 
 logger = get_logger(__name__, varc.framework_logs_path)
 
 
+def count_classification(log, result):
+    '''Count a failing analysis result in the runtime metrics
+
+    Args:
+        log (str): Analyzed log, e.g. kit or pytest
+        result (dict): verdict, severity and reason returned by an analyze_* method
+    '''
+    if result['verdict'] == 'fail':
+        LOG_CLASSIFICATIONS_TOTAL.inc(component=varc.component, log=log, severity=result['severity'])
+
+
 class ValidateLogsMethod():
     '''This class is used to analyze logs'''
     
@@ -66,6 +80,7 @@ class ValidateLogsMethod():
                     dict['reason'].append(f'P0 functional issue found here : {line}')
                     break    
                                 
+        count_classification('frame_generation', dict)
         return dict
 
     @staticmethod
@@ -83,6 +98,7 @@ class ValidateLogsMethod():
                     dict['severity'] = 'p1'
                     dict['reason'].append(f'P1 issue found here : {line}')
 
+        count_classification('kit', dict)
         return dict
 
     @staticmethod
@@ -117,6 +133,7 @@ class ValidateLogsMethod():
                     if line.strip():  # Only append non-empty lines
                         dict['reason'].append(f'{line}')
 
+        count_classification('pytest', dict)
         return dict
 
 class LoggerMethods:
@@ -271,6 +288,7 @@ class LoggerMethods:
                     line_str = line.decode(errors='ignore').strip()
                     logger.debug(line_str)
                     clean_line = strip_ansi(line_str)
+                    PhaseMarker.parse_line(clean_line)
                     f.write(clean_line + "\n")
                     f.flush()
                     line_count += 1
@@ -469,6 +487,7 @@ class LoggerMethods:
                     line_str = line.decode(errors='ignore').strip()
                     logger.debug(line_str)
                     clean_line = strip_ansi(line_str)
+                    PhaseMarker.parse_line(clean_line)
                     f.write(clean_line + "\n")
                     f.flush()
                     line_count += 1
@@ -558,6 +577,7 @@ class LoggerMethods:
                         
                         # Write to log file
                         f.write(f"[{line_count:04d}] {line}\n")
+                        PhaseMarker.parse_line(line)
                         
                         # Check for CLI success patterns
                         for pattern in cli_success_patterns:
@@ -644,6 +664,7 @@ class LogsSaverMethods:
     '''This class consist of methods that isolate  different type of test data in automation output directory'''
     
     @staticmethod
+    @profile_span()
     def logs_saver(test_dict):
         '''
         This function is used to save different type of logs like kit,nv-gpu dump etc for each test.
@@ -771,6 +792,7 @@ class LogsSaverMethods:
 
 
     @staticmethod
+    @profile_span()
     def check_kit_log_for_app_ready(test_dict, launch_log_filename, component='DSRS'):
         """
         Searches the actual Kit log file for the 'app ready' message.
@@ -849,6 +871,7 @@ class LogsSaverMethods:
             return False
 
     @staticmethod
+    @profile_span()
     def copy_kit_logs(test_dict, component='DSRS'):
         """Find and copy kit log files to the test logs directory (supports DSRS and MAP2SIM)"""
         logger.info(f"Searching for Kit log path in: {test_dict['test_logs_path']} (component={component})")
@@ -911,7 +934,7 @@ class LogsSaverMethods:
                 return
             
             # Copy to the test logs directory
-            destination = os.path.join(test_dict['test_logs_path'], "kit_application.log")
+            destination = os.path.join(test_dict['test_logs_path'], KIT_LOG_COPY_FILE_NAME)
             try:
                 shutil.copy2(kit_log_path, destination)
                 # Store file name for later analysis
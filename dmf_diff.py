@@ -0,0 +1,12 @@
+'''dmf-diff: compare two DMF suite output directories
+
+Usage:
+    python dmf_diff.py Outputs/<suite A> Outputs/<suite B> [--json]
+'''
+
+import sys
+
+from generic_utils.run_diff_util import main
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# fwk_profiling.py - DMF self-profiling (enabled with --profile)
+import os
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Optional, Dict, List
+
+
+class DMFProfiler:
+    """
+    Records timed spans of framework code and writes them as a Chrome trace-event JSON
+    (open in chrome://tracing or https://ui.perfetto.dev) plus a self-time summary table.
+    Disabled by default; every span is a cheap pass-through until enable() is called.
+    """
+
+    # Class-level storage
+    _enabled: bool = False
+    _output_dir: Optional[str] = None
+    _origin: float = 0.0
+    _events: List[Dict] = []
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    @staticmethod
+    def enable(output_dir: str):
+        """
+        Start recording spans
+
+        Args:
+            output_dir: Directory where the trace and summary are written (framework_logs)
+        """
+        DMFProfiler._output_dir = output_dir
+        DMFProfiler._origin = time.perf_counter()
+        DMFProfiler._events = []
+        DMFProfiler._enabled = True
+
+    @staticmethod
+    def is_enabled() -> bool:
+        return DMFProfiler._enabled
+
+    @staticmethod
+    def _stack() -> List:
+        stack = getattr(DMFProfiler._local, 'stack', None)
+        if stack is None:
+            stack = DMFProfiler._local.stack = []
+        return stack
+
+    @staticmethod
+    @contextmanager
+    def span(name: str, category: str = 'dmf', **args):
+        """
+        Time a block of code
+
+        Args:
+            name: Span name shown in the trace
+            category: Trace category (used for filtering in the viewer)
+            **args: Extra values attached to the trace event (e.g. test name)
+        """
+        if not DMFProfiler._enabled:
+            yield
+            return
+
+        stack = DMFProfiler._stack()
+        # outermost span of its thread, e.g. work started in a thread by a span of another thread
+        top_level = not stack
+        # frame: [name, child time]
+        frame = [name, 0.0]
+        stack.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1][1] += duration
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((start - DMFProfiler._origin) * 1e6, 1),
+                'dur': round(duration * 1e6, 1),
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+                'self': duration - frame[1],
+                'top': top_level,
+            }
+            if args:
+                event['args'] = {key: str(value) for key, value in args.items()}
+            with DMFProfiler._lock:
+                DMFProfiler._events.append(event)
+
+    @staticmethod
+    def _cross_thread_self_times(events: List[Dict]) -> List[float]:
+        """
+        Self time of every event, without the time covered by spans of other threads that it waits for
+
+        The outermost span of a thread is attributed to the innermost span of another thread that was open when it
+        started (e.g. the Kit scenario thread started by map2sim_runner); overlapping children count once.
+        """
+        children: Dict[int, List] = {}
+        for child in events:
+            if not child.get('top'):
+                continue
+            parent = None
+            for index, event in enumerate(events):
+                if event['tid'] == child['tid'] or not event['ts'] <= child['ts'] <= event['ts'] + event['dur']:
+                    continue
+                if parent is None or event['dur'] < events[parent]['dur']:
+                    parent = index
+            if parent is not None:
+                end = min(child['ts'] + child['dur'], events[parent]['ts'] + events[parent]['dur'])
+                children.setdefault(parent, []).append((child['ts'], end))
+
+        self_times = [event['self'] for event in events]
+        for index, intervals in children.items():
+            covered = 0.0
+            current_start, current_end = None, None
+            for start, end in sorted(intervals):
+                if current_end is None or start > current_end:
+                    if current_end is not None:
+                        covered += current_end - current_start
+                    current_start, current_end = start, end
+                else:
+                    current_end = max(current_end, end)
+            if current_end is not None:
+                covered += current_end - current_start
+            self_times[index] = max(0.0, self_times[index] - covered / 1e6)
+        return self_times
+
+    @staticmethod
+    def summary_rows() -> List[List]:
+        """Return [span, calls, total s, self s, self %] rows sorted by self time"""
+        with DMFProfiler._lock:
+            events = list(DMFProfiler._events)
+        self_times = DMFProfiler._cross_thread_self_times(events)
+        totals: Dict[str, List] = {}
+        for event, self_time in zip(events, self_times):
+            row = totals.setdefault(event['name'], [0, 0.0, 0.0])
+            row[0] += 1
+            row[1] += event['dur'] / 1e6
+            row[2] += self_time
+        wall = time.perf_counter() - DMFProfiler._origin
+        rows = [
+            [name, calls, round(total, 3), round(self_time, 3), round(100 * self_time / wall, 1) if wall else 0.0]
+            for name, (calls, total, self_time) in totals.items()
+        ]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    @staticmethod
+    def write_outputs() -> Optional[str]:
+        """
+        Write the Chrome trace JSON and the self-time summary to the output directory
+
+        Returns:
+            Path of the trace file, or None if profiling is disabled
+        """
+        if not DMFProfiler._enabled or not DMFProfiler._output_dir:
+            return None
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        trace_path = os.path.join(DMFProfiler._output_dir, f"dmf_profile_trace_{timestamp}.json")
+        summary_path = os.path.join(DMFProfiler._output_dir, f"dmf_profile_summary_{timestamp}.txt")
+
+        with DMFProfiler._lock:
+            events = [{key: value for key, value in event.items() if key not in ('self', 'top')} for event in DMFProfiler._events]
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': thread_names.get(tid, str(tid))}}
+            for tid in {event['tid'] for event in events}
+        ]
+        with open(trace_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + events, 'displayTimeUnit': 'ms'}, f)
+
+        # imported here: this module is loaded by main_runner before dependencies are installed
+        from tabulate import tabulate
+        rows = DMFProfiler.summary_rows()
+        table = tabulate(rows, headers=['Span', 'Calls', 'Total (s)', 'Self (s)', 'Self (% of wall)'], tablefmt="presto")
+        wall = time.perf_counter() - DMFProfiler._origin
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(f"DMF profile - wall time {wall:.2f}s\n\n{table}\n")
+
+        return trace_path
+
+
+def profile_span(name: Optional[str] = None, category: Optional[str] = None):
+    """
+    Decorator version of DMFProfiler.span. Place it below @staticmethod.
+
+    Args:
+        name: Span name, defaults to the function's qualified name
+        category: Trace category, defaults to the top-level package of the function
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+        span_category = category or func.__module__.split('.')[0]
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not DMFProfiler._enabled:
+                return func(*args, **kwargs)
+            with DMFProfiler.span(span_name, span_category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
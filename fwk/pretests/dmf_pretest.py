@@ -18,6 +18,7 @@ from generic_utils.directory_helper_util import DirectoryCreatorMethods
 from generic_utils.reporting_util import ReportingMethods
 from fwk.fwk_logger.fwk_logging import get_logger
 from fwk.pretests.header_util import HeaderUtil
+from fwk.shared.constants import RESULTS_HISTORY_DB_FILE_NAME, ARTIFACT_STORE_DIR_NAME
 
 logger = get_logger('DMF_PRETEST')
 
@@ -41,6 +42,20 @@ def dmf_config_loader():
     varc.verdict_decider_list = config['settings']['verdict_decider_list']
     # Optional sections
     varc.overwrite_log_level = config.get('settings', {}).get('overwrite_log_level', None)
+    history = config.get('history', {})
+    if history.get('enabled', True):
+        varc.results_history_db_path = history.get('db_path') or os.path.join(
+            os.path.dirname(varc.test_suite_path), RESULTS_HISTORY_DB_FILE_NAME
+        )
+    varc.flakiness_config = config.get('flakiness', {})
+    varc.metrics_textfile_path = config.get('metrics', {}).get('textfile_path') or None
+    artifact_store = config.get('artifact_store', {})
+    if artifact_store.get('enabled', True):
+        varc.artifact_store_path = artifact_store.get('path') or os.path.join(
+            os.path.dirname(varc.test_suite_path), ARTIFACT_STORE_DIR_NAME
+        )
+    varc.upload_queue_config = config.get('upload_queue', {})
+    varc.retention_config = config.get('retention', {})
 
 
 class DMFPreTestRunner:
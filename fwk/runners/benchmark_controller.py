@@ -0,0 +1,195 @@
+# fwk/runners/benchmark_controller.py - Repeat-measurement benchmark mode
+
+# Standard library imports
+import os
+from pathlib import Path
+
+# Local imports
+from fwk.shared.variables_util import varc
+from fwk.shared.constants import BENCHMARK_REPEATS_DIR_NAME, BENCHMARK_BOOTSTRAP_RESAMPLES, BENCHMARK_CONFIDENCE
+from fwk.fwk_logger.fwk_logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _is_inside(path, folder):
+    """True when path is folder or below it (Path.is_relative_to needs Python 3.9)"""
+    path, folder = os.path.abspath(path), os.path.abspath(folder)
+    try:
+        return os.path.commonpath([path, folder]) == folder
+    except ValueError:  # different drives on Windows
+        return False
+
+
+class BenchmarkController:
+    """This class repeats every test in benchmark mode (--benchmark-repeats N, --benchmark-warmup W).
+
+    All repeats share the test folder: the outputs of each repeat go to <test>/repeats/repeat_<n>
+    (warmup_<n> for warm-ups) and the aggregated statistics are written next to them.
+    """
+
+    def __init__(self, repeats=None, warmup=None):
+        self.repeats = repeats if repeats is not None else getattr(varc.args, 'benchmark_repeats', None) or 0
+        self.warmup = warmup if warmup is not None else getattr(varc.args, 'benchmark_warmup', None) or 0
+
+    def is_enabled(self):
+        return self.repeats > 0
+
+    def repeat_folder_name(self, index):
+        """Folder name of a repeat; warm-ups are numbered separately from the measured repeats"""
+        if index < self.warmup:
+            return f"warmup_{index + 1}"
+        return f"repeat_{index - self.warmup + 1}"
+
+    def prepare_repeat(self, test_dict):
+        """Point the output paths of the test at the folder of its current repeat (called before execute_test).
+
+        Args:
+            test_dict: Dictionary containing test information
+        """
+        if not self.is_enabled():
+            return
+
+        state = test_dict.get('benchmark')
+        if state is None:
+            test_root = Path(test_dict['test_path'])
+            base_paths = {}
+            for key, value in test_dict.items():
+                if key == 'test_path' or not key.endswith('_path') or not isinstance(value, str):
+                    continue
+                # only folders inside the test folder move into the repeat folders
+                if _is_inside(value, test_root):
+                    base_paths[key] = value
+            state = test_dict['benchmark'] = {'repeat': 0, 'base_paths': base_paths, 'samples': []}
+
+        repeat_root = Path(test_dict['test_path']) / BENCHMARK_REPEATS_DIR_NAME / self.repeat_folder_name(state['repeat'])
+        for key, base_path in state['base_paths'].items():
+            repeat_path = repeat_root / Path(base_path).relative_to(test_dict['test_path'])
+            repeat_path.mkdir(parents=True, exist_ok=True)
+            test_dict[key] = str(repeat_path)
+
+        logger.info(f"Benchmark [{test_dict['name']}]: {repeat_root.name} of {self.warmup + self.repeats} runs")
+
+    def handle_test_result(self, test_dict, result, test_queue, current_test_index):
+        """Record the metrics of the finished repeat and queue the next one.
+
+        Args:
+            test_dict: Dictionary containing test information
+            result: TestResult of the finished repeat
+            test_queue: The deque containing test items
+            current_test_index: Current test index in the queue
+
+        Returns:
+            bool: True when another repeat was queued, False after the last repeat
+        """
+        from generic_utils.benchmark_util import repeat_sample
+
+        state = test_dict['benchmark']
+        index = state['repeat']
+        state['samples'].append(repeat_sample(test_dict, index, index < self.warmup))
+
+        if index + 1 < self.warmup + self.repeats:
+            state['repeat'] += 1
+            self.reset_test_fields(test_dict)
+            # the same test_dict is queued again so the samples end up in varc.tests_list for the suite-level gates
+            test_queue.insert(current_test_index + 1, {'test_dict': test_dict, 'result': type(result)()})
+            return True
+
+        self.finalize(test_dict)
+        return False
+
+    def handle_failed_run(self, test_dict, result, test_queue, current_test_index):
+        """Record a repeat that ended without a regular result (runner exception, retries exhausted) as failed
+        and continue with the next repeat, so the repeat paths are restored and the summary is written in any case.
+
+        Args:
+            test_dict: Dictionary containing test information
+            result: TestResult of the failed repeat
+            test_queue: The deque containing test items
+            current_test_index: Current test index in the queue
+
+        Returns:
+            bool: True when another repeat was queued
+        """
+        if not self.is_enabled() or 'benchmark' not in test_dict:
+            return False
+        if test_dict['verdicts'].get('final-verdict') in (None, 'PASS'):
+            test_dict['verdicts']['final-verdict'] = 'FAIL'
+        logger.warning(f"Benchmark [{test_dict['name']}]: repeat {test_dict['benchmark']['repeat'] + 1} failed: {result.error_message}")
+        return self.handle_test_result(test_dict, result, test_queue, current_test_index)
+
+    def reset_test_fields(self, test_dict):
+        """Resets test fields for the next repeat (the test keeps its name, only the output folders change)"""
+        test_dict['verdicts'] = {
+            "final-verdict": None,
+            "logs-errors": None,
+            "process-specific-errors": None,
+            "launch-time": None,
+            "execution-time": None
+        }
+        test_dict['detailed_analysis'] = {
+            "logs": None,
+            "kit_logs": None,
+            "pytest_logs": None
+        }
+        test_dict['subtest_dict'] = {}
+        test_dict['execution_metrics'] = {}
+        if 'dmf_warnings' in test_dict:
+            test_dict['dmf_warnings'] = []
+
+    def finalize(self, test_dict):
+        """Aggregate the repeats: statistics, median metrics, benchmark_summary.json, reggie json and the report entry.
+
+        Args:
+            test_dict: Dictionary containing test information
+        """
+        from generic_utils.benchmark_util import metric_samples, summarize, write_benchmark_summary, write_reggie_json
+        from generic_utils.result_store_util import ResultStore
+
+        state = test_dict.pop('benchmark')
+        test_dict.update(state['base_paths'])
+        samples = state['samples']
+
+        stats = summarize(samples)
+        failed = [sample['repeat'] for sample in samples if sample['verdict'] != 'PASS']
+        settings = {
+            'repeats': self.repeats,
+            'warmup': self.warmup,
+            'failed_repeats': failed,
+            'bootstrap_resamples': BENCHMARK_BOOTSTRAP_RESAMPLES,
+            'confidence': BENCHMARK_CONFIDENCE,
+        }
+
+        # the suite-level regression gate compares all measured values, reports show the medians
+        test_dict['metric_samples'] = metric_samples(samples)
+        test_dict['benchmark_stats'] = stats
+        execution_metrics = test_dict.setdefault('execution_metrics', {})
+        for name in list(execution_metrics):
+            if name in stats:
+                execution_metrics[name] = stats[name]['median']
+
+        headline = ", ".join(
+            f"{name} {values['median']:.3g} [{values['ci_low']:.3g}, {values['ci_high']:.3g}]"
+            for name, values in stats.items() if name in execution_metrics and values['ci_low'] is not None
+        )
+        measured = sum(1 for sample in samples if not sample['warmup'] and sample['verdict'] == 'PASS')
+        test_dict['subtest_dict']['benchmark'] = (
+            f"{measured} of {self.repeats} "
+            f"repeats measured ({self.warmup} warm-up) - median [{int(BENCHMARK_CONFIDENCE * 100)}% CI]: {headline or 'NA'}"
+        )
+        update = {'execution_metrics': execution_metrics, 'subtest_dict': test_dict['subtest_dict'], 'benchmark': {'settings': settings, 'stats': stats}}
+        if failed and test_dict['verdicts'].get('final-verdict') == 'PASS':
+            test_dict['verdicts']['final-verdict'] = 'FAIL'
+            test_dict['verdicts']['process-specific-errors'] = f"{len(failed)} of {len(samples)} benchmark runs failed"
+            update.update({'final_verdict': 'FAIL', 'process_specific_errors': test_dict['verdicts']['process-specific-errors']})
+
+        try:
+            summary_path = write_benchmark_summary(test_dict, samples, stats, settings)
+            write_reggie_json(test_dict, samples, stats, os.path.join(test_dict['test_path'], 'reggie'))
+            logger.info(f"Benchmark [{test_dict['name']}]: {test_dict['subtest_dict']['benchmark']} ({summary_path})")
+        except Exception as e:
+            logger.warning(f"Benchmark [{test_dict['name']}]: could not write the benchmark outputs: {e}")
+
+        ResultStore(varc.test_suite_path).append_update(
+            test_dict['updated_name'], update, f"{test_dict['updated_name']} - benchmark: {test_dict['subtest_dict']['benchmark']}\n\n"
+        )
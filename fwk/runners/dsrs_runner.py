@@ -4,25 +4,34 @@ import sys
 import subprocess
 import os
 import threading
+import time
 from enum import Enum, auto
 from collections import deque
+from itertools import islice
 from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional
 import json
 
 # Local imports
 from analysis_utils.validate_logs_util import LogsSaverMethods
+from analysis_utils.phase_marker_util import PhaseMarker
 from generic_utils.helper_util import HelperMethods
 from generic_utils.reporting_util import ReportingMethods
+from generic_utils.flakiness_util import FlakinessMethods
+from generic_utils.status_server_util import RunStatus
+from generic_utils.upload_queue_util import UploadQueue
+from generic_utils.metrics_registry_util import QUEUE_DEPTH, TEST_RUNNING, observe_attempt
 from fwk.shared.variables_util import varc
 from fwk.fwk_logger.fwk_logging import get_logger
 from fwk.runners.iteration_controller import IterationController
+from fwk.runners.benchmark_controller import BenchmarkController
 from fwk.shared.constants import (
     DSRS_LAUNCH_LOG_FILE_NAME,
     DSRS_SCENARIO_LAUNCH_LOG_FILE_NAME,
     DSRS_SCENARIO_TYPE,
     KIT_PROCESS_NAME
 )
+from fwk.fwk_profiler.fwk_profiling import profile_span
 
 class TestStatus(Enum):
     PENDING = auto()    # Test waiting to be executed
@@ -52,6 +61,7 @@ class DSRSRunner:
     
     def __init__(self):
         self.iteration_controller = IterationController()
+        self.benchmark_controller = BenchmarkController()
         self.launch_log_file = DSRS_LAUNCH_LOG_FILE_NAME
         self.scenario_log_file = DSRS_SCENARIO_LAUNCH_LOG_FILE_NAME
     
@@ -90,11 +100,12 @@ class DSRSRunner:
                 current_index += 1
                 continue
             
-            # Check max retry attempts (safety net for existing retry logic)
-            if result.attempts >= 3:  # Max 3 attempts per test (existing retry logic)
+            # Check max retry attempts (safety net for existing retry logic, quarantined tests get one)
+            if result.attempts >= FlakinessMethods.max_attempts(test_dict):
                 result.status = TestStatus.FAILED
                 result.error_message = "Exceeded maximum retry attempts"
                 logger.error(f"Test [{test_dict['name']}]: {result.error_message}")
+                self._benchmark_failed_run(test_dict, result, test_queue, current_index)
                 final_results.append({
                     'name': test_dict.get('updated_name', test_dict.get('name', 'Unknown')),
                     'status': result.status.name,
@@ -108,10 +119,19 @@ class DSRSRunner:
             # Mark as running and increment attempt counter
             result.status = TestStatus.RUNNING
             result.attempts += 1
+            attempt_started = time.time()
+            RunStatus.test_started(test_dict, result.attempts)
+            RunStatus.set_queue([item['test_dict']['name'] for item in islice(test_queue, current_index + 1, None)])
+            QUEUE_DEPTH.set(len(test_queue) - current_index - 1, component=varc.component)
+            TEST_RUNNING.set(1, component=varc.component)
             
             try:
-                # Execute the test, main logic
+                # Execute the test, main logic (benchmark repeats write to their own subfolder)
+                self.benchmark_controller.prepare_repeat(test_dict)
                 self.execute_test(test_dict, result)
+                FlakinessMethods.record_attempt(test_dict, result, attempt_started)
+                RunStatus.test_finished(test_dict, test_dict['verdicts'].get('final-verdict'))
+                observe_attempt(test_dict, result, time.time() - attempt_started)
                 
                 # Handle test result
                 if result.status == TestStatus.RETRY:
@@ -124,11 +144,16 @@ class DSRSRunner:
                     # Test completed - check for iterations (AFTER test completion like original)
                     original_queue_size = len(test_queue)
                     
+                    # Benchmark mode queues the next repeat first, iterations start after the last repeat
+                    queued_repeat = self.benchmark_controller.is_enabled() and \
+                        self.benchmark_controller.handle_test_result(test_dict, result, test_queue, current_index)
+
                     # Handle iteration logic (like original reference)
-                    self.iteration_controller.handle_test_result(test_dict, test_queue, current_index)
+                    if not queued_repeat:
+                        self.iteration_controller.handle_test_result(test_dict, test_queue, current_index)
                     
                     # Check if iteration was added
-                    if len(test_queue) > original_queue_size:
+                    if len(test_queue) > original_queue_size and not queued_repeat:
                         logger.info(f"Added iteration test at index {current_index + 1}")
                     
                     # Add to final results
@@ -143,12 +168,17 @@ class DSRSRunner:
                     # Generate reports for completed tests
                     if result.status == TestStatus.COMPLETED:
                         self._generate_reports(test_dict)
+
+                    # Upload the finished test in the background while the next one runs
+                    if not queued_repeat:
+                        UploadQueue.enqueue_test(test_dict)
                     
                     # Move to next test
                     current_index += 1
                 
                 else:
                     # Other statuses, just move to next test
+                    self._benchmark_failed_run(test_dict, result, test_queue, current_index)
                     final_results.append({
                         'name': test_dict.get('updated_name', test_dict.get('name', 'Unknown')),
                         'status': result.status.name,
@@ -163,6 +193,10 @@ class DSRSRunner:
                 result.status = TestStatus.FAILED
                 result.error_message = f"Unexpected error: {str(e)}"
                 logger.error(f"Test [{test_dict['name']}]: {result.error_message}")
+                FlakinessMethods.record_attempt(test_dict, result, attempt_started)
+                RunStatus.test_finished(test_dict, 'FAIL')
+                observe_attempt(test_dict, result, time.time() - attempt_started)
+                self._benchmark_failed_run(test_dict, result, test_queue, current_index)
                 
                 # Add to final results
                 final_results.append({
@@ -179,12 +213,23 @@ class DSRSRunner:
         logger.info(f"DSRS test execution completed. Processed {len(final_results)} tests")
         return final_results
         
+    def _benchmark_failed_run(self, test_dict, result, test_queue, current_index):
+        """Count a failed benchmark repeat and continue with the next one (no-op outside benchmark mode)"""
+        try:
+            self.benchmark_controller.handle_failed_run(test_dict, result, test_queue, current_index)
+        except Exception as e:
+            logger.warning(f"Benchmark [{test_dict['name']}]: could not record the failed repeat: {e}")
+
+    @profile_span()
     def execute_test(self, test_dict, result):
         """Execute a single DSRS test with proper phase management"""
         from generic_utils.command_runner_util import CommandRunnerMethods
         from generic_utils.analysis_caller_util import PretestAnalysisCallerMethods, PosttestAnalysisCallerMethods
         
         try:
+            # Every test starts in the default phase until the test code marks one
+            PhaseMarker.reset()
+
             # Initialize test environment variables
             self._initialize_test_variables(test_dict)
             
@@ -39,7 +39,12 @@ class IterationController:
         
         if iterate_number is not None:
             return self.iteration < int(iterate_number)
-        
+
+        # Quarantined flaky tests are not retried
+        from generic_utils.flakiness_util import FlakinessMethods
+        if FlakinessMethods.is_quarantined(test_dict):
+            return False
+
         # If --iterate is not specified, allow retry within max_iterations
         return needs_retry and self.iteration < self.max_iterations
 
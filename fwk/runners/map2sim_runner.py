@@ -9,6 +9,7 @@ import threading
 import time
 from enum import Enum, auto
 from collections import deque
+from itertools import islice
 from dataclasses import dataclass, field
 from typing import Dict, Any, List, Optional
 import json
@@ -18,16 +19,23 @@ from pathlib import Path
 
 # Local imports
 from analysis_utils.validate_logs_util import LogsSaverMethods
+from analysis_utils.phase_marker_util import PhaseMarker
 from generic_utils.helper_util import HelperMethods
 from generic_utils.reporting_util import ReportingMethods
+from generic_utils.flakiness_util import FlakinessMethods
+from generic_utils.status_server_util import RunStatus
+from generic_utils.upload_queue_util import UploadQueue
+from generic_utils.metrics_registry_util import QUEUE_DEPTH, TEST_RUNNING, observe_attempt
 from fwk.shared.variables_util import varc
 from fwk.fwk_logger.fwk_logging import get_logger
+from fwk.runners.benchmark_controller import BenchmarkController
 from fwk.shared.constants import (
     KIT_PROCESS_NAME,
     MAP2SIM_LAUNCH_LOG_FILE_NAME,
     MAP2SIM_SCENARIO_LAUNCH_LOG_FILE_NAME
 )
 from generic_utils.windows_develop_mode import WindowsDevelopMode
+from fwk.fwk_profiler.fwk_profiling import profile_span
 
 # Platform detection
 IS_WINDOWS = platform.system() == "Windows"
@@ -60,6 +68,7 @@ class MAP2SIMRunner:
     def __init__(self):
         self.launch_log_file = MAP2SIM_LAUNCH_LOG_FILE_NAME
         self.scenario_log_file = MAP2SIM_SCENARIO_LAUNCH_LOG_FILE_NAME
+        self.benchmark_controller = BenchmarkController()
 
     def run_tests(self, tests_list):
         """Run all tests using a queue-based approach with dynamic iteration support"""
@@ -96,11 +105,12 @@ class MAP2SIMRunner:
                 current_index += 1
                 continue
             
-            # Check max retry attempts (safety net for existing retry logic)
-            if result.attempts >= 3:  # Max 3 attempts per test (existing retry logic)
+            # Check max retry attempts (safety net for existing retry logic, quarantined tests get one)
+            if result.attempts >= FlakinessMethods.max_attempts(test_dict):
                 result.status = TestStatus.FAILED
                 result.error_message = "Exceeded maximum retry attempts"
                 logger.error(f"Test [{test_dict['name']}]: {result.error_message}")
+                self._benchmark_failed_run(test_dict, result, test_queue, current_index)
                 final_results.append({
                     'name': test_dict.get('updated_name', test_dict.get('name', 'Unknown')),
                     'status': result.status.name,
@@ -114,10 +124,19 @@ class MAP2SIMRunner:
             # Mark as running and increment attempt counter
             result.status = TestStatus.RUNNING
             result.attempts += 1
+            attempt_started = time.time()
+            RunStatus.test_started(test_dict, result.attempts)
+            RunStatus.set_queue([item['test_dict']['name'] for item in islice(test_queue, current_index + 1, None)])
+            QUEUE_DEPTH.set(len(test_queue) - current_index - 1, component=varc.component)
+            TEST_RUNNING.set(1, component=varc.component)
             
             try:
-                # Execute the test, main logic
+                # Execute the test, main logic (benchmark repeats write to their own subfolder)
+                self.benchmark_controller.prepare_repeat(test_dict)
                 self.execute_test(test_dict, result)
+                FlakinessMethods.record_attempt(test_dict, result, attempt_started)
+                RunStatus.test_finished(test_dict, test_dict['verdicts'].get('final-verdict'))
+                observe_attempt(test_dict, result, time.time() - attempt_started)
                 
                 # Handle test result
                 if result.status == TestStatus.RETRY:
@@ -137,14 +156,18 @@ class MAP2SIMRunner:
                     except Exception:
                         cli_enabled = False
 
-                    if hasattr(self, 'iteration_controller') and self.iteration_controller and not cli_enabled:
+                    # Benchmark mode queues the next repeat first, iterations start after the last repeat
+                    queued_repeat = self.benchmark_controller.is_enabled() and \
+                        self.benchmark_controller.handle_test_result(test_dict, result, test_queue, current_index)
+
+                    if hasattr(self, 'iteration_controller') and self.iteration_controller and not cli_enabled and not queued_repeat:
                         try:
                             self.iteration_controller.handle_test_result(test_dict, test_queue, current_index)
                         except Exception as iter_err:
                             logger.warning(f"Iteration controller error (ignored): {iter_err}")
                     
                     # Check if iteration was added
-                    if len(test_queue) > original_queue_size:
+                    if len(test_queue) > original_queue_size and not queued_repeat:
                         logger.info(f"Added iteration test at index {current_index + 1}")
                     
                     # Add to final results
@@ -159,12 +182,17 @@ class MAP2SIMRunner:
                     # Generate reports for completed tests
                     if result.status == TestStatus.COMPLETED:
                         self._generate_reports(test_dict)
+
+                    # Upload the finished test in the background while the next one runs
+                    if not queued_repeat:
+                        UploadQueue.enqueue_test(test_dict)
                     
                     # Move to next test
                     current_index += 1
                 
                 else:
                     # Other statuses, just move to next test
+                    self._benchmark_failed_run(test_dict, result, test_queue, current_index)
                     final_results.append({
                         'name': test_dict.get('updated_name', test_dict.get('name', 'Unknown')),
                         'status': result.status.name,
@@ -179,6 +207,10 @@ class MAP2SIMRunner:
                 result.status = TestStatus.FAILED
                 result.error_message = f"Unexpected error: {str(e)}"
                 logger.error(f"Test [{test_dict['name']}]: {result.error_message}")
+                FlakinessMethods.record_attempt(test_dict, result, attempt_started)
+                RunStatus.test_finished(test_dict, 'FAIL')
+                observe_attempt(test_dict, result, time.time() - attempt_started)
+                self._benchmark_failed_run(test_dict, result, test_queue, current_index)
                 
                 # Add to final results
                 final_results.append({
@@ -195,6 +227,14 @@ class MAP2SIMRunner:
         logger.info(f"Test execution completed. Processed {len(final_results)} tests")
         return final_results
         
+    def _benchmark_failed_run(self, test_dict, result, test_queue, current_index):
+        """Count a failed benchmark repeat and continue with the next one (no-op outside benchmark mode)"""
+        try:
+            self.benchmark_controller.handle_failed_run(test_dict, result, test_queue, current_index)
+        except Exception as e:
+            logger.warning(f"Benchmark [{test_dict['name']}]: could not record the failed repeat: {e}")
+
+    @profile_span()
     def execute_test(self, test_dict, result):
         """Execute a single MAP2SIM test with proper phase management"""
         test_name = test_dict.get('name', 'unnamed')
@@ -206,6 +246,9 @@ class MAP2SIMRunner:
         report_generated = False
         
         try:
+            # Every test starts in the default phase until the test code marks one
+            PhaseMarker.reset()
+
             # Initialize test environment variables
             self._initialize_test_variables(test_dict)
             
@@ -271,6 +314,7 @@ class MAP2SIMRunner:
             except Exception as cleanup_err:
                 logger.error(f"Error during cleanup: {cleanup_err}")
 
+    @profile_span()
     def _initialize_test_variables(self, test_dict):
         """Initialize variables needed for test execution and handle process management"""
         logger.info(f"Initializing variables for test: {test_dict.get('name', 'unnamed')}")
@@ -310,6 +354,7 @@ class MAP2SIMRunner:
             except Exception as e:
                 logger.error(f"Error during pre-test process cleanup: {e}")
 
+    @profile_span()
     def _cleanup_environment(self, test_dict, result):
         """Clean up the MAP2SIM test environment on Windows"""
         try:
@@ -395,6 +440,7 @@ class MAP2SIMRunner:
         
         return True 
 
+    @profile_span()
     def _perform_logs_analysis(self, test_dict, result):
         """
         Perform comprehensive log analysis for MAP2SIM tests if enabled
@@ -41,3 +41,189 @@ FFMPEG_LOG_FILE_PATH = os.path.join(varc.test_videos_path, FFMPEG_LOG_FILE_NAME)
 
 # Scenario success message list (legacy, no longer used for verdicts)
 SCENARIO_SUCCESS_MESSAGE_LIST = ["scenario is successful"]
+
+# Recorder plots are downsampled (LTTB) to this many points per series before rendering
+RECORDER_PLOT_MAX_POINTS = 3000
+
+# Tag printed by test code to mark pipeline phases, e.g. "[DMF_PHASE] map_preprocessing"
+PHASE_MARKER_TAG = "[DMF_PHASE]"
+# Phase assigned to recorder samples taken before any marker is seen
+DEFAULT_PHASE_NAME = "startup"
+
+# Seconds between I/O probe samples (process io_counters and output directory sizes)
+IO_PROBE_INTERVAL = 1.0
+
+# Seconds between NVML throttle-reason samples
+GPU_THROTTLE_SAMPLE_INTERVAL = 1.0
+
+# Append-only store of finished test results; report.json and report.txt are built from it
+RESULT_STORE_FILE_NAME = "results.jsonl"
+
+# Default results history database, created in the Outputs directory next to the suite folders
+RESULTS_HISTORY_DB_FILE_NAME = "dmf_results_history.db"
+
+# Performance regression gate
+PERF_REGRESSION_VERDICT = "PERF_REGRESSION"
+# Defaults per test; override in the TOML with a perf_regression table under the test, e.g.
+# [MAP_PREPROCESSING.test_map_preprocessing.perf_regression]
+# threshold_pct = 15
+PERF_REGRESSION_DEFAULTS = {
+    'enabled': True,
+    # fnmatch patterns of gated metrics (execution_metrics names or dotted subtest_dict paths)
+    'metrics': ['launch_time', 'total_execution_time', '*fps*', 'perf-test.vram-peak-usage-gb.*', 'perf-test.process-memory-peak-gb'],
+    # number of most recent comparable runs (same platform and GPU) forming the baseline
+    'baseline_runs': 10,
+    'min_baseline_runs': 3,
+    # a regression must be statistically significant and worse than this many percent
+    'threshold_pct': 10.0,
+    # robust z-score (median/MAD) limit for single-sample runs
+    'z_threshold': 3.5,
+    # Mann-Whitney significance level when the run has repeated samples of a metric
+    'alpha': 0.05,
+    'min_samples_for_test': 3,
+}
+# Metrics where a lower value is the regression
+PERF_HIGHER_IS_BETTER_PATTERNS = ['*fps*']
+
+# JUnit XML report streamed during the suite for CI
+JUNIT_REPORT_FILE_NAME = "junit.xml"
+# execution_metrics exported as JUnit <property> elements (besides verdict, retries and P0/P1 hits)
+JUNIT_METRIC_PROPERTIES = ['total_execution_time', 'disk_write_mb', 'output_size_mb']
+
+# Static HTML dashboards built from the results history
+DASHBOARD_FILE_NAME = "dashboard.html"
+DASHBOARD_INDEX_FILE_NAME = "dmf_dashboard.html"
+# Metrics shown as sparklines (names as stored in the history database); FPS is not measured by the analysis yet
+DASHBOARD_METRIC_PATTERNS = ['launch_time', 'total_execution_time', 'perf-test.vram-peak-usage-gb.*', 'perf-test.process-memory-peak-gb']
+# Sparkline series are LTTB-downsampled to this many runs
+DASHBOARD_MAX_POINTS = 120
+
+# Per-suite summary used by run diffs (dmf_diff.py); bump the version when its layout changes
+RUN_SUMMARY_FILE_NAME = "run_summary.json"
+RUN_SUMMARY_VERSION = 1
+# Name of the Kit log copied into each test's logs folder
+KIT_LOG_COPY_FILE_NAME = "kit_application.log"
+# Noise thresholds of run diffs; a change is reported only when it exceeds both the relative and the absolute limit
+RUN_DIFF_DEFAULTS = {
+    'metric_threshold_pct': 10.0,
+    'metric_min_abs': 0.01,
+    'extension_min_delta_ms': 500,
+    'artifact_threshold_pct': 20.0,
+    'artifact_min_bytes': 10 * 1024 ** 2,
+}
+
+# Number of recent P0/P1 log hits kept by the status server (--status-port)
+STATUS_RECENT_HITS = 20
+
+# Prometheus metrics textfile, written to the suite folder unless [metrics] textfile_path is set in dmf_config.toml
+METRICS_TEXTFILE_NAME = "dmf_metrics.prom"
+# Histogram buckets in seconds
+LAUNCH_TIME_BUCKETS = (5, 10, 20, 30, 45, 60, 90, 120, 180, 300, 600)
+TEST_DURATION_BUCKETS = (60, 300, 600, 1200, 1800, 3600, 7200, 10800, 14400, 21600, 43200)
+
+# Benchmark mode (--benchmark-repeats): repeat outputs go to <test>/repeats/repeat_<n> (warm-ups to warmup_<n>)
+BENCHMARK_REPEATS_DIR_NAME = "repeats"
+BENCHMARK_SUMMARY_FILE_NAME = "benchmark_summary.json"
+# Bootstrap confidence interval of the median over the measured repeats
+BENCHMARK_BOOTSTRAP_RESAMPLES = 2000
+BENCHMARK_CONFIDENCE = 0.95
+
+# Content-addressed artifact store, created in the Outputs directory (same volume as the suites, so files can be hardlinked)
+ARTIFACT_STORE_DIR_NAME = ".dmf_artifact_store"
+# Manifest of files and hashes written into every ingested folder
+ARTIFACT_MANIFEST_FILE_NAME = "artifact_manifest.json"
+# Files below this size are hashed for the manifest but not linked into the store
+ARTIFACT_STORE_MIN_SIZE = 64 * 1024
+# Suite folders that are not ingested (still written while the suite ends, or scratch data)
+ARTIFACT_STORE_SKIP_DIRS = ['framework_logs', 'temp_files']
+
+# Google Drive uploader: parallel uploads, files above the chunk size use resumable chunked uploads
+DRIVE_UPLOAD_WORKERS = 8
+# Chunks of resumable uploads must be multiples of 256 KB
+DRIVE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+# Folders are created in batch requests of up to 100 calls (Drive API limit)
+DRIVE_BATCH_SIZE = 100
+# Retries with exponential backoff and full jitter; rate limit errors pause all workers
+DRIVE_UPLOAD_RETRIES = 6
+DRIVE_BACKOFF_BASE = 1.0
+DRIVE_BACKOFF_MAX = 64.0
+# Journal of created folders, upload sessions and uploaded files in the uploaded folder; an interrupted upload resumes from it
+DRIVE_UPLOAD_JOURNAL_FILE_NAME = ".drive_upload_journal.jsonl"
+# Folders that are not uploaded to Google Drive
+DRIVE_SKIP_FOLDERS = ['videos', 'raw_data_videos', 'pp_data_videos', 'raw_data', 'pp_data']
+
+# Background upload queue: sqlite database in the Outputs directory, uploads left pending by a crashed run are replayed
+UPLOAD_QUEUE_DB_FILE_NAME = "dmf_upload_queue.db"
+# Upload order by relative path (first matching pattern, lower priorities upload first): reports, logs, images, videos
+UPLOAD_PRIORITIES = [
+    ('*.json', 0), ('*.txt', 0), ('*.html', 0), ('*.xml', 0), ('*.csv', 0),
+    ('*.log', 1),
+    ('*.png', 2), ('*.jpg', 2),
+    ('*.mp4', 4), ('*.avi', 4), ('*.mkv', 4),
+]
+UPLOAD_DEFAULT_PRIORITY = 3
+# Upload queue defaults; override in the [upload_queue] section of dmf_config.toml
+UPLOAD_QUEUE_DEFAULTS = {
+    'enabled': False,
+    'workers': 2,
+    # megabits per second shared by all workers, 0: unlimited
+    'max_bandwidth_mbit': 0,
+    # a file that failed this often (each time after the uploader's own retries) is given up
+    'max_attempts': 3,
+    # how long the suite end waits for the queue to drain; what is left is replayed by the next run
+    'wait_at_exit_minutes': 30,
+    # how long a finished test waits for its plots to be rendered before its folder is queued
+    'plot_wait_seconds': 120,
+    # upload every test folder as one .tar.zst package with an index (reports are still uploaded as single files)
+    'package': False,
+}
+
+# Test folder packages: a tar stream compressed into independent zstd frames, with a sidecar index for reading single files
+PACKAGE_ARCHIVE_SUFFIX = ".tar.zst"
+PACKAGE_INDEX_SUFFIX = ".index.json"
+PACKAGE_ZSTD_LEVEL = 3
+# Uncompressed bytes per zstd frame; frames are compressed in parallel, reading one file decompresses at most one frame before it
+PACKAGE_FRAME_SIZE = 4 * 1024 * 1024
+# Already compressed formats; packed at the fastest zstd level (incompressible blocks are stored raw) or left out of the package
+PACKAGE_STORED_EXTENSIONS = ['.mp4', '.avi', '.mkv', '.mov', '.png', '.jpg', '.jpeg', '.zip', '.gz', '.zst', '.7z', '.npz']
+PACKAGE_STORED_LEVEL = -5
+
+# Files placed in parallel when CLI test artifacts are mirrored into raw_data
+TREE_SYNC_WORKERS = 8
+
+# Outputs retention, run at suite start: cached sizes and verdicts of the finished suite folders in the Outputs directory
+RETENTION_INDEX_FILE_NAME = "dmf_retention_index.json"
+# Retention defaults; override in the [retention] section of dmf_config.toml
+RETENTION_DEFAULTS = {
+    'enabled': False,
+    # only log what would be compressed and deleted
+    'dry_run': True,
+    # newest runs of every suite (TOML name) that are never touched
+    'keep_last_runs': 10,
+    # runs with a failed test are kept this long
+    'keep_failed_days': 14,
+    # runs older than this are packaged into <run>.tar.zst and the folder is deleted, 0: never
+    'compress_after_days': 3,
+    # runs (folders or packages) older than this are deleted, 0: never
+    'delete_after_days': 30,
+    # total size of the runs; the oldest runs that are not among the last runs are deleted above it, 0: no budget
+    'max_total_gb': 0,
+}
+# Expected package size / folder size of runs not compressed yet (dry-run estimate until runs were compressed)
+RETENTION_COMPRESSION_RATIO_ESTIMATE = 0.5
+
+# Verdict of a failing test that is quarantined as flaky
+QUARANTINED_VERDICT = "QUARANTINED"
+# Flakiness scoring defaults; override in the [flakiness] section of dmf_config.toml
+FLAKINESS_DEFAULTS = {
+    'enabled': True,
+    # number of most recent results (history plus this suite) the flip rate is computed over
+    'window': 20,
+    # run the flakiest tests first so their failures and retries surface early
+    'flaky_first': True,
+    # tests flipping at least this often are quarantined: one attempt, failures reported as QUARANTINED; 0: never (opt-in)
+    'quarantine_threshold': 0,
+    'min_results': 6,
+    # attempts per test before it is failed (quarantined tests get one)
+    'max_attempts': 3,
+}
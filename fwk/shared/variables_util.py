@@ -136,3 +136,22 @@ class varc:
 
     # ffmpeg path
     test_videos_path: Optional[str] = None
+
+    # Results history
+    # sqlite database collecting results of all suites, loaded from [history] section of dmf_config.toml (None when disabled)
+    results_history_db_path: Optional[str] = None
+    # [flakiness] section of dmf_config.toml
+    flakiness_config: Dict[str, Any] = {}
+    # Prometheus textfile path from the [metrics] section of dmf_config.toml (None: suite folder)
+    metrics_textfile_path: Optional[str] = None
+    # Content-addressed artifact store from the [artifact_store] section of dmf_config.toml (None when disabled)
+    artifact_store_path: Optional[str] = None
+    # [upload_queue] section of dmf_config.toml
+    upload_queue_config: Dict[str, Any] = {}
+    # [retention] section of dmf_config.toml
+    retention_config: Dict[str, Any] = {}
+    # Google Drive upload: folder ids (test name -> {'test_artifacts_id': id}, freeze_issue_logs / p0_iter_logs -> id) and upload errors
+    google_ids: Dict[str, Any] = {}
+    google_drive_verdict: List[str] = []
+    # test name -> list of attempts (verdict, cause, duration) recorded by the runners
+    test_attempts: Dict[str, List[Dict[str, Any]]] = {}
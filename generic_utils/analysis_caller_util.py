@@ -4,6 +4,8 @@ import subprocess
 import docker
 from docker.errors import NotFound
 from analysis_utils.ds_recorder import DSRecorder
+from analysis_utils.io_probe_util import IOProbe
+from analysis_utils.gpu_throttle_util import GpuThrottleMonitor
 from analysis_utils.vram_recorder_util import VramRecorder
 from analysis_utils.validate_logs_util import ValidateLogsMethod, LoggerMethods
 from fwk.shared.constants import FFMPEG_LOG_FILE_NAME, FFMPEG_LOG_FILE_PATH, FFMPEG_VIDEO_FILE_NAME
@@ -13,6 +15,8 @@ import signal
 import ctypes
 import ctypes.wintypes
 from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.status_server_util import RunStatus
+from generic_utils.metrics_registry_util import LOG_CLASSIFICATIONS_TOTAL
 
 logger = get_logger(__name__, varc.framework_logs_path)
 
@@ -252,6 +256,31 @@ class PretestAnalysisCallerMethods():
         upload=True if "--perf-data-upload" in test_dict['automation_flags_dict'] or "--perf-data-upload" in test_dict['automation_suite_flags_dict'] else False
         recorder = DSRecorder(f"{test_dict['test_perf_data_path']}/{test_dict['name']}",0.5,"GPU Memory Usage for Scenario Run",True,test_dict,upload)
         recorder.start()
+
+    @staticmethod
+    def gpu_throttle_monitor_caller(test_dict):
+        '''This function is used to start GPU throttle detection for a test, returns the monitor or None if disabled'''
+
+        if "--no-throttle-check" in test_dict["automation_flags_dict"] or "--no-throttle-check" in test_dict["automation_suite_flags_dict"]:
+            return None
+        monitor = GpuThrottleMonitor(f"{test_dict['test_perf_data_path']}/{test_dict['name']}", test_dict)
+        monitor.start()
+        return monitor
+
+    @staticmethod
+    def io_probe_caller(test_dict):
+        '''This function is used to start the disk I/O probe for a test, returns the probe or None if disabled'''
+
+        if "--no-io-probe" in test_dict["automation_flags_dict"] or "--no-io-probe" in test_dict["automation_suite_flags_dict"]:
+            return None
+        directories = [test_dict.get(key) for key in ('test_map2sim_output_path', 'test_mapping_data_path', 'test_raw_data_path')]
+        try:
+            probe = IOProbe(f"{test_dict['test_perf_data_path']}/{test_dict['name']}", test_dict, directories)
+            probe.start()
+            return probe
+        except Exception as e:
+            logger.warning(f"Failed to start I/O probe for {test_dict.get('name', 'unnamed')}: {e}")
+            return None
     
     @staticmethod
     def windows_ffmpeg_recorder_caller(test_dict, video_file_name:str = FFMPEG_VIDEO_FILE_NAME, video_log_file_name:str = FFMPEG_LOG_FILE_NAME):
@@ -665,6 +694,8 @@ class PosttestAnalysisCallerMethods():
                 logger.debug(f"\n[{test_dict['name']}] : {result['reason']}")
                 test_dict['detailed_analysis']['logs'] = result['reason']
                 test_dict['verdicts']["logs_errors"] = handler['message']
+                RunStatus.severity_hit(test_dict['name'], severity, handler['message'])
+                LOG_CLASSIFICATIONS_TOTAL.inc(component=varc.component, log='sim_terminal', severity=severity)
                 
                 if handler['skip_blocks']:
                     varc.skip_remaining_blocks = True
@@ -0,0 +1,288 @@
+'''This module keeps test artifacts in a local content-addressed store. Every file of a test folder is hashed
+(blake3, xxhash or blake2b, whichever is installed); identical files are replaced by hardlinks to a single blob
+of the store, so iterations, retries and unchanged logs of earlier suites take no extra disk space. Blobs are
+read-only: all linked copies share one inode, so an in-place write has to fail instead of changing every run.
+Each ingested folder gets a manifest of its files and hashes, and the store remembers which hashes every remote
+already has, so uploaders transfer only content the remote does not have yet.'''
+
+# Standard library imports
+import os
+import json
+import stat
+import hashlib
+import threading
+
+# Optional imports, the fastest available hash is used
+try:
+    import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+# Local imports
+from fwk.shared.constants import ARTIFACT_MANIFEST_FILE_NAME, ARTIFACT_STORE_MIN_SIZE, ARTIFACT_STORE_SKIP_DIRS
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.result_store_util import _atomic_write
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_algorithm():
+    if BLAKE3_AVAILABLE:
+        return 'blake3'
+    if XXHASH_AVAILABLE:
+        return 'xxh3_128'
+    return 'blake2b'
+
+
+def _new_hasher(algorithm):
+    if algorithm == 'blake3':
+        return blake3.blake3()
+    if algorithm == 'xxh3_128':
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=32)
+
+
+def file_digest(path, algorithm=None):
+    '''Content hash of a file as "<algorithm>:<hex>" (the algorithm is part of the key, stores survive a change of installed packages)'''
+    algorithm = algorithm or hash_algorithm()
+    hasher = _new_hasher(algorithm)
+    with open(path, 'rb') as artifact_file:
+        for chunk in iter(lambda: artifact_file.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return f"{algorithm}:{hasher.hexdigest()}"
+
+
+def _make_read_only(path, stat_result=None):
+    '''Remove the write permissions of a blob (and so of every hardlinked copy)'''
+    mode = stat.S_IMODE((stat_result or os.stat(path)).st_mode)
+    if mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+        os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def remove_read_only(function, path, _exc_info=None):
+    '''Retry a removal after making the file writable, Windows cannot delete read-only files
+    (usable as shutil.rmtree onerror handler)'''
+    os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+    function(path)
+
+
+class ArtifactStore:
+    '''Blobs are kept under <root>/objects/<algorithm>/<2 hex>/<hex>, hashes known to remotes in <root>/remotes/<remote>.json'''
+
+    def __init__(self, root, min_size=ARTIFACT_STORE_MIN_SIZE):
+        '''
+        Args:
+            root (str): Store directory, created on first use (should be on the volume of the suite outputs)
+            min_size (int): Smaller files are listed in manifests but not linked into the store
+        '''
+        self.root = root
+        self.min_size = min_size
+        self.algorithm = hash_algorithm()
+        # (device, inode, size, mtime) -> digest; hardlinked copies share the inode and are hashed once
+        self._digests = {}
+        self._manifests = {}
+        self._remotes = {}
+        self._lock = threading.Lock()
+
+    def blob_path(self, digest):
+        algorithm, value = digest.split(':', 1)
+        return os.path.join(self.root, 'objects', algorithm, value[:2], value)
+
+    def digest(self, path, stat_result=None):
+        stat_result = stat_result or os.stat(path)
+        key = (stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+        digest = self._digests.get(key)
+        if digest is None:
+            digest = self._digests[key] = file_digest(path, self.algorithm)
+        return digest
+
+    @staticmethod
+    def _replace_with_link(blob, path):
+        '''Atomically replace path by a hardlink to blob; False when the file system cannot link (other volume, link limit)'''
+        temp_path = f"{path}.dmf_link"
+        try:
+            os.link(blob, temp_path)
+            os.replace(temp_path, path)
+            return True
+        except OSError as e:
+            logger.debug(f"Could not hardlink {path} to the artifact store: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False
+
+    def add_file(self, path):
+        '''Hash a file and deduplicate it against the store
+
+        Returns:
+            tuple: (digest, bytes saved by replacing the file with a link to an existing blob)
+        '''
+        stat_result = os.stat(path)
+        digest = self.digest(path, stat_result)
+        if stat_result.st_size < self.min_size:
+            return digest, 0
+
+        blob = self.blob_path(digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                # the first copy becomes the blob, the test folder keeps it as one of its links
+                os.link(path, blob)
+                _make_read_only(blob)
+                return digest, 0
+            except FileExistsError:
+                pass  # added by a concurrent suite in the meantime
+            except OSError as e:
+                logger.debug(f"Could not add {path} to the artifact store: {e}")
+                return digest, 0
+
+        blob_stat = os.stat(blob)
+        # blobs of stores created before they were made read-only
+        _make_read_only(blob, blob_stat)
+        if (blob_stat.st_dev, blob_stat.st_ino) == (stat_result.st_dev, stat_result.st_ino):
+            return digest, 0
+        return digest, stat_result.st_size if self._replace_with_link(blob, path) else 0
+
+    def ingest_directory(self, path):
+        '''Deduplicate all files of a folder and write its manifest
+
+        Returns:
+            dict: Manifest (algorithm, files: relative path -> {hash, size}, deduplicated_bytes)
+        '''
+        files = {}
+        saved = 0
+        for root, _, names in os.walk(path):
+            for name in names:
+                file_path = os.path.join(root, name)
+                if name == ARTIFACT_MANIFEST_FILE_NAME or name.endswith('.dmf_link') or os.path.islink(file_path):
+                    continue
+                try:
+                    digest, file_saved = self.add_file(file_path)
+                except OSError as e:
+                    logger.warning(f"Could not ingest {file_path} into the artifact store: {e}")
+                    continue
+                saved += file_saved
+                files[os.path.relpath(file_path, path).replace('\\', '/')] = {'hash': digest, 'size': os.path.getsize(file_path)}
+
+        manifest = {'algorithm': self.algorithm, 'files': files, 'deduplicated_bytes': saved}
+        _atomic_write(os.path.join(path, ARTIFACT_MANIFEST_FILE_NAME), json.dumps(manifest, indent=2))
+        self._manifests[os.path.abspath(path)] = manifest
+        return manifest
+
+    @staticmethod
+    def manifest_is_current(path):
+        '''True when the manifest of a folder lists exactly its files and none changed after it was written'''
+        manifest_path = os.path.join(path, ARTIFACT_MANIFEST_FILE_NAME)
+        try:
+            manifest_mtime = os.stat(manifest_path).st_mtime_ns
+            with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+                listed = set(json.load(manifest_file)['files'])
+        except (OSError, ValueError, KeyError):
+            return False
+        found = set()
+        for root, _, names in os.walk(path):
+            for name in names:
+                file_path = os.path.join(root, name)
+                if name == ARTIFACT_MANIFEST_FILE_NAME or name.endswith('.dmf_link') or os.path.islink(file_path):
+                    continue
+                try:
+                    if os.stat(file_path).st_mtime_ns > manifest_mtime:
+                        return False
+                except OSError:
+                    return False
+                found.add(os.path.relpath(file_path, path).replace('\\', '/'))
+        return found == listed
+
+    def _manifest(self, directory):
+        directory = os.path.abspath(directory)
+        if directory not in self._manifests:
+            manifest_path = os.path.join(directory, ARTIFACT_MANIFEST_FILE_NAME)
+            manifest = None
+            if os.path.exists(manifest_path):
+                with open(manifest_path, 'r', encoding='utf-8') as manifest_file:
+                    manifest = json.load(manifest_file)
+            self._manifests[directory] = manifest
+        return self._manifests[directory]
+
+    def manifest_digest(self, path):
+        '''Hash of a file from the manifest of the closest ingested folder above it, None for files that were never ingested'''
+        path = os.path.abspath(path)
+        directory = os.path.dirname(path)
+        while True:
+            manifest = self._manifest(directory)
+            if manifest is not None:
+                entry = manifest['files'].get(os.path.relpath(path, directory).replace('\\', '/'))
+                return entry['hash'] if entry else None
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+    def _remote_index(self, remote):
+        if remote not in self._remotes:
+            index_path = os.path.join(self.root, 'remotes', f"{remote}.json")
+            index = {}
+            if os.path.exists(index_path):
+                with open(index_path, 'r', encoding='utf-8') as index_file:
+                    index = json.load(index_file)
+            self._remotes[remote] = index
+        return self._remotes[remote]
+
+    def remote_id(self, remote, digest):
+        '''Id of the copy of a blob on a remote (e.g. a Drive file id), None when the remote does not have it'''
+        with self._lock:
+            return self._remote_index(remote).get(digest)
+
+    def record_remote(self, remote, digest, remote_id):
+        with self._lock:
+            self._remote_index(remote)[digest] = remote_id
+
+    def forget_remote(self, remote, digest):
+        '''Drop a copy that no longer exists on the remote, so the content is transferred again'''
+        with self._lock:
+            self._remote_index(remote).pop(digest, None)
+
+    def missing_blobs(self, manifest, remote):
+        '''Files of a manifest whose content the remote does not have yet
+
+        Returns:
+            dict: digest -> relative path of one file with that content
+        '''
+        missing = {}
+        for relative_path, entry in manifest['files'].items():
+            if self.remote_id(remote, entry['hash']) is None:
+                missing.setdefault(entry['hash'], relative_path)
+        return missing
+
+    def save_remote(self, remote):
+        with self._lock:
+            index = dict(self._remote_index(remote))
+        os.makedirs(os.path.join(self.root, 'remotes'), exist_ok=True)
+        _atomic_write(os.path.join(self.root, 'remotes', f"{remote}.json"), json.dumps(index))
+
+
+def ingest_current_suite_artifacts():
+    '''Ingest the folders of the running suite that changed since their last ingestion (called in testsuite_post_step)'''
+    if not varc.artifact_store_path:
+        return
+    store = ArtifactStore(varc.artifact_store_path)
+    saved = 0
+    files = 0
+    for entry in os.scandir(varc.test_suite_path):
+        if entry.is_dir() and entry.name not in ARTIFACT_STORE_SKIP_DIRS:
+            # test folders were ingested when they were queued for upload
+            if ArtifactStore.manifest_is_current(entry.path):
+                continue
+            manifest = store.ingest_directory(entry.path)
+            saved += manifest['deduplicated_bytes']
+            files += len(manifest['files'])
+    logger.info(f"Artifact store: {files} files hashed with {store.algorithm}, {saved / 1024 ** 2:.1f} MB deduplicated")
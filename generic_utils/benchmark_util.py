@@ -0,0 +1,166 @@
+'''This module aggregates the repeated measurements of a test in benchmark mode (--benchmark-repeats):
+median, IQR, p95 and a bootstrap confidence interval of the median per metric, saved as
+benchmark_summary.json and as reggie json (simready_test_fwk/utils/reggie.py)'''
+
+# Standard library imports
+import os
+import json
+import math
+import time
+import random
+
+# Local imports
+from fwk.shared.constants import BENCHMARK_SUMMARY_FILE_NAME, BENCHMARK_BOOTSTRAP_RESAMPLES, BENCHMARK_CONFIDENCE
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.result_store_util import _atomic_write
+from generic_utils.results_history_util import flatten_metrics
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# Reggie units by metric name suffix
+METRIC_UNITS = [('_time', 's'), ('_mb', 'MB'), ('-mb', 'MB'), ('_gb', 'GB'), ('-gb', 'GB'), ('fps', 'fps')]
+
+
+def percentile(values, pct):
+    '''Percentile with linear interpolation between the closest ranks (numpy's default method)'''
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * pct / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def bootstrap_median_ci(values, resamples=BENCHMARK_BOOTSTRAP_RESAMPLES, confidence=BENCHMARK_CONFIDENCE, seed=0):
+    '''Percentile bootstrap confidence interval of the median. Seeded, so the same samples give the same interval.
+
+    Returns:
+        tuple: (low, high), (None, None) with fewer than two values
+    '''
+    if len(values) < 2:
+        return None, None
+    rng = random.Random(seed)
+    count = len(values)
+    medians = [percentile([values[rng.randrange(count)] for _ in range(count)], 50) for _ in range(resamples)]
+    tail = 100 * (1 - confidence) / 2
+    return percentile(medians, tail), percentile(medians, 100 - tail)
+
+
+def describe(values):
+    '''Statistics of one metric over the measured repeats'''
+    q1, q3 = percentile(values, 25), percentile(values, 75)
+    ci_low, ci_high = bootstrap_median_ci(values)
+    return {
+        'n': len(values),
+        'mean': sum(values) / len(values),
+        'median': percentile(values, 50),
+        'q1': q1,
+        'q3': q3,
+        'iqr': q3 - q1,
+        'p95': percentile(values, 95),
+        'min': min(values),
+        'max': max(values),
+        'ci_low': ci_low,
+        'ci_high': ci_high,
+        'confidence': BENCHMARK_CONFIDENCE,
+    }
+
+
+def repeat_sample(test_dict, index, warmup):
+    '''Metrics of one finished repeat (execution_metrics and numeric subtest values, as flatten_metrics)'''
+    metrics = {}
+    throttled = []
+    for name, (value, validity) in flatten_metrics(test_dict).items():
+        if str(validity or '').startswith('THROTTLED'):
+            throttled.append(name)
+        metrics[name] = value
+    return {
+        'repeat': index,
+        'warmup': warmup,
+        'verdict': test_dict['verdicts'].get('final-verdict'),
+        'finished_at': time.time(),
+        'metrics': metrics,
+        'throttled': throttled,
+    }
+
+
+def metric_samples(samples):
+    '''Values of every metric over the measured repeats; warm-ups, failed repeats and throttled values are left out
+
+    Returns:
+        dict: metric name -> list of values in repeat order
+    '''
+    series = {}
+    for sample in samples:
+        if sample['warmup'] or sample['verdict'] != 'PASS':
+            continue
+        for name, value in sample['metrics'].items():
+            if name not in sample['throttled']:
+                series.setdefault(name, []).append(value)
+    return series
+
+
+def summarize(samples):
+    '''Statistics of all metrics of a benchmarked test
+
+    Returns:
+        dict: metric name -> describe() result
+    '''
+    return {name: describe(values) for name, values in metric_samples(samples).items()}
+
+
+def metric_unit(name):
+    lowered = name.lower()
+    for suffix, unit in METRIC_UNITS:
+        if lowered.endswith(suffix):
+            return unit
+    return ''
+
+
+def write_benchmark_summary(test_dict, samples, stats, settings):
+    '''Save settings, per-repeat samples and statistics as benchmark_summary.json in the test folder'''
+    path = os.path.join(test_dict['test_path'], BENCHMARK_SUMMARY_FILE_NAME)
+    summary = {'test': test_dict['updated_name'], 'settings': settings, 'stats': stats, 'repeats': samples}
+    _atomic_write(path, json.dumps(summary, indent=2, default=str))
+    return path
+
+
+def write_reggie_json(test_dict, samples, stats, json_dir):
+    '''Emit the statistics in the reggie benchmark json format: one scalar sample per statistic
+    (<metric>, <metric>.p95, ...) plus the raw measured values, timestamped relative to the first repeat.
+
+    Returns:
+        bool: True when the json was written (reggie needs GPUtil for its GPU fingerprint)
+    '''
+    try:
+        from simready_test_fwk.utils.reggie import Reggie
+    except ImportError as e:
+        logger.warning(f"Reggie is not available ({e}), skipping reggie json for {test_dict['name']}")
+        return False
+
+    reggie = Reggie()
+    # Reggie keeps benchmarks in a class attribute, start from an empty one for every test
+    reggie.benchmark = {}
+    reggie.update_benchmark_fields(benchmark_suite=f"DMF_{getattr(varc, 'component', None) or 'UNKNOWN'}")
+    build = (varc.header_dict or {}).get('Build', 'unknown')
+    reggie.lock_metadata(app=getattr(varc, 'component', None) or 'DMF', app_version=build if isinstance(build, str) else json.dumps(build, default=str))
+
+    measured = [sample for sample in samples if not sample['warmup'] and sample['verdict'] == 'PASS']
+    benchmark = test_dict['name']
+    for name, values in stats.items():
+        unit = metric_unit(name)
+        reggie.append_metrics(benchmark, name, values['median'], unit)
+        for statistic in ('p95', 'iqr', 'ci_low', 'ci_high'):
+            if values[statistic] is not None:
+                reggie.append_metrics(benchmark, f"{name}.{statistic}", values[statistic], unit)
+        series = [(round(1000 * (sample['finished_at'] - samples[0]['finished_at'])), sample['metrics'][name]) for sample in measured
+                  if name in sample['metrics'] and name not in sample['throttled']]
+        reggie.append_metrics(
+            benchmark, f"{name}.samples",
+            {name: [value for _, value in series], 'timestamp': [offset_ms for offset_ms, _ in series]},
+            unit, timestamp_value=True,
+        )
+    reggie.dump_reggie_json(json_name=varc.test_suite_name or 'dmf', json_dir=json_dir)
+    return True
@@ -30,6 +30,7 @@ from fwk.shared.constants import (
 )
 from fwk.fwk_logger.fwk_logging import get_logger
 from generic_utils.windows_develop_mode import WindowsDevelopMode
+from fwk.fwk_profiler.fwk_profiling import profile_span
 
 logger = get_logger(__name__, varc.framework_logs_path)
 
@@ -97,6 +98,7 @@ class CommandRunnerMethods:
             'scenario_timeout': scenario_timeout
         }
     @staticmethod
+    @profile_span()
     def logs_analysis_runner(test_dict):
         '''This function is used to call analyze logs class for Windows DMF framework
         
@@ -182,6 +184,34 @@ class CommandRunnerMethods:
         return CLIModeHandler.is_cli_mode_enabled(test_dict)
     
     @staticmethod
+    def _stop_run_monitors(test_dict, result, start_time, io_probe=None, gpu_monitor=None):
+        """
+        Stop the I/O probe and GPU throttle monitor of a run and add their results to the metrics
+        
+        Args:
+            test_dict: Dictionary containing test information
+            result: TestResult object whose metrics get disk I/O numbers and performance validity
+            start_time: Start of the run (epoch seconds)
+            io_probe: IOProbe started for the run, or None
+            gpu_monitor: GpuThrottleMonitor started for the run, or None
+        """
+        if io_probe:
+            try:
+                io_summary = io_probe.stop()
+                result.metrics['disk_write_mb'] = io_summary['total-write-mb']
+                result.metrics['output_size_mb'] = io_summary['output-size-mb']
+            except Exception as e:
+                logger.error(f"[{test_dict['name']}] Error stopping I/O probe: {e}")
+
+        if gpu_monitor:
+            try:
+                gpu_monitor.stop()
+                gpu_monitor.attach_validity(result.metrics, start_time)
+            except Exception as e:
+                logger.error(f"[{test_dict['name']}] Error stopping GPU throttle monitor: {e}")
+    
+    @staticmethod
+    @profile_span()
     def dsrs_runner(test_dict, result):
         """
         This function is used to run DSRS commands
@@ -214,6 +244,10 @@ class CommandRunnerMethods:
         # Mark as running and store start time
         result.status = TestStatus.RUNNING
         start_time = time.time()
+
+        # GPU throttle detection to qualify timing metrics (opt out with --no-throttle-check)
+        from generic_utils.analysis_caller_util import PretestAnalysisCallerMethods
+        gpu_monitor = PretestAnalysisCallerMethods.gpu_throttle_monitor_caller(test_dict)
         
         try:
             logger.info(f"[{test_dict['name']}] Starting DSRS runner with timeouts - Launch: {launch_timeout}s, Scenario: {scenario_timeout}s")
@@ -406,6 +440,7 @@ class CommandRunnerMethods:
                             return ui_commands_list
                 
                 # Thread function for launching scenario (SAME FOR BOTH MODES)
+                @profile_span('Kit scenario', 'kit')
                 def scenario_launch():
                     nonlocal output2  # Access the outer variable
                     logger.info(f"[{test_dict['name']}] Launching Scenario...")
@@ -508,12 +543,13 @@ class CommandRunnerMethods:
             # Ensure end event is set to unblock any processes
             if 'ui_automation_end_event' in locals() and not ui_automation_end_event.is_set():
                 ui_automation_end_event.set()
-        
-        # Calculate total execution time
-        end_time = time.time()
-        execution_time = end_time - start_time
-        result.metrics['total_execution_time'] = execution_time
-        
+
+        finally:
+            # Also on the early returns of failed launches: stop the samplers and attach their metrics
+            execution_time = time.time() - start_time
+            result.metrics['total_execution_time'] = execution_time
+            CommandRunnerMethods._stop_run_monitors(test_dict, result, start_time, io_probe=None, gpu_monitor=gpu_monitor)
+
         # Add logs analysis entry
         result.logs_analysis['dsrs_execution'] = {
             'status': result.status.name,
@@ -530,6 +566,7 @@ class CommandRunnerMethods:
         return ui_commands_list
 
     @staticmethod
+    @profile_span()
     def map2sim_runner(test_dict: dict, result: TestResult):
         """
         This function is used to run MAP2SIM commands
@@ -562,6 +599,12 @@ class CommandRunnerMethods:
         # Mark as running and store start time
         result.status = TestStatus.RUNNING
         start_time = time.time()
+
+        # Disk I/O and output size tracking for the whole run (opt out with --no-io-probe)
+        from generic_utils.analysis_caller_util import PretestAnalysisCallerMethods
+        io_probe = PretestAnalysisCallerMethods.io_probe_caller(test_dict)
+        # GPU throttle detection to qualify timing metrics (opt out with --no-throttle-check)
+        gpu_monitor = PretestAnalysisCallerMethods.gpu_throttle_monitor_caller(test_dict)
         
         try:
             logger.info(f"[{test_dict['name']}] Starting MAP2SIM runner with timeouts - Launch: {launch_timeout}s, Scenario: {scenario_timeout}s")
@@ -779,6 +822,7 @@ class CommandRunnerMethods:
                             return ui_commands_list
                 
                 # Thread function for launching scenario (DIFFERENT FOR CLI MODE)
+                @profile_span('Kit scenario', 'kit')
                 def scenario_launch():
                     nonlocal output2  # Access the outer variable
                     
@@ -926,12 +970,13 @@ class CommandRunnerMethods:
             # Ensure end event is set to unblock any processes
             if 'ui_automation_end_event' in locals() and not ui_automation_end_event.is_set():
                 ui_automation_end_event.set()
-        
-        # Calculate total execution time
-        end_time = time.time()
-        execution_time = end_time - start_time
-        result.metrics['total_execution_time'] = execution_time
-        
+
+        finally:
+            # Also on the early returns of failed launches: stop the samplers and attach their metrics
+            execution_time = time.time() - start_time
+            result.metrics['total_execution_time'] = execution_time
+            CommandRunnerMethods._stop_run_monitors(test_dict, result, start_time, io_probe=io_probe, gpu_monitor=gpu_monitor)
+
         # Add logs analysis entry (execution metadata)
         result.logs_analysis['map2sim_execution'] = {
             'status': result.status.name,
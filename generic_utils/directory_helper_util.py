@@ -6,6 +6,7 @@ from pathlib import Path
 # Local imports
 from fwk.shared.variables_util import varc
 from fwk.fwk_logger.fwk_logging import get_logger
+from fwk.fwk_profiler.fwk_profiling import profile_span
 
 # Initialize logger - will get file logging when varc.framework_logs_path is available
 logger = get_logger('DIRECTORY_HELPER')
@@ -76,6 +77,7 @@ class DirectoryCreatorMethods():
             sys.exit(1)
 
     @staticmethod
+    @profile_span()
     def directory_creator_for_iterative_tests(test_dict):
         """
         Creates structured output directory hierarchy for iterative tests.
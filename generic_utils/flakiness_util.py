@@ -0,0 +1,183 @@
+'''This module records every attempt of a test and scores test flakiness from the results history,
+so flaky tests can be scheduled first or quarantined instead of burning full retries at the end of a suite'''
+
+# Standard library imports
+import time
+
+# Local imports
+from fwk.shared.constants import QUARANTINED_VERDICT, FLAKINESS_DEFAULTS
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.results_history_util import ResultsHistoryDB
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# Verdicts counted as a functional pass; a perf regression is not flakiness
+PASSING_VERDICTS = ('PASS', 'COMPLETED', 'PERF_REGRESSION')
+# Verdicts that say nothing about the outcome
+IGNORED_VERDICTS = (None, 'SKIPPED', QUARANTINED_VERDICT)
+
+
+def outcome(verdict):
+    '''Map a verdict to True (pass), False (fail) or None (not counted)'''
+    if verdict in IGNORED_VERDICTS:
+        return None
+    return verdict in PASSING_VERDICTS
+
+
+def flip_rate(outcomes):
+    '''Share of consecutive outcomes that differ: 0.0 for a stable test, 1.0 for one alternating every run
+
+    Args:
+        outcomes (list): Pass/fail booleans, oldest first
+
+    Returns:
+        float: Flip rate, 0.0 when there are fewer than two outcomes
+    '''
+    if len(outcomes) < 2:
+        return 0.0
+    flips = sum(1 for previous, current in zip(outcomes, outcomes[1:]) if previous != current)
+    return flips / (len(outcomes) - 1)
+
+
+class FlakinessMethods:
+    '''Attempt history, flakiness scores and flakiness-aware scheduling'''
+
+    @staticmethod
+    def settings():
+        '''Defaults from constants, overridden by the [flakiness] section of dmf_config.toml'''
+        settings = dict(FLAKINESS_DEFAULTS)
+        settings.update(varc.flakiness_config or {})
+        return settings
+
+    @staticmethod
+    def record_attempt(test_dict, result, started_at):
+        '''Record one execution attempt of a test (called by the runners after execute_test)
+
+        Args:
+            test_dict (dict): A dictionary consisting of ATF test information
+            result (TestResult): Result of the attempt
+            started_at (float): Attempt start (epoch seconds)
+        '''
+        verdict = test_dict['verdicts'].get('final-verdict') or result.status.name
+        cause = None
+        if outcome(verdict) is False:
+            cause = (result.error_message or test_dict['verdicts'].get('process-specific-errors')
+                     or test_dict['verdicts'].get('logs_errors'))
+        attempts = varc.test_attempts.setdefault(test_dict['name'], [])
+        attempts.append({
+            'attempt': len(attempts) + 1,
+            'run_name': test_dict.get('updated_name', test_dict['name']),
+            'status': result.status.name,
+            'verdict': verdict,
+            'cause': None if cause in (None, 'NA') else str(cause),
+            'started_at': round(started_at, 3),
+            'duration_s': round(time.time() - started_at, 2),
+        })
+        if len(attempts) > 1 and outcome(verdict) is True and any(outcome(item['verdict']) is False for item in attempts[:-1]):
+            logger.warning(f"[{test_dict['name']}] passed on attempt {len(attempts)} after failing before, test is flaky")
+
+    @staticmethod
+    def score(history, test_name, current_attempts=(), window=None):
+        '''Flakiness of a test over the last runs in the history plus the attempts of the running suite
+
+        Args:
+            history (ResultsHistoryDB): Open history database, or None
+            test_name (str): Test name as in the TOML
+            current_attempts (list): Attempts recorded in this suite
+            window (int): Number of most recent results to consider
+
+        Returns:
+            dict: flip-rate, fail-rate, results (number of counted outcomes) and passed-on-retry
+        '''
+        window = window or FlakinessMethods.settings()['window']
+        verdicts = []
+        if history is not None:
+            rows = history.verdict_series(test_name, last=window, exclude_suite=varc.test_suite_name)
+            verdicts = [row['verdict'] for row in rows]
+        verdicts += [item['verdict'] for item in current_attempts]
+        outcomes = [value for value in (outcome(verdict) for verdict in verdicts) if value is not None][-window:]
+
+        current_outcomes = [outcome(item['verdict']) for item in current_attempts]
+        return {
+            'flip-rate': round(flip_rate(outcomes), 3),
+            'fail-rate': round(outcomes.count(False) / len(outcomes), 3) if outcomes else 0.0,
+            'results': len(outcomes),
+            'passed-on-retry': bool(current_outcomes) and current_outcomes[-1] is True and False in current_outcomes,
+        }
+
+    @staticmethod
+    def schedule(tests_list):
+        '''Score all tests from the history and reorder the list in place: flaky tests run first, so their
+        failures and retries surface early. Tests above the quarantine threshold are marked quarantined.
+
+        Args:
+            tests_list (list): varc.tests_list
+        '''
+        settings = FlakinessMethods.settings()
+        if not settings['enabled'] or not varc.results_history_db_path:
+            return
+
+        with ResultsHistoryDB(varc.results_history_db_path) as history:
+            for test_dict in tests_list:
+                flakiness = FlakinessMethods.score(history, test_dict['name'], window=settings['window'])
+                flakiness['quarantined'] = (
+                    settings['quarantine_threshold'] > 0
+                    and flakiness['results'] >= settings['min_results']
+                    and flakiness['flip-rate'] >= settings['quarantine_threshold']
+                )
+                test_dict['flakiness'] = flakiness
+                if flakiness['quarantined']:
+                    logger.warning(f"[{test_dict['name']}] quarantined, flip rate {flakiness['flip-rate']} over {flakiness['results']} results")
+
+        if settings['flaky_first']:
+            # stable sort keeps the TOML order among equally flaky tests
+            tests_list.sort(key=lambda test_dict: -test_dict['flakiness']['flip-rate'])
+            logger.info(f"Test order by flakiness: {[test_dict['name'] for test_dict in tests_list]}")
+
+    @staticmethod
+    def is_quarantined(test_dict):
+        return bool((test_dict.get('flakiness') or {}).get('quarantined'))
+
+    @staticmethod
+    def max_attempts(test_dict):
+        '''Quarantined tests get a single attempt instead of the usual retries'''
+        return 1 if FlakinessMethods.is_quarantined(test_dict) else FlakinessMethods.settings()['max_attempts']
+
+    @staticmethod
+    def report_flakiness():
+        '''Add attempts and flakiness to every test entry of the report (called in testsuite_post_step).
+        Failing quarantined tests get a QUARANTINED verdict so they do not fail the suite.'''
+        from generic_utils.result_store_util import ResultStore
+
+        settings = FlakinessMethods.settings()
+        store = ResultStore(varc.test_suite_path)
+        history = ResultsHistoryDB(varc.results_history_db_path) if settings['enabled'] and varc.results_history_db_path else None
+        try:
+            for test_dict in varc.tests_list:
+                attempts = varc.test_attempts.get(test_dict['name'], [])
+                if not attempts:
+                    continue
+                flakiness = FlakinessMethods.score(history, test_dict['name'], attempts, settings['window'])
+                flakiness['quarantined'] = FlakinessMethods.is_quarantined(test_dict)
+                test_dict['flakiness'] = flakiness
+                update = {'attempts': attempts, 'flakiness': flakiness}
+                text = ""
+
+                if flakiness['passed-on-retry'] or flakiness['flip-rate'] > 0:
+                    test_dict['subtest_dict']['flakiness-test'] = (
+                        f"flip rate {flakiness['flip-rate']} over {flakiness['results']} results, "
+                        f"passed on retry: {flakiness['passed-on-retry']}"
+                    )
+                    update['subtest_dict'] = test_dict['subtest_dict']
+                    text = f"{test_dict['updated_name']} - flakiness: {test_dict['subtest_dict']['flakiness-test']}\n\n"
+
+                if flakiness['quarantined'] and outcome(test_dict['verdicts'].get('final-verdict')) is False:
+                    test_dict['verdicts']['final-verdict'] = QUARANTINED_VERDICT
+                    update['final_verdict'] = QUARANTINED_VERDICT
+                    text += f"{test_dict['updated_name']} - {QUARANTINED_VERDICT}: failure ignored, test is quarantined as flaky\n\n"
+
+                store.append_update(test_dict['updated_name'], update, text)
+        finally:
+            if history is not None:
+                history.close()
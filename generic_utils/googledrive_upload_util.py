@@ -1,72 +1,553 @@
+'''This module uploads suite outputs to Google Drive. Folders are created level by level in batch requests,
+files are uploaded by a worker pool (large files as resumable chunked uploads) and every step is written to a
+journal, so an interrupted upload resumes where it stopped. Rate limit errors make all workers back off.
+The Drive API sits behind DriveBackend; FakeDriveBackend runs the whole uploader offline.'''
+
+# Standard library imports
 import os
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import sys
+import json
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Optional imports, only needed for the real Drive backend
+try:
+    from google.oauth2 import service_account
+    from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
+    from googleapiclient.http import MediaFileUpload
+    GOOGLE_API_AVAILABLE = True
+except ImportError:
+    GOOGLE_API_AVAILABLE = False
+
+# Local imports
+from fwk.shared.constants import (
+    DRIVE_UPLOAD_WORKERS, DRIVE_UPLOAD_CHUNK_SIZE, DRIVE_BATCH_SIZE, DRIVE_UPLOAD_RETRIES,
+    DRIVE_BACKOFF_BASE, DRIVE_BACKOFF_MAX, DRIVE_UPLOAD_JOURNAL_FILE_NAME, DRIVE_SKIP_FOLDERS
+)
 from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from fwk.fwk_profiler.fwk_profiling import profile_span
+from generic_utils.artifact_store_util import ArtifactStore
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# Name of Google Drive in the remote index of the artifact store
+ARTIFACT_STORE_REMOTE = 'google_drive'
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+
+class DriveError(Exception):
+    '''Drive request failed and retrying will not help'''
+
+
+class DriveRetryableError(DriveError):
+    '''Transient Drive failure (server error, connection problem)'''
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class DriveRateLimitError(DriveRetryableError):
+    '''Drive asked to slow down (429 / 403 rate limit exceeded)'''
+
+
+class DriveSessionExpiredError(DriveError):
+    '''Resumable upload session of an earlier run is gone, the file has to start over'''
+
+
+class DriveNotFoundError(DriveError):
+    '''Drive file does not exist (anymore), e.g. a copy of a blob that was deleted or trashed'''
+
+
+class DriveBackend(ABC):
+    '''Drive operations used by the uploader'''
+
+    @abstractmethod
+    def create_folders(self, folders):
+        '''Create several folders
+
+        Args:
+            folders (list): (name, parent id) tuples
+
+        Returns:
+            list: Folder id, or the DriveError of the failed creation, per requested folder
+        '''
+
+    @abstractmethod
+    def upload_file(self, file_path, name, parent_id, resume_uri=None, on_progress=None):
+        '''Upload a file, resuming the session resume_uri when given
+
+        Args:
+            on_progress (callable): Called with (session uri, bytes confirmed) after every chunk
+
+        Returns:
+            str: File id
+        '''
+
+    @abstractmethod
+    def copy_file(self, file_id, name, parent_id):
+        '''Copy an existing Drive file into a folder on the server side, no content is sent
+
+        Returns:
+            str: Id of the copy
+
+        Raises:
+            DriveNotFoundError: file_id does not exist or is in the trash
+        '''
+
+
+class GoogleDriveBackend(DriveBackend):
+    '''Drive API v3 with a service account; every worker thread gets its own service (httplib2 is not thread-safe)'''
+
+    def __init__(self, service_account_key_path, chunk_size=DRIVE_UPLOAD_CHUNK_SIZE):
+        if not GOOGLE_API_AVAILABLE:
+            raise DriveError("google-api-python-client and google-auth are required for Google Drive uploads")
+        self.credentials = service_account.Credentials.from_service_account_file(
+            service_account_key_path, scopes=['https://www.googleapis.com/auth/drive'])
+        self.chunk_size = chunk_size
+        self._local = threading.local()
+
+    def _service(self):
+        if not hasattr(self._local, 'service'):
+            self._local.service = build('drive', 'v3', credentials=self.credentials, cache_discovery=False)
+        return self._local.service
+
+    @staticmethod
+    def _translate(error, resuming=False):
+        status = error.resp.status
+        retry_after = error.resp.get('retry-after')
+        retry_after = float(retry_after) if retry_after and str(retry_after).isdigit() else None
+        try:
+            reason = json.loads(error.content)['error']['errors'][0]['reason']
+        except (ValueError, KeyError, IndexError, TypeError):
+            reason = ''
+        if status == 429 or (status == 403 and reason in ('rateLimitExceeded', 'userRateLimitExceeded')):
+            return DriveRateLimitError(str(error), retry_after)
+        if resuming and status in (404, 410):
+            return DriveSessionExpiredError(str(error))
+        if status == 404:
+            return DriveNotFoundError(str(error))
+        if status >= 500 or status == 408:
+            return DriveRetryableError(str(error), retry_after)
+        return DriveError(str(error))
+
+    def create_folders(self, folders):
+        results = [None] * len(folders)
+        service = self._service()
+        for start in range(0, len(folders), DRIVE_BATCH_SIZE):
+            def callback(request_id, response, exception):
+                index = int(request_id)
+                results[index] = self._translate(exception) if isinstance(exception, HttpError) else (
+                    DriveRetryableError(str(exception)) if exception else response['id'])
+
+            batch = service.new_batch_http_request(callback=callback)
+            for index in range(start, min(start + DRIVE_BATCH_SIZE, len(folders))):
+                name, parent_id = folders[index]
+                body = {'name': name, 'parents': [parent_id], 'mimeType': FOLDER_MIME_TYPE}
+                batch.add(service.files().create(body=body, fields='id'), request_id=str(index))
+            try:
+                batch.execute()
+            except HttpError as e:
+                raise self._translate(e) from e
+        return results
+
+    def upload_file(self, file_path, name, parent_id, resume_uri=None, on_progress=None):
+        metadata = {'name': name, 'parents': [parent_id]}
+        try:
+            if os.path.getsize(file_path) <= self.chunk_size:
+                media = MediaFileUpload(file_path, resumable=False)
+                return self._service().files().create(body=metadata, media_body=media, fields='id').execute()['id']
+
+            media = MediaFileUpload(file_path, chunksize=self.chunk_size, resumable=True)
+            request = self._service().files().create(body=metadata, media_body=media, fields='id')
+            if resume_uri:
+                # in error state the client first asks Drive which range of the session it already has
+                request.resumable_uri = resume_uri
+                request._in_error_state = True
+            response = None
+            while response is None:
+                _, response = request.next_chunk()
+                if on_progress and response is None:
+                    on_progress(request.resumable_uri, request.resumable_progress)
+            return response['id']
+        except HttpError as e:
+            raise self._translate(e, resuming=bool(resume_uri)) from e
+
+    def copy_file(self, file_id, name, parent_id):
+        files = self._service().files()
+        try:
+            if files.get(fileId=file_id, fields='trashed').execute().get('trashed'):
+                raise DriveNotFoundError(f"file {file_id} is in the trash")
+            return files.copy(fileId=file_id, body={'name': name, 'parents': [parent_id]}, fields='id').execute()['id']
+        except HttpError as e:
+            raise self._translate(e) from e
+
+
+class FakeDriveBackend(DriveBackend):
+    '''In-memory Drive: folders, files and resumable sessions, with injectable rate limits and interruptions'''
+
+    def __init__(self, chunk_size=256 * 1024, rate_limit_every=0, interrupt_after_chunks=None):
+        '''
+        Args:
+            chunk_size (int): Files above this size are uploaded in chunks through a session
+            rate_limit_every (int): Every n-th request fails with a rate limit error (0: never)
+            interrupt_after_chunks (int): Raise a ConnectionError after this many chunks in total, like a crashed run
+        '''
+        self.chunk_size = chunk_size
+        self.rate_limit_every = rate_limit_every
+        self.interrupt_after_chunks = interrupt_after_chunks
+        self.items = {}
+        self.sessions = {}
+        self.requests = 0
+        self.copies = 0
+        self.bytes_received = 0
+        self._lock = threading.Lock()
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+            if self.rate_limit_every and self.requests % self.rate_limit_every == 0:
+                raise DriveRateLimitError("fake rate limit", retry_after=0.01)
+
+    def _new_item(self, name, parent_id, data=None):
+        with self._lock:
+            item_id = f"fake-{len(self.items) + 1}"
+            self.items[item_id] = {'name': name, 'parent': parent_id, 'data': data}
+        return item_id
+
+    def create_folders(self, folders):
+        self._request()
+        return [self._new_item(name, parent_id) for name, parent_id in folders]
+
+    def upload_file(self, file_path, name, parent_id, resume_uri=None, on_progress=None):
+        self._request()
+        with open(file_path, 'rb') as data_file:
+            data = data_file.read()
+        if len(data) <= self.chunk_size:
+            self.bytes_received += len(data)
+            return self._new_item(name, parent_id, data)
+
+        if resume_uri and resume_uri not in self.sessions:
+            raise DriveSessionExpiredError(f"unknown session {resume_uri}")
+        uri = resume_uri or f"session-{name}-{random.getrandbits(32)}"
+        session = self.sessions.setdefault(uri, bytearray())
+        while len(session) < len(data):
+            with self._lock:
+                if self.interrupt_after_chunks is not None:
+                    if self.interrupt_after_chunks == 0:
+                        raise ConnectionError("fake interruption")
+                    self.interrupt_after_chunks -= 1
+            chunk = data[len(session):len(session) + self.chunk_size]
+            session.extend(chunk)
+            self.bytes_received += len(chunk)
+            if len(session) < len(data) and on_progress:
+                on_progress(uri, len(session))
+        del self.sessions[uri]
+        return self._new_item(name, parent_id, bytes(session))
+
+    def copy_file(self, file_id, name, parent_id):
+        self._request()
+        source = self.items.get(file_id)
+        if source is None or source['data'] is None:
+            raise DriveNotFoundError(f"file {file_id} not found")
+        self.copies += 1
+        return self._new_item(name, parent_id, source['data'])
+
+    def tree(self, root_id):
+        '''Uploaded files below a folder as relative path -> content'''
+        children = {}
+        for item_id, item in self.items.items():
+            children.setdefault(item['parent'], []).append(item_id)
+        files = {}
+        stack = [(root_id, '')]
+        while stack:
+            folder_id, prefix = stack.pop()
+            for item_id in children.get(folder_id, []):
+                item = self.items[item_id]
+                path = f"{prefix}{item['name']}"
+                if item['data'] is None:
+                    stack.append((item_id, f"{path}/"))
+                else:
+                    files[path] = item['data']
+        return files
+
+
+class UploadJournal:
+    '''Append-only json lines journal of an upload: target, folders, open sessions and finished files'''
+
+    def __init__(self, path, target):
+        '''
+        Args:
+            path (str): Journal file
+            target (dict): Upload destination; a journal of another destination is discarded
+        '''
+        self.path = path
+        self.folders = {}
+        self.sessions = {}
+        self.files = {}
+        self._lock = threading.Lock()
+
+        records = []
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as journal_file:
+                for line in journal_file:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue  # truncated last line of a crashed run
+        if not records or records[0] != {'type': 'target', **target}:
+            records = []
+            with open(path, 'w', encoding='utf-8') as journal_file:
+                journal_file.write(json.dumps({'type': 'target', **target}) + '\n')
+        for record in records[1:]:
+            if record['type'] == 'folder':
+                self.folders[record['path']] = record['id']
+            elif record['type'] == 'session':
+                self.sessions[record['path']] = record['uri']
+            elif record['type'] == 'file':
+                self.files[record['path']] = record['id']
+                self.sessions.pop(record['path'], None)
+
+    def append(self, record):
+        with self._lock:
+            if record['type'] == 'folder':
+                self.folders[record['path']] = record['id']
+            elif record['type'] == 'session':
+                self.sessions[record['path']] = record['uri']
+            elif record['type'] == 'file':
+                self.files[record['path']] = record['id']
+                self.sessions.pop(record['path'], None)
+            with open(self.path, 'a', encoding='utf-8') as journal_file:
+                journal_file.write(json.dumps(record) + '\n')
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+
+class DriveUploader:
+    '''Uploads a folder tree with a worker pool, resuming from the journal of an interrupted run'''
+
+    def __init__(self, backend, workers=DRIVE_UPLOAD_WORKERS, store=None, retries=DRIVE_UPLOAD_RETRIES, limiter=None):
+        '''
+        Args:
+            backend (DriveBackend): Drive implementation
+            workers (int): Parallel file uploads
+            store (ArtifactStore): Files whose content the drive already has are skipped (optional)
+            limiter: Object with consume(bytes) that paces uploads to a bandwidth cap (optional)
+        '''
+        self.backend = backend
+        self.workers = workers
+        self.store = store
+        self.retries = retries
+        self.limiter = limiter
+        self._pause_until = 0.0
+        self._pause_lock = threading.Lock()
+        self._folder_lock = threading.Lock()
+
+    def _backoff(self, error, attempt):
+        delay = error.retry_after or random.uniform(0, min(DRIVE_BACKOFF_MAX, DRIVE_BACKOFF_BASE * 2 ** attempt))
+        if isinstance(error, DriveRateLimitError):
+            # quota is shared, so every worker waits instead of hammering the API
+            with self._pause_lock:
+                self._pause_until = max(self._pause_until, time.monotonic() + delay)
+        else:
+            time.sleep(delay)
+
+    def _call(self, action, description):
+        for attempt in range(self.retries + 1):
+            pause = self._pause_until - time.monotonic()
+            if pause > 0:
+                time.sleep(pause)
+            try:
+                return action()
+            except DriveRetryableError as e:
+                if attempt == self.retries:
+                    raise
+                logger.info(f"Google Drive {description} failed ({e}), retry {attempt + 1}")
+                self._backoff(e, attempt)
+
+    @staticmethod
+    def plan(source_path):
+        '''Folders (relative paths, parents first) and files (relative path, absolute path) to upload'''
+        folders = []
+        files = []
+        for root, directories, names in os.walk(source_path):
+            directories[:] = sorted(directory for directory in directories if directory.lower() not in DRIVE_SKIP_FOLDERS)
+            relative_root = os.path.relpath(root, source_path).replace('\\', '/')
+            relative_root = '' if relative_root == '.' else relative_root
+            folders.extend(f"{relative_root}/{directory}".lstrip('/') for directory in directories)
+            files.extend((f"{relative_root}/{name}".lstrip('/'), os.path.join(root, name))
+                         for name in sorted(names) if name != DRIVE_UPLOAD_JOURNAL_FILE_NAME)
+        return folders, files
+
+    def open_journal(self, source_path, parent_id, folder_name):
+        '''Journal of uploading source_path as folder_name into parent_id; creates the root folder on the first upload'''
+        journal = UploadJournal(os.path.join(source_path, DRIVE_UPLOAD_JOURNAL_FILE_NAME),
+                                {'parent_id': parent_id, 'name': folder_name})
+        if '.' not in journal.folders:
+            root_id = self._call(lambda: self.backend.create_folders([(folder_name, parent_id)])[0], "root folder creation")
+            if isinstance(root_id, Exception):
+                raise root_id
+            journal.append({'type': 'folder', 'path': '.', 'id': root_id})
+        return journal
+
+    def ensure_folders(self, journal, folders):
+        '''Create the missing folders (relative paths, parents included) level by level, each level in batch requests'''
+        with self._folder_lock:
+            self._create_folders(journal, folders)
+
+    def _create_folders(self, journal, folders):
+        levels = {}
+        for folder in folders:
+            levels.setdefault(folder.count('/'), []).append(folder)
+        for depth in sorted(levels):
+            pending = [folder for folder in levels[depth] if folder not in journal.folders]
+            for attempt in range(self.retries + 1):
+                if not pending:
+                    break
+                parents = [journal.folders[folder.rsplit('/', 1)[0] if '/' in folder else '.'] for folder in pending]
+                results = self._call(
+                    lambda: self.backend.create_folders([(folder.rsplit('/', 1)[-1], parent) for folder, parent in zip(pending, parents)]),
+                    f"folder creation ({len(pending)} folders)")
+                failed = []
+                for folder, result in zip(pending, results):
+                    if isinstance(result, DriveRetryableError):
+                        failed.append((folder, result))
+                    elif isinstance(result, Exception):
+                        raise result
+                    else:
+                        journal.append({'type': 'folder', 'path': folder, 'id': result})
+                pending = [folder for folder, _ in failed]
+                if failed:
+                    if attempt == self.retries:
+                        raise failed[0][1]
+                    self._backoff(failed[0][1], attempt)
+
+    def upload_one(self, journal, relative_path, file_path):
+        '''Upload one file into the folder of its relative path (the folder must exist). Content the drive already
+        has is copied on the server side instead; when that copy is gone, the file is uploaded again.
+
+        Returns:
+            str: 'uploaded' or 'deduplicated'
+        '''
+        parent = relative_path.rsplit('/', 1)[0] if '/' in relative_path else '.'
+        digest = None
+        if self.store and os.path.getsize(file_path) >= self.store.min_size:
+            # small files are always uploaded, a copy request costs about as much as uploading them
+            digest = self.store.manifest_digest(file_path)
+            remote_id = self.store.remote_id(ARTIFACT_STORE_REMOTE, digest) if digest else None
+            if remote_id:
+                try:
+                    file_id = self._call(lambda: self.backend.copy_file(remote_id, os.path.basename(file_path), journal.folders[parent]),
+                                         f"copy of {relative_path}")
+                except DriveNotFoundError:
+                    logger.info(f"Google Drive copy {remote_id} of {relative_path} no longer exists, uploading the file")
+                    self.store.forget_remote(ARTIFACT_STORE_REMOTE, digest)
+                else:
+                    journal.append({'type': 'file', 'path': relative_path, 'id': file_id, 'copied_from': remote_id})
+                    return 'deduplicated'
+
+        sent = [0]
+
+        def on_progress(uri, offset):
+            if journal.sessions.get(relative_path) != uri:
+                journal.append({'type': 'session', 'path': relative_path, 'uri': uri})
+            if self.limiter and offset > sent[0]:
+                self.limiter.consume(offset - sent[0])
+                sent[0] = offset
+
+        def upload():
+            try:
+                return self.backend.upload_file(file_path, os.path.basename(file_path), journal.folders[parent],
+                                                resume_uri=journal.sessions.get(relative_path), on_progress=on_progress)
+            except DriveSessionExpiredError:
+                journal.append({'type': 'session', 'path': relative_path, 'uri': None})
+                raise DriveRetryableError(f"upload session of {relative_path} expired, starting over", retry_after=0)
+
+        file_id = self._call(upload, f"upload of {relative_path}")
+        journal.append({'type': 'file', 'path': relative_path, 'id': file_id})
+        if self.limiter:
+            self.limiter.consume(max(os.path.getsize(file_path) - sent[0], 0))
+        if digest:
+            self.store.record_remote(ARTIFACT_STORE_REMOTE, digest, file_id)
+        return 'uploaded'
+
+    def upload(self, source_path, parent_id, folder_name):
+        '''Upload source_path as folder_name into the drive folder parent_id
+
+        Returns:
+            dict: Summary (folders, uploaded, deduplicated, resumed, failed, seconds, root_id)
+        '''
+        started = time.monotonic()
+        journal = self.open_journal(source_path, parent_id, folder_name)
+
+        folders, files = self.plan(source_path)
+        self.ensure_folders(journal, folders)
+        for folder in folders:
+            name = folder.rsplit('/', 1)[-1]
+            if name in varc.google_ids:
+                varc.google_ids[name]["test_artifacts_id"] = journal.folders[folder]
+            elif name in ('freeze_issue_logs', 'p0_iter_logs'):
+                varc.google_ids[name] = journal.folders[folder]
+
+        summary = {'folders': len(folders), 'uploaded': 0, 'deduplicated': 0, 'resumed': len(journal.files), 'failed': []}
+        pending = [(relative_path, file_path) for relative_path, file_path in files if relative_path not in journal.files]
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='drive-upload') as pool:
+                futures = {pool.submit(self.upload_one, journal, relative_path, file_path): relative_path
+                           for relative_path, file_path in pending}
+                for future in as_completed(futures):
+                    try:
+                        summary[future.result()] += 1
+                    except Exception as e:
+                        logger.warning(f"Google Drive upload of {futures[future]} failed: {e}")
+                        summary['failed'].append(futures[future])
+        finally:
+            if self.store:
+                self.store.save_remote(ARTIFACT_STORE_REMOTE)
+
+        summary.update(seconds=round(time.monotonic() - started, 2), root_id=journal.folders['.'])
+        logger.info(f"Google Drive upload of {source_path}: {summary['uploaded']} uploaded, {summary['deduplicated']} deduplicated, "
+                    f"{summary['resumed']} done by an earlier run, {len(summary['failed'])} failed in {summary['seconds']}s")
+        return summary
+
 
 class GoogleDriveUploadMethods:
     '''This class consist of methods that help in uploading data to Google drive'''
-    
+
     @staticmethod
-    def google_drive_uploader(source_path, parent_id, service_account_key_path):
-        '''This function is used to upload selective data to Google drive'''
-        
+    @profile_span()
+    def google_drive_uploader(source_path, parent_id, service_account_key_path, backend=None, package=False):
+        '''This function is used to upload selective data to Google drive (package: as one .tar.zst archive with its index)'''
+
         try:
-            # Load credentials from the provided service account key file
-            credentials = service_account.Credentials.from_service_account_file(service_account_key_path, scopes=['https://www.googleapis.com/auth/drive'])
-
-            # Create a Drive service instance
-            service = build('drive', 'v3', credentials=credentials)
-
-            def upload_file(parent_id, file_path):
-                file_name = os.path.basename(file_path)
-                file_metadata = {
-                    'name': file_name,
-                    'parents': [parent_id]
-                }
-                media = MediaFileUpload(file_path, resumable=True)
-                file = service.files().create(body=file_metadata, media_body=media, fields='id').execute()
-                print(f"File '{file_name}' uploaded successfully. File ID: {file['id']}")
-
-            def upload_recursive(parent_id, local_path):
-                for item in os.listdir(local_path):
-                    item_path = os.path.join(local_path, item)
-                    if os.path.isfile(item_path):
-                        upload_file(parent_id, item_path)
-                    elif os.path.isdir(item_path):
-                        folder_name = item.lower()  # Convert folder name to lowercase for case-insensitive comparison
-                        if folder_name in ['videos', 'raw_data_videos', 'pp_data_videos', 'raw_data', 'pp_data']:
-                            print(f"Skipping upload for folder '{item}'")
-                            continue  # Skip uploading this folder
-                        folder_metadata = {
-                            'name': item,
-                            'parents': [parent_id],
-                            'mimeType': 'application/vnd.google-apps.folder'
-                        }
-                        folder = service.files().create(body=folder_metadata, fields='id').execute()
-                        print(f"Folder '{item}' created successfully. Folder ID: {folder['id']}")
-                        if item in varc.google_ids:
-                            varc.google_ids[item]["test_artifacts_id"]=folder['id']
-                        elif item == 'freeze_issue_logs':
-                            varc.google_ids["freeze_issue_logs"]=folder['id']
-                        elif item == 'p0_iter_logs':
-                            varc.google_ids["p0_iter_logs"]=folder['id']
-                        upload_recursive(folder['id'], item_path)
+            backend = backend or GoogleDriveBackend(service_account_key_path)
+            store = ArtifactStore(varc.artifact_store_path) if varc.artifact_store_path else None
+            uploader = DriveUploader(backend, store=store)
 
             # Check if the provided path is a directory or a file
-            if os.path.isdir(source_path):
-                #folder_name = os.path.basename(source_path)
-                folder_metadata = {
-                    'name': varc.test_suite_name,
-                    'parents': [parent_id],
-                    'mimeType': 'application/vnd.google-apps.folder'
-                }
-                folder = service.files().create(body=folder_metadata, fields='id').execute()
-                print(f"Folder '{varc.test_suite_name}' created successfully. Folder ID: {folder['id']}")
-                upload_recursive(folder['id'], source_path)
+            if os.path.isdir(source_path) and package:
+                from generic_utils.packaging_util import index_path, package_directory
+                index = package_directory(source_path, skip_dirs=DRIVE_SKIP_FOLDERS)
+                archive_path = os.path.join(os.path.dirname(os.path.abspath(source_path)), index['archive'])
+                for path in (archive_path, index_path(archive_path)):
+                    file_id = uploader._call(lambda: backend.upload_file(path, os.path.basename(path), parent_id),
+                                             f"upload of {path}")
+                print(f"Package '{index['archive']}' uploaded to Google Drive. File ID: {file_id}")
+            elif os.path.isdir(source_path):
+                summary = uploader.upload(source_path, parent_id, varc.test_suite_name)
+                print(f"Folder '{varc.test_suite_name}' uploaded to Google Drive. Folder ID: {summary['root_id']}")
+                if summary['failed']:
+                    raise DriveError(f"{len(summary['failed'])} files failed, first: {summary['failed'][0]}; run again to resume")
             elif os.path.isfile(source_path):
-                upload_file(parent_id, source_path)
-            
+                file_id = uploader._call(lambda: backend.upload_file(source_path, os.path.basename(source_path), parent_id),
+                                         f"upload of {source_path}")
+                print(f"File '{os.path.basename(source_path)}' uploaded successfully. File ID: {file_id}")
+
         except Exception as e:
             print('\n')
             print(f"[DMF] : Something broke while uploading files to google drive")
@@ -75,3 +556,52 @@ class GoogleDriveUploadMethods:
             status=f"{source_path} upload to google drive failed, exception I captured is {e}"
             varc.google_drive_verdict.append(status)
 
+
+def selftest():
+    '''Upload a generated tree to FakeDriveBackend with rate limits and an interruption, resume and verify the result'''
+    import shutil
+    import tempfile
+
+    source = tempfile.mkdtemp(prefix='drive_upload_selftest_')
+    try:
+        expected = {}
+        for test_index in range(5):
+            for name, size in (('logs/kit.log', 3 * 1024 * 1024 + 17), ('report.json', 2000), ('videos/run.mp4', 4096)):
+                path = os.path.join(source, f"test_{test_index}", *name.split('/'))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, 'wb') as data_file:
+                    data_file.write(os.urandom(size))
+                if not name.startswith('videos/'):
+                    expected[f"test_{test_index}/{name}"] = path
+        total_bytes = sum(os.path.getsize(path) for path in expected.values())
+
+        backend = FakeDriveBackend(chunk_size=1024 * 1024, rate_limit_every=7, interrupt_after_chunks=6)
+        first = DriveUploader(backend, workers=4).upload(source, 'parent', 'suite')
+        backend.interrupt_after_chunks = None
+        second = DriveUploader(backend, workers=4).upload(source, 'parent', 'suite')
+
+        root_id = second['root_id']
+        uploaded = backend.tree(root_id)
+        with open(os.path.join(source, DRIVE_UPLOAD_JOURNAL_FILE_NAME), 'r', encoding='utf-8') as journal_file:
+            journal_lines = sum(1 for _ in journal_file)
+        print(f"first run: {first['uploaded']} uploaded, {len(first['failed'])} interrupted")
+        print(f"second run: {second['uploaded']} uploaded, {second['resumed']} resumed from the journal")
+        print(f"{backend.requests} requests, {backend.bytes_received} bytes received for {total_bytes} bytes of files, "
+              f"{journal_lines} journal records")
+        assert sorted(uploaded) == sorted(expected), sorted(set(uploaded) ^ set(expected))
+        for relative_path, path in expected.items():
+            with open(path, 'rb') as data_file:
+                assert uploaded[relative_path] == data_file.read(), relative_path
+        assert [item['parent'] for item in backend.items.values()].count('parent') == 1, "root folder created twice"
+        assert backend.bytes_received == total_bytes, "resumed uploads sent data again"
+        print("selftest passed")
+    finally:
+        shutil.rmtree(source, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.googledrive_upload_util --selftest
+    if len(sys.argv) > 1 and sys.argv[1] == '--selftest':
+        selftest()
+    else:
+        print(__doc__)
@@ -0,0 +1,341 @@
+'''This module builds self-contained static HTML dashboards (no external scripts or styles) from the results
+history database: one per suite plus an index across runs, with per-test sparklines of the key metrics'''
+
+# Standard library imports
+import os
+import sys
+import json
+import html
+import time
+import fnmatch
+import argparse
+from collections import defaultdict
+
+# Local imports
+from fwk.shared.constants import (
+    DASHBOARD_FILE_NAME,
+    DASHBOARD_INDEX_FILE_NAME,
+    DASHBOARD_METRIC_PATTERNS,
+    DASHBOARD_MAX_POINTS,
+)
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from analysis_utils.plot_worker_util import lttb_downsample
+from generic_utils.result_store_util import _atomic_write
+from generic_utils.results_history_util import ResultsHistoryDB
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+STYLE = '''
+body { font-family: Segoe UI, Helvetica, Arial, sans-serif; margin: 24px; color: #222; }
+h1 { font-size: 20px; } h2 { font-size: 16px; margin-top: 28px; }
+table { border-collapse: collapse; font-size: 13px; }
+th, td { border-bottom: 1px solid #ddd; padding: 4px 10px; text-align: left; vertical-align: middle; }
+th { background: #f4f4f4; }
+.PASS { color: #1a7f37; font-weight: 600; } .FAIL { color: #cf222e; font-weight: 600; }
+.other { color: #9a6700; font-weight: 600; }
+.meta { color: #666; font-size: 12px; }
+svg.spark polyline { fill: none; stroke: #0969da; stroke-width: 1.2; }
+svg.spark circle { fill: #cf222e; }
+'''
+
+
+def sparkline_svg(values, width=160, height=32):
+    '''Render a series as an inline SVG sparkline; the last point is highlighted
+
+    Args:
+        values (list): Series values, oldest first
+        width (int): Width in pixels
+        height (int): Height in pixels
+
+    Returns:
+        str: SVG markup ("" for an empty series)
+    '''
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = (high - low) or 1.0
+    step = (width - 4) / max(len(values) - 1, 1)
+    points = [(2 + index * step, height - 2 - (value - low) / span * (height - 4)) for index, value in enumerate(values)]
+    polyline = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+    last_x, last_y = points[-1]
+    title = f"last {values[-1]:.4g} | min {low:.4g} | max {high:.4g} | {len(values)} points"
+    return (
+        f'<svg class="spark" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'<title>{html.escape(title)}</title><polyline points="{polyline}"/>'
+        f'<circle cx="{last_x:.1f}" cy="{last_y:.1f}" r="2"/></svg>'
+    )
+
+
+def downsample(values, max_points=DASHBOARD_MAX_POINTS):
+    '''Reduce a series to max_points with LTTB so long histories keep their shape'''
+    if len(values) <= max_points:
+        return list(values)
+    _, sampled = lttb_downsample(range(len(values)), values, max_points)
+    return sampled.tolist()
+
+
+def verdict_class(verdict):
+    return verdict if verdict in ('PASS', 'FAIL') else 'other'
+
+
+def page(title, body, data):
+    '''Wrap a dashboard body into a complete HTML document; data is embedded as JSON for offline reuse'''
+    # "</" would end the script element early
+    embedded = json.dumps(data).replace("</", "<\\/")
+    return (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+        f'<title>{html.escape(title)}</title><style>{STYLE}</style></head><body>\n'
+        f'{body}\n<script type="application/json" id="dmf-data">{embedded}</script>\n'
+        '</body></html>\n'
+    )
+
+
+class DashboardData:
+    '''Loads everything the dashboards need from the history database with a few aggregated queries'''
+
+    def __init__(self, history, metric_patterns=DASHBOARD_METRIC_PATTERNS):
+        '''
+        Args:
+            history (ResultsHistoryDB): Open history database
+            metric_patterns (list): fnmatch patterns of the metrics shown as sparklines
+        '''
+        connection = history.connection
+        self.runs = [dict(row) for row in connection.execute(
+            '''SELECT run_id, suite_name, started_at, build, platform, gpu_name FROM runs
+               ORDER BY started_at, run_id'''
+        )]
+        self.run_position = {run['run_id']: index for index, run in enumerate(self.runs)}
+
+        # run_id -> [(test name, verdict)], counts per run
+        self.tests_by_run = defaultdict(list)
+        for row in connection.execute("SELECT run_id, name, verdict FROM tests ORDER BY test_id"):
+            self.tests_by_run[row['run_id']].append((row['name'], row['verdict']))
+
+        metric_names = [row[0] for row in connection.execute("SELECT DISTINCT metric FROM metrics")]
+        self.metrics = [name for name in metric_names if any(fnmatch.fnmatch(name, pattern) for pattern in metric_patterns)]
+
+        # (test, metric) -> [(run position, value)], oldest first; iterations of one run are averaged
+        per_run = defaultdict(lambda: defaultdict(list))
+        if self.metrics:
+            placeholders = ",".join("?" * len(self.metrics))
+            rows = connection.execute(
+                f"SELECT test_name, metric, run_id, value FROM metrics WHERE metric IN ({placeholders}) AND value IS NOT NULL",
+                self.metrics,
+            )
+            for test_name, metric, run_id, value in rows:
+                per_run[(test_name, metric)][self.run_position[run_id]].append(value)
+        self.series = {
+            key: sorted((position, sum(values) / len(values)) for position, values in runs.items())
+            for key, runs in per_run.items()
+        }
+
+    def series_until(self, test_name, metric, last_position=None):
+        '''Values of one test metric up to (and including) a run position, downsampled'''
+        points = self.series.get((test_name, metric), [])
+        if last_position is not None:
+            points = [point for point in points if point[0] <= last_position]
+        return downsample([value for _, value in points])
+
+    def value_at(self, test_name, metric, position):
+        '''Value of one test metric in the run at position, None if it was not measured'''
+        for point_position, value in self.series.get((test_name, metric), []):
+            if point_position == position:
+                return value
+        return None
+
+    def test_metrics(self, test_name):
+        return sorted(metric for name, metric in self.series if name == test_name)
+
+
+class DashboardMethods:
+    '''Builders of the suite dashboard and the run index'''
+
+    @staticmethod
+    def suite_dashboard(data, suite_name):
+        '''Build the dashboard of one suite: its verdicts and metrics with the history leading up to it
+
+        Returns:
+            str: HTML document
+        '''
+        run = next((item for item in data.runs if item['suite_name'] == suite_name), None)
+        if run is None:
+            raise ValueError(f"Suite {suite_name} is not in the history database")
+        position = data.run_position[run['run_id']]
+
+        rows = []
+        embedded = {}
+        seen = set()
+        for test_name, verdict in data.tests_by_run[run['run_id']]:
+            if test_name in seen:
+                continue
+            seen.add(test_name)
+            cells = []
+            for metric in data.test_metrics(test_name):
+                current = data.value_at(test_name, metric, position)
+                if current is None:
+                    continue
+                values = data.series_until(test_name, metric, position)
+                embedded[f"{test_name}|{metric}"] = values
+                cells.append(
+                    f'<tr><td>{html.escape(metric)}</td><td>{current:.4g}</td><td>{sparkline_svg(values)}</td></tr>'
+                )
+            metric_table = f'<table>{"".join(cells)}</table>' if cells else '<span class="meta">no metrics</span>'
+            rows.append(
+                f'<tr><td>{html.escape(test_name)}</td><td class="{verdict_class(verdict)}">{html.escape(str(verdict))}</td>'
+                f'<td>{metric_table}</td></tr>'
+            )
+
+        body = (
+            f'<h1>{html.escape(suite_name)}</h1>'
+            f'<p class="meta">Build {html.escape(str(run["build"]))} | {html.escape(str(run["started_at"]))} | '
+            f'{html.escape(str(run["platform"]))} | {html.escape(str(run["gpu_name"]))} | '
+            f'sparklines show up to {DASHBOARD_MAX_POINTS} runs up to this one</p>'
+            '<table><tr><th>Test</th><th>Verdict</th><th>Metrics (current value, history)</th></tr>'
+            f'{"".join(rows)}</table>'
+        )
+        return page(f"DMF - {suite_name}", body, {'suite': suite_name, 'series': embedded})
+
+    @staticmethod
+    def index_dashboard(data, suite_links=None, last_runs=200):
+        '''Build the index across runs: recent runs with verdict counts and per-test trends
+
+        Args:
+            data (DashboardData): Loaded history
+            suite_links (dict): suite name -> relative link of its dashboard
+            last_runs (int): Number of runs listed in the run table
+
+        Returns:
+            str: HTML document
+        '''
+        suite_links = suite_links or {}
+        run_rows = []
+        for run in reversed(data.runs[-last_runs:]):
+            verdicts = [verdict for _, verdict in data.tests_by_run[run['run_id']]]
+            passed = verdicts.count('PASS')
+            failed = len(verdicts) - passed
+            name = html.escape(run['suite_name'])
+            link = suite_links.get(run['suite_name'])
+            name_cell = f'<a href="{html.escape(link)}">{name}</a>' if link else name
+            run_rows.append(
+                f'<tr><td>{name_cell}</td><td>{html.escape(str(run["started_at"]))}</td><td>{html.escape(str(run["build"]))}</td>'
+                f'<td>{html.escape(str(run["platform"]))}</td><td class="PASS">{passed}</td>'
+                f'<td class="{"FAIL" if failed else "PASS"}">{failed}</td></tr>'
+            )
+
+        trend_rows = []
+        embedded = {}
+        for test_name, metric in sorted(data.series):
+            values = data.series_until(test_name, metric)
+            embedded[f"{test_name}|{metric}"] = values
+            trend_rows.append(
+                f'<tr><td>{html.escape(test_name)}</td><td>{html.escape(metric)}</td>'
+                f'<td>{values[-1]:.4g}</td><td>{sparkline_svg(values, width=240)}</td></tr>'
+            )
+
+        body = (
+            f'<h1>DMF results history</h1><p class="meta">{len(data.runs)} runs | generated {time.strftime("%Y-%m-%d %H:%M:%S")}</p>'
+            '<h2>Runs</h2><table><tr><th>Suite</th><th>Started</th><th>Build</th><th>Platform</th><th>Passed</th><th>Not passed</th></tr>'
+            f'{"".join(run_rows)}</table>'
+            '<h2>Trends</h2><table><tr><th>Test</th><th>Metric</th><th>Last</th><th>History</th></tr>'
+            f'{"".join(trend_rows)}</table>'
+        )
+        return page("DMF results history", body, {'runs': len(data.runs), 'series': embedded})
+
+    @staticmethod
+    def generate(db_path, suite_path=None, output_dir=None, suite_name=None):
+        '''Write the index (and the suite dashboard when suite_path is given)
+
+        Args:
+            db_path (str): History database
+            suite_path (str): Suite output directory; its dashboard is written into it
+            output_dir (str): Index directory, defaults to the database directory
+            suite_name (str): Suite name in the database, defaults to the suite folder name
+
+        Returns:
+            str: Index path
+        '''
+        output_dir = output_dir or os.path.dirname(os.path.abspath(db_path))
+        with ResultsHistoryDB(db_path) as history:
+            data = DashboardData(history)
+
+        if suite_path:
+            suite_name = suite_name or os.path.basename(os.path.normpath(suite_path))
+            _atomic_write(os.path.join(suite_path, DASHBOARD_FILE_NAME), DashboardMethods.suite_dashboard(data, suite_name))
+
+        # suite dashboards live in the suite folders next to the index
+        suite_links = {}
+        for run in data.runs:
+            if os.path.exists(os.path.join(output_dir, run['suite_name'], DASHBOARD_FILE_NAME)):
+                suite_links[run['suite_name']] = f"{run['suite_name']}/{DASHBOARD_FILE_NAME}"
+        index_path = os.path.join(output_dir, DASHBOARD_INDEX_FILE_NAME)
+        _atomic_write(index_path, DashboardMethods.index_dashboard(data, suite_links))
+        return index_path
+
+
+def generate_current_suite_dashboards():
+    '''Build the dashboards at suite end, after the suite was ingested (no-op when history is disabled)'''
+    if not varc.results_history_db_path:
+        return
+    start = time.perf_counter()
+    index_path = DashboardMethods.generate(varc.results_history_db_path, varc.test_suite_path, suite_name=varc.test_suite_name)
+    logger.info(f"HTML dashboards written to {varc.test_suite_path} and {index_path} in {time.perf_counter() - start:.2f}s")
+
+
+def benchmark(runs=1000, tests=20):
+    '''Time dashboard generation on a synthetic history of runs x tests'''
+    import random
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "history.db")
+        with ResultsHistoryDB(db_path) as history:
+            with history.connection:
+                for run_index in range(runs):
+                    run_id = history.connection.execute(
+                        "INSERT INTO runs (suite_name, build, started_at, platform) VALUES (?, ?, ?, ?)",
+                        (f"suite_{run_index}", f"build_{run_index // 10}", f"2026-01-01T{run_index:06d}", "Windows"),
+                    ).lastrowid
+                    for test_index in range(tests):
+                        test_id = history.connection.execute(
+                            "INSERT INTO tests (run_id, name, verdict) VALUES (?, ?, ?)",
+                            (run_id, f"test_{test_index}", random.choice(['PASS'] * 9 + ['FAIL'])),
+                        ).lastrowid
+                        history.connection.executemany(
+                            "INSERT INTO metrics (test_id, run_id, test_name, metric, value) VALUES (?, ?, ?, ?, ?)",
+                            [(test_id, run_id, f"test_{test_index}", metric, random.gauss(mean, mean / 20)) for metric, mean in (
+                                ('launch_time', 30), ('total_execution_time', 600),
+                                ('perf-test.vram-peak-usage-gb.GPU 0', 12), ('perf-test.process-memory-peak-gb', 8),
+                            )],
+                        )
+        suite_path = os.path.join(temp_dir, f"suite_{runs - 1}")
+        os.makedirs(suite_path)
+        start = time.perf_counter()
+        index_path = DashboardMethods.generate(db_path, suite_path)
+        elapsed = time.perf_counter() - start
+        print(f"{runs} runs x {tests} tests: dashboards generated in {elapsed:.2f}s "
+              f"(index {os.path.getsize(index_path) / 1024:.0f} KiB)")
+
+
+def main():
+    '''Command line interface, see --help'''
+    parser = argparse.ArgumentParser(description='DMF static HTML dashboards')
+    parser.add_argument('--db', help='History database path')
+    parser.add_argument('--suite', help='Suite output directory to build a suite dashboard for')
+    parser.add_argument('--out', help='Index output directory (default: database directory)')
+    parser.add_argument('--benchmark', type=int, metavar='RUNS', help='Time generation on a synthetic history')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark)
+    elif args.db:
+        print(DashboardMethods.generate(args.db, args.suite, args.out))
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.html_dashboard_util --db Outputs/dmf_results_history.db --suite Outputs/<suite>
+    # python -m generic_utils.html_dashboard_util --benchmark 1000
+    main()
@@ -0,0 +1,210 @@
+'''This module streams test results into a JUnit XML file for CI. The file is a complete, valid document
+after every finished test and is replaced atomically, so CI can show results while the suite runs.'''
+
+# Standard library imports
+import os
+import time
+import socket
+from datetime import datetime
+import xml.etree.ElementTree as ET
+
+# Local imports
+from fwk.shared.constants import JUNIT_REPORT_FILE_NAME, JUNIT_METRIC_PROPERTIES, QUARANTINED_VERDICT
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.result_store_util import ResultStore, _atomic_write
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# testcase outcome -> <testsuite> counter attribute
+OUTCOME_COUNTERS = {'failure': 'failures', 'error': 'errors', 'skipped': 'skipped'}
+
+
+def issue_counts(reasons):
+    '''Count P0 and P1 hits in the reason lines of the logs analysis
+
+    Args:
+        reasons (list): detailed_analysis lines, e.g. "P1 issue found here : ..."
+
+    Returns:
+        tuple: (p0 count, p1 count)
+    '''
+    p0 = p1 = 0
+    for reason in reasons or []:
+        text = str(reason).strip().lower()
+        if text.startswith('pytest '):
+            text = text[len('pytest '):]
+        if text.startswith('p0'):
+            p0 += 1
+        elif text.startswith('p1') and not text.startswith('p1 ignored'):
+            p1 += 1
+    return p0, p1
+
+
+class JUnitReporter:
+    '''Keeps the serialized <testcase> elements of the suite in memory; every write joins them
+    into a new document, previous results are never re-read or re-parsed. Retries and benchmark repeats
+    report under the same updated_name, so the last attempt replaces the testcase of the earlier ones.'''
+
+    _path = None
+    # updated_name -> (serialized testcase, duration, outcome)
+    _testcases = {}
+    # updated_name -> (test fields, report_data, previous attempts), to rebuild the testcases in refresh()
+    _entries = {}
+    _started_at = None
+
+    @staticmethod
+    def start(suite_path):
+        '''Start a new JUnit report for the suite (called by ReportingMethods.report_creator)
+
+        Args:
+            suite_path (str): Test suite output directory
+        '''
+        JUnitReporter._path = os.path.join(suite_path, JUNIT_REPORT_FILE_NAME)
+        JUnitReporter._testcases = {}
+        JUnitReporter._entries = {}
+        JUnitReporter._started_at = datetime.now().isoformat(timespec='seconds')
+        JUnitReporter._write()
+
+    @staticmethod
+    def testcase_element(test_dict, report_data, previous_attempts=None):
+        '''Build the <testcase> element of a finished test
+
+        Args:
+            test_dict (dict): A dictionary consisting of ATF test information
+            report_data (dict): report.json entry of the test
+            previous_attempts (int): Attempts before this one, None to take them from varc.test_attempts
+
+        Returns:
+            tuple: (Element, duration in seconds, outcome: passed/failure/error/skipped)
+        '''
+        metrics = report_data.get('execution_metrics') or {}
+        duration = metrics.get('total_execution_time') or 0.0
+        testcase = ET.Element('testcase', {
+            'classname': f"{varc.component}.{test_dict.get('type', 'UNKNOWN')}",
+            'name': test_dict['updated_name'],
+            'time': f"{duration:.3f}",
+        })
+
+        detailed = test_dict.get('detailed_analysis') or {}
+        reasons = (detailed.get('logs') or []) + (detailed.get('pytest_logs') or [])
+        p0, p1 = issue_counts(reasons)
+        if previous_attempts is None:
+            previous_attempts = len(varc.test_attempts.get(test_dict['name'], []))
+        properties = {
+            'verdict': report_data.get('final_verdict'),
+            'attempt': previous_attempts + 1,
+            'retries': previous_attempts,
+            'p0_hits': p0,
+            'p1_hits': p1,
+            'launch_time': metrics.get('launch_time'),
+        }
+        if test_dict.get('flakiness'):
+            properties['flip_rate'] = test_dict['flakiness'].get('flip-rate')
+        for name in JUNIT_METRIC_PROPERTIES:
+            if name in metrics:
+                properties[name] = metrics[name]
+        for key, value in (report_data.get('subtest_dict') or {}).items():
+            properties[f"subtest.{key}"] = value
+
+        properties_element = ET.SubElement(testcase, 'properties')
+        for name, value in properties.items():
+            if value is not None:
+                ET.SubElement(properties_element, 'property', {'name': name, 'value': str(value)})
+
+        verdict = report_data.get('final_verdict')
+        reason = report_data.get('process_specific_errors')
+        if reason in (None, 'NA'):
+            reason = report_data.get('logs_errors')
+        reason = None if reason in (None, 'NA') else str(reason)
+
+        if verdict == 'SKIPPED':
+            outcome = 'skipped'
+            ET.SubElement(testcase, 'skipped', {'message': reason or 'skipped'})
+        elif verdict == QUARANTINED_VERDICT:
+            # the failure of a quarantined test must not fail the CI job
+            outcome = 'skipped'
+            ET.SubElement(testcase, 'skipped', {'message': f"{QUARANTINED_VERDICT}: {reason or 'failed'}"})
+        elif verdict == 'PASS':
+            outcome = 'passed'
+        elif reason and reason.startswith(('Execution Exception', 'Unexpected error')):
+            # the framework failed to run the test, not a test failure
+            outcome = 'error'
+            ET.SubElement(testcase, 'error', {'message': reason, 'type': str(verdict)})
+        else:
+            outcome = 'failure'
+            ET.SubElement(testcase, 'failure', {'message': reason or str(verdict), 'type': str(verdict)})
+
+        if reasons:
+            ET.SubElement(testcase, 'system-out').text = "\n".join(str(line) for line in reasons)
+        return testcase, float(duration), outcome
+
+    @staticmethod
+    def add_test(test_dict, report_data):
+        '''Add a finished test, or replace the testcase of its previous attempt, and rewrite the report
+        (called by ReportingMethods.report_updater)
+
+        Args:
+            test_dict (dict): A dictionary consisting of ATF test information
+            report_data (dict): report.json entry of the test
+        '''
+        if JUnitReporter._path is None:
+            return
+        fields = {key: test_dict.get(key) for key in ('name', 'updated_name', 'type', 'detailed_analysis', 'flakiness')}
+        previous_attempts = len(varc.test_attempts.get(test_dict['name'], []))
+        JUnitReporter._entries[fields['updated_name']] = (fields, dict(report_data), previous_attempts)
+        JUnitReporter._add_testcase(fields, report_data, previous_attempts)
+        JUnitReporter._write()
+
+    @staticmethod
+    def refresh():
+        '''Rebuild all testcases with the report fields changed after the tests finished, e.g. the
+        PERF_REGRESSION and QUARANTINED verdicts (called in testsuite_post_step after those steps)'''
+        if JUnitReporter._path is None:
+            return
+        updates = {}
+        for record in ResultStore(os.path.dirname(JUnitReporter._path)).records():
+            if record.get('type') == 'update':
+                updates.setdefault(record['name'], {}).update(record['data'])
+        if not updates:
+            return
+
+        for fields, report_data, previous_attempts in JUnitReporter._entries.values():
+            update = updates.get(fields['updated_name'], {})
+            if 'flakiness' in update:
+                fields = {**fields, 'flakiness': update['flakiness']}
+            JUnitReporter._add_testcase(fields, {**report_data, **update}, previous_attempts)
+        JUnitReporter._write()
+
+    @staticmethod
+    def _add_testcase(test_dict, report_data, previous_attempts):
+        testcase, duration, outcome = JUnitReporter.testcase_element(test_dict, report_data, previous_attempts)
+        JUnitReporter._testcases[test_dict['updated_name']] = (ET.tostring(testcase, encoding='unicode'), duration, outcome)
+
+    @staticmethod
+    def _write():
+        counts = {'tests': len(JUnitReporter._testcases), 'failures': 0, 'errors': 0, 'skipped': 0}
+        total_time = 0.0
+        for _, duration, outcome in JUnitReporter._testcases.values():
+            if outcome != 'passed':
+                counts[OUTCOME_COUNTERS[outcome]] += 1
+            total_time += duration
+        attributes = {
+            'name': str(varc.test_suite_name),
+            'timestamp': JUnitReporter._started_at,
+            'hostname': socket.gethostname(),
+            'time': f"{total_time:.3f}",
+            **{key: str(value) for key, value in counts.items()},
+        }
+        suite = ET.Element('testsuite', attributes)
+        # the open/close tags are split so the cached testcases can be joined in between
+        open_tag = ET.tostring(suite, encoding='unicode').replace(' />', '>')
+        document = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<testsuites name="DMF" time="{total_time:.3f}">\n'
+            f'{open_tag}\n' + ''.join(f'{testcase}\n' for testcase, _, _ in JUnitReporter._testcases.values()) +
+            '</testsuite>\n</testsuites>\n'
+        )
+        start = time.perf_counter()
+        _atomic_write(JUnitReporter._path, document)
+        logger.debug(f"JUnit report written with {counts['tests']} tests in {(time.perf_counter() - start) * 1000:.1f} ms")
@@ -0,0 +1,235 @@
+'''This module keeps DMF runtime metrics (counters, gauges, histograms) in a small in-process registry and
+renders them in the Prometheus text exposition format, for a node-exporter textfile and the /metrics endpoint'''
+
+# Standard library imports
+import os
+import math
+import threading
+
+# Local imports
+from fwk.shared.constants import METRICS_TEXTFILE_NAME, LAUNCH_TIME_BUCKETS, TEST_DURATION_BUCKETS
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.result_store_util import _atomic_write
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _escape_help(text):
+    return str(text).replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _label_string(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    '''Common part of all metric types: name, help, label names and one value slot per label combination'''
+
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        '''Yield (suffix, label values, extra label pairs, value) tuples'''
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in sorted(items):
+            yield '', key, (), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {_escape_help(self.documentation)}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_label_string(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    '''Monotonically increasing count; the name should end in _total'''
+
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    '''Value that can go up and down'''
+
+    type_name = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_max(self, value, **labels):
+        '''Keep the highest value seen (peaks)'''
+        key = self._key(labels)
+        with self._lock:
+            if value > self._values.get(key, -math.inf):
+                self._values[key] = value
+
+
+class Histogram(_Metric):
+    '''Cumulative bucket counts, sum and count of observations'''
+
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['buckets'][index] += 1
+            state['sum'] += value
+            state['count'] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(key, {'buckets': list(state['buckets']), 'sum': state['sum'], 'count': state['count']})
+                     for key, state in self._values.items()]
+        for key, state in sorted(items):
+            for bound, count in zip(self.buckets, state['buckets']):
+                yield '_bucket', key, (('le', _format_value(float(bound))),), count
+            yield '_sum', key, (), state['sum']
+            yield '_count', key, (), state['count']
+
+
+class MetricsRegistry:
+    '''All DMF metrics; rendered together for the textfile and the /metrics endpoint'''
+
+    _metrics = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def register(metric):
+        with MetricsRegistry._lock:
+            if metric.name in MetricsRegistry._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            MetricsRegistry._metrics[metric.name] = metric
+        return metric
+
+    @staticmethod
+    def render():
+        '''Return all metrics in Prometheus text exposition format (version 0.0.4)'''
+        with MetricsRegistry._lock:
+            metrics = list(MetricsRegistry._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+    @staticmethod
+    def textfile_path():
+        '''Configured textfile path ([metrics] section of dmf_config.toml), defaulting to the suite folder'''
+        if varc.metrics_textfile_path:
+            return varc.metrics_textfile_path
+        if varc.test_suite_path:
+            return os.path.join(varc.test_suite_path, METRICS_TEXTFILE_NAME)
+        return None
+
+    @staticmethod
+    def write_textfile(path=None):
+        '''Write the metrics atomically, as required by the node-exporter textfile collector'''
+        path = path or MetricsRegistry.textfile_path()
+        if not path:
+            return
+        try:
+            _atomic_write(path, MetricsRegistry.render())
+        except OSError as e:
+            logger.warning(f"Could not write metrics textfile {path}: {e}")
+
+
+# Runner metrics
+TESTS_TOTAL = MetricsRegistry.register(Counter(
+    'dmf_tests_total', 'Finished test attempts by verdict', ('component', 'type', 'verdict')))
+RETRIES_TOTAL = MetricsRegistry.register(Counter(
+    'dmf_test_retries_total', 'Test attempts after the first one', ('component', 'type')))
+QUEUE_DEPTH = MetricsRegistry.register(Gauge(
+    'dmf_queue_depth', 'Tests waiting in the runner queue', ('component',)))
+TEST_RUNNING = MetricsRegistry.register(Gauge(
+    'dmf_test_running', '1 while a test is executing', ('component',)))
+LAUNCH_TIME = MetricsRegistry.register(Histogram(
+    'dmf_launch_time_seconds', 'Kit launch time', ('component', 'type'), LAUNCH_TIME_BUCKETS))
+TEST_DURATION = MetricsRegistry.register(Histogram(
+    'dmf_test_duration_seconds', 'Wall time of a test attempt', ('component', 'type'), TEST_DURATION_BUCKETS))
+SUITE_START_TIME = MetricsRegistry.register(Gauge(
+    'dmf_suite_start_time_seconds', 'Unix time the running suite started', ('suite',)))
+
+# Recorder metrics
+VRAM_PEAK_MB = MetricsRegistry.register(Gauge(
+    'dmf_vram_peak_mb', 'Peak VRAM used during the current test', ('gpu',)))
+PROCESS_MEMORY_GB = MetricsRegistry.register(Gauge(
+    'dmf_process_memory_gb', 'Latest resident memory of the Kit process', ()))
+
+# Log analysis metrics
+LOG_CLASSIFICATIONS_TOTAL = MetricsRegistry.register(Counter(
+    'dmf_log_classifications_total', 'Failing log analysis results by analyzed log and severity', ('component', 'log', 'severity')))
+
+# Upload queue metrics
+UPLOAD_QUEUE_PENDING = MetricsRegistry.register(Gauge(
+    'dmf_upload_queue_pending', 'Files waiting in the background upload queue', ()))
+UPLOADED_BYTES_TOTAL = MetricsRegistry.register(Counter(
+    'dmf_uploaded_bytes_total', 'Bytes uploaded by the background upload queue', ()))
+
+
+def observe_attempt(test_dict, result, duration):
+    '''Update runner metrics after a test attempt and refresh the textfile (called by the runners)
+
+    Args:
+        test_dict (dict): A dictionary consisting of ATF test information
+        result (TestResult): Result of the attempt
+        duration (float): Wall time of the attempt in seconds
+    '''
+    labels = {'component': varc.component, 'type': test_dict.get('type', 'UNKNOWN')}
+    TESTS_TOTAL.inc(verdict=test_dict['verdicts'].get('final-verdict') or result.status.name, **labels)
+    if result.attempts > 1:
+        RETRIES_TOTAL.inc(**labels)
+    TEST_DURATION.observe(duration, **labels)
+    if isinstance(result.metrics.get('launch_time'), (int, float)):
+        LAUNCH_TIME.observe(result.metrics['launch_time'], **labels)
+    TEST_RUNNING.set(0, component=varc.component)
+    MetricsRegistry.write_textfile()
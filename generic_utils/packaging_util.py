@@ -0,0 +1,316 @@
+'''This module packages test output folders into .tar.zst archives. The tar stream is written straight from the
+source files (no staging copy) and cut into independent zstd frames that a thread pool compresses in parallel;
+already compressed media is packed at the fastest level, where zstd stores incompressible blocks raw, or left out.
+A sidecar index records the offset of every file and frame, so single files are read without unpacking the archive.
+Without the zstandard package the archive is a plain .tar with the same index.'''
+
+# Standard library imports
+import os
+import json
+import time
+import bisect
+import shutil
+import tarfile
+import zipfile
+import argparse
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional imports, plain tar without compression when missing
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Local imports
+from fwk.shared.constants import (
+    PACKAGE_ARCHIVE_SUFFIX, PACKAGE_INDEX_SUFFIX, PACKAGE_ZSTD_LEVEL, PACKAGE_FRAME_SIZE,
+    PACKAGE_STORED_EXTENSIONS, PACKAGE_STORED_LEVEL
+)
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.result_store_util import _atomic_write
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+def archive_suffix():
+    return PACKAGE_ARCHIVE_SUFFIX if ZSTD_AVAILABLE else '.tar'
+
+
+def index_path(archive_path):
+    return archive_path + PACKAGE_INDEX_SUFFIX
+
+
+def is_stored(path):
+    '''True for already compressed formats (PACKAGE_STORED_EXTENSIONS)'''
+    return os.path.splitext(path)[1].lower() in PACKAGE_STORED_EXTENSIONS
+
+
+class _FrameWriter:
+    '''File object for tarfile: cuts the stream into frames, compresses them in parallel and writes them in order'''
+
+    def __init__(self, out_file, level, workers, frame_size):
+        self.out_file = out_file
+        self.level = level
+        self.frame_size = frame_size
+        # [uncompressed offset, compressed offset] of every frame
+        self.frames = []
+        self.position = 0
+        self.written = 0
+        self._buffer = bytearray()
+        self._buffer_start = 0
+        self._local = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='zstd') if ZSTD_AVAILABLE else None
+        self._inflight = deque()
+        # bounds the memory held by frames waiting for their turn to be written
+        self._max_inflight = workers * 2
+
+    def tell(self):
+        return self.position
+
+    def write(self, data):
+        if self._pool is None:
+            self.out_file.write(data)
+            self.written += len(data)
+        else:
+            self._buffer += data
+            while len(self._buffer) >= self.frame_size:
+                self._submit(bytes(self._buffer[:self.frame_size]))
+                del self._buffer[:self.frame_size]
+        self.position += len(data)
+        return len(data)
+
+    def set_level(self, level):
+        '''Switch the compression level; the pending bytes are closed into a frame of the old level'''
+        if level != self.level:
+            self.flush()
+            self.level = level
+
+    def flush(self):
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _compressor(self, level):
+        # compressor contexts are not thread-safe, every pool thread keeps its own per level
+        compressors = self._local.__dict__.setdefault('compressors', {})
+        if level not in compressors:
+            compressors[level] = zstandard.ZstdCompressor(level=level, write_content_size=True)
+        return compressors[level]
+
+    def _compress(self, data, level):
+        return self._compressor(level).compress(data)
+
+    def _submit(self, data):
+        self._inflight.append((self._buffer_start, self._pool.submit(self._compress, data, self.level)))
+        self._buffer_start += len(data)
+        while len(self._inflight) > self._max_inflight:
+            self._write_next()
+
+    def _write_next(self):
+        start, future = self._inflight.popleft()
+        frame = future.result()
+        self.frames.append([start, self.written])
+        self.out_file.write(frame)
+        self.written += len(frame)
+
+    def close(self):
+        if self._pool is not None:
+            self.flush()
+            while self._inflight:
+                self._write_next()
+            self._pool.shutdown()
+
+
+def package_directory(source_path, archive_path=None, level=PACKAGE_ZSTD_LEVEL, workers=None, skip_stored=False,
+                      skip_dirs=(), frame_size=PACKAGE_FRAME_SIZE):
+    '''Package a folder into a .tar.zst archive with a sidecar index
+
+    Args:
+        source_path (str): Folder to package; its name is the top folder inside the archive
+        archive_path (str): Defaults to <source_path>.tar.zst (.tar without zstandard)
+        level (int): zstd level of everything but already compressed media
+        workers (int): Compression threads, defaults to the CPU count
+        skip_stored (bool): Leave already compressed media out of the archive (listed as skipped in the index)
+        skip_dirs (list): Folder names that are not packaged (case-insensitive)
+
+    Returns:
+        dict: Index (archive, compression, frames, files: relative path -> {offset, size, mtime, stored}, skipped,
+              bytes_in, bytes_out, seconds)
+    '''
+    started = time.monotonic()
+    source_path = os.path.abspath(source_path)
+    top = os.path.basename(source_path)
+    if archive_path is None:
+        archive_path = source_path + archive_suffix()
+    archive_path = os.path.abspath(archive_path)
+    skip_dirs = {name.lower() for name in skip_dirs}
+    files = {}
+    skipped = []
+    temp_path = f"{archive_path}.partial"
+
+    with open(temp_path, 'wb') as out_file:
+        writer = _FrameWriter(out_file, level, workers or os.cpu_count() or 4, frame_size)
+        with tarfile.open(fileobj=writer, mode='w', format=tarfile.PAX_FORMAT) as tar:
+            for root, directories, names in os.walk(source_path):
+                directories[:] = sorted(directory for directory in directories if directory.lower() not in skip_dirs)
+                for name in sorted(names):
+                    file_path = os.path.join(root, name)
+                    relative_path = os.path.relpath(file_path, source_path).replace('\\', '/')
+                    if os.path.islink(file_path) or file_path in (temp_path, archive_path, index_path(archive_path)):
+                        continue
+                    stored = is_stored(name)
+                    if stored and skip_stored:
+                        skipped.append(relative_path)
+                        continue
+                    tarinfo = tar.gettarinfo(file_path, arcname=f"{top}/{relative_path}")
+                    writer.set_level(PACKAGE_STORED_LEVEL if stored else level)
+                    with open(file_path, 'rb') as source_file:
+                        tar.addfile(tarinfo, source_file)
+                    # member data ends padded to the next 512 byte block, right where the tar offset is now
+                    padded_size = -(-tarinfo.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+                    files[relative_path] = {'offset': tar.offset - padded_size, 'size': tarinfo.size,
+                                            'mtime': int(tarinfo.mtime), 'stored': stored}
+        writer.close()
+    os.replace(temp_path, archive_path)
+
+    index = {
+        'archive': os.path.basename(archive_path),
+        'top': top,
+        'compression': 'zstd' if ZSTD_AVAILABLE else None,
+        'frames': writer.frames,
+        'files': files,
+        'skipped': skipped,
+        'bytes_in': sum(entry['size'] for entry in files.values()),
+        'bytes_out': os.path.getsize(archive_path),
+        'seconds': round(time.monotonic() - started, 3),
+    }
+    _atomic_write(index_path(archive_path), json.dumps(index))
+    logger.info(f"Packaged {source_path}: {len(files)} files, {index['bytes_in'] / 1024 ** 2:.1f} MB -> "
+                f"{index['bytes_out'] / 1024 ** 2:.1f} MB in {index['seconds']}s ({len(skipped)} media files left out)")
+    return index
+
+
+def load_index(archive_path):
+    with open(index_path(archive_path), 'r', encoding='utf-8') as index_file:
+        return json.load(index_file)
+
+
+def _member_chunks(archive_path, relative_path, index):
+    entry = index['files'][relative_path]
+    with open(archive_path, 'rb') as archive_file:
+        if not index['compression']:
+            archive_file.seek(entry['offset'])
+            reader = archive_file
+        else:
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError(f"zstandard is required to read {archive_path}")
+            # decompression starts at the last frame beginning before the file
+            starts = [frame[0] for frame in index['frames']]
+            frame_start, compressed_offset = index['frames'][bisect.bisect_right(starts, entry['offset']) - 1]
+            archive_file.seek(compressed_offset)
+            reader = zstandard.ZstdDecompressor().stream_reader(archive_file, read_across_frames=True)
+            skip = entry['offset'] - frame_start
+            while skip:
+                data = reader.read(min(skip, READ_CHUNK_SIZE))
+                if not data:
+                    raise EOFError(f"{archive_path} ends before {relative_path}")
+                skip -= len(data)
+        remaining = entry['size']
+        while remaining:
+            data = reader.read(min(remaining, READ_CHUNK_SIZE))
+            if not data:
+                raise EOFError(f"{archive_path} ends inside {relative_path}")
+            remaining -= len(data)
+            yield data
+
+
+def read_file(archive_path, relative_path, index=None):
+    '''Content of one packaged file, read through the index (relative to the packaged folder, '/' separated)'''
+    return b''.join(_member_chunks(archive_path, relative_path, index or load_index(archive_path)))
+
+
+def extract_file(archive_path, relative_path, dest_path, index=None):
+    '''Write one packaged file to dest_path without unpacking the rest of the archive'''
+    os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+    with open(dest_path, 'wb') as dest_file:
+        for data in _member_chunks(archive_path, relative_path, index or load_index(archive_path)):
+            dest_file.write(data)
+    return dest_path
+
+
+def _zip_directory(source_path, zip_path):
+    '''Same zip as commonutil.zip_files (ZIP_DEFLATED, default level), the baseline of the benchmark'''
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zip_file:
+        for root, _, names in os.walk(source_path):
+            for name in names:
+                full_path = os.path.join(root, name)
+                zip_file.write(full_path, full_path.replace(source_path, ""))
+
+
+def benchmark(source_path):
+    '''Package a folder with zip (deflate) and with package_directory and compare throughput and size'''
+    source_path = os.path.abspath(source_path)
+    temp_dir = tempfile.mkdtemp(prefix='dmf_packaging_benchmark_')
+    try:
+        bytes_in = sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(source_path) for name in names)
+        results = {}
+
+        started = time.monotonic()
+        _zip_directory(source_path, os.path.join(temp_dir, 'baseline.zip'))
+        results['zip_deflate'] = (time.monotonic() - started, os.path.getsize(os.path.join(temp_dir, 'baseline.zip')))
+
+        archive = os.path.join(temp_dir, 'package' + archive_suffix())
+        started = time.monotonic()
+        index = package_directory(source_path, archive)
+        results['tar_zst' if ZSTD_AVAILABLE else 'tar'] = (time.monotonic() - started, index['bytes_out'])
+
+        started = time.monotonic()
+        index = package_directory(source_path, archive, skip_stored=True)
+        results['tar_zst_skip_media' if ZSTD_AVAILABLE else 'tar_skip_media'] = (time.monotonic() - started, index['bytes_out'])
+
+        print(f"{source_path}: {bytes_in / 1024 ** 2:.1f} MB")
+        for name, (seconds, size) in results.items():
+            print(f"  {name:20} {seconds:8.2f}s {bytes_in / 1024 ** 2 / max(seconds, 1e-9):9.1f} MB/s  "
+                  f"{size / 1024 ** 2:9.1f} MB ({size / max(bytes_in, 1):.2%})")
+
+        if index['files']:
+            largest = max(index['files'], key=lambda name: index['files'][name]['size'])
+            started = time.monotonic()
+            read_file(archive, largest, index)
+            print(f"  random access read of {largest} ({index['files'][largest]['size'] / 1024 ** 2:.1f} MB): "
+                  f"{time.monotonic() - started:.3f}s")
+        return results
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def main():
+    '''Command line interface, see --help'''
+    parser = argparse.ArgumentParser(description='DMF test folder packaging')
+    parser.add_argument('source_path', help='Folder to package (or to benchmark)')
+    parser.add_argument('--output', help='Archive path, defaults to <source_path>.tar.zst')
+    parser.add_argument('--level', type=int, default=PACKAGE_ZSTD_LEVEL)
+    parser.add_argument('--skip-media', action='store_true', help='Leave already compressed media out of the archive')
+    parser.add_argument('--benchmark', action='store_true', help='Compare against zip (deflate) instead of packaging')
+    parser.add_argument('--extract', metavar='RELATIVE_PATH', help='Extract one file of the archive source_path into the working directory')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.source_path)
+    elif args.extract:
+        print(extract_file(args.source_path, args.extract, os.path.basename(args.extract)))
+    else:
+        index = package_directory(args.source_path, args.output, level=args.level, skip_stored=args.skip_media)
+        print(json.dumps({key: value for key, value in index.items() if key not in ('files', 'frames')}, indent=2))
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.packaging_util <test folder> [--benchmark | --skip-media | --extract <archive> ...]
+    main()
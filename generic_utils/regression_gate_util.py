@@ -0,0 +1,208 @@
+'''This module compares test metrics of the running suite against the results history and flags performance regressions'''
+
+# Standard library imports
+import math
+import fnmatch
+
+# Local imports
+from fwk.shared.constants import (
+    PERF_REGRESSION_VERDICT,
+    PERF_REGRESSION_DEFAULTS,
+    PERF_HIGHER_IS_BETTER_PATTERNS,
+)
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.results_history_util import ResultsHistoryDB, flatten_metrics
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# Scale factor making MAD a consistent estimator of the standard deviation for normal data
+MAD_SCALE = 1.4826
+
+
+def median(values):
+    ordered = sorted(values)
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+def mad(values):
+    '''Median absolute deviation'''
+    center = median(values)
+    return median([abs(value - center) for value in values])
+
+
+def mann_whitney_u(baseline, current):
+    '''One-sided Mann-Whitney U test that current is stochastically greater than baseline.
+    Normal approximation with tie correction, adequate for the small samples we get from repeats.
+
+    Returns:
+        tuple: (U statistic of current, p value, rank-biserial effect size in [-1, 1])
+    '''
+    n1, n2 = len(current), len(baseline)
+    combined = sorted([(value, 0) for value in current] + [(value, 1) for value in baseline])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    index = 0
+    while index < len(combined):
+        end = index
+        while end + 1 < len(combined) and combined[end + 1][0] == combined[index][0]:
+            end += 1
+        average_rank = (index + end) / 2 + 1
+        for position in range(index, end + 1):
+            ranks[position] = average_rank
+        tied = end - index + 1
+        tie_term += tied ** 3 - tied
+        index = end + 1
+
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u_current = rank_sum - n1 * (n1 + 1) / 2
+    effect = 2 * u_current / (n1 * n2) - 1
+
+    total = n1 + n2
+    variance = n1 * n2 / 12 * ((total + 1) - tie_term / (total * (total - 1)))
+    if variance <= 0:
+        return u_current, 1.0, effect
+    # continuity correction
+    z = (u_current - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    p_value = 0.5 * math.erfc(z / math.sqrt(2))
+    return u_current, p_value, effect
+
+
+class RegressionGate:
+    '''Evaluates every metric of every test against a rolling baseline of comparable runs'''
+
+    def __init__(self, history):
+        '''
+        Args:
+            history (ResultsHistoryDB): Open history database
+        '''
+        self.history = history
+        system = varc.header_dict.get('System Details') or {}
+        self.platform = system.get('Platform')
+        self.gpu_name = system.get('GPU Name')
+
+    @staticmethod
+    def test_settings(test_dict):
+        '''Defaults from constants, overridden by the optional [<TYPE>.<test>.perf_regression] table in the TOML'''
+        settings = dict(PERF_REGRESSION_DEFAULTS)
+        settings.update(test_dict.get('perf_regression') or {})
+        return settings
+
+    @staticmethod
+    def higher_is_better(metric):
+        return any(fnmatch.fnmatch(metric.lower(), pattern) for pattern in PERF_HIGHER_IS_BETTER_PATTERNS)
+
+    def _baseline(self, test_name, metric, runs):
+        rows = self.history.metric_series(
+            test_name, metric, last=runs, platform=self.platform, gpu_name=self.gpu_name, exclude_suite=varc.test_suite_name
+        )
+        # throttled runs are not comparable and would widen the baseline
+        return [row['value'] for row in rows if row['value'] is not None and not str(row['validity'] or '').startswith('THROTTLED')]
+
+    def evaluate_metric(self, test_name, metric, samples, settings):
+        '''Compare one metric against its baseline
+
+        Args:
+            test_name (str): Test name
+            metric (str): Metric name
+            samples (list): Values measured in this run (several when the test was repeated)
+            settings (dict): Gate settings of the test
+
+        Returns:
+            dict: Evaluation result, or None if there is not enough history
+        '''
+        baseline = self._baseline(test_name, metric, settings['baseline_runs'])
+        if len(baseline) < settings['min_baseline_runs']:
+            return None
+
+        # orient every metric so that larger means worse
+        sign = -1 if self.higher_is_better(metric) else 1
+        oriented_baseline = [sign * value for value in baseline]
+        oriented_samples = [sign * value for value in samples]
+
+        baseline_median = median(baseline)
+        current_median = median(samples)
+        change_pct = 100 * (current_median - baseline_median) / abs(baseline_median) if baseline_median else 0.0
+        worse_pct = sign * change_pct
+        spread = MAD_SCALE * mad(oriented_baseline)
+        shift = median(oriented_samples) - median(oriented_baseline)
+        if spread:
+            robust_z = shift / spread
+        else:
+            # a perfectly flat baseline makes any worsening infinitely unlikely
+            robust_z = math.inf if shift > 0 else 0.0
+
+        result = {
+            'metric': metric,
+            'baseline-median': round(baseline_median, 4),
+            'baseline-runs': len(baseline),
+            'current': round(current_median, 4),
+            'change-pct': round(change_pct, 2),
+            'robust-z': round(robust_z, 2) if math.isfinite(robust_z) else 'inf',
+        }
+
+        if len(samples) >= settings['min_samples_for_test']:
+            _, p_value, effect = mann_whitney_u(oriented_baseline, oriented_samples)
+            result.update({'test': 'mann-whitney', 'p-value': round(p_value, 5), 'effect-size': round(effect, 3)})
+            significant = p_value < settings['alpha']
+        else:
+            result.update({'test': 'median-mad', 'effect-size': result['robust-z']})
+            significant = robust_z > settings['z_threshold']
+
+        result['regression'] = significant and worse_pct > settings['threshold_pct']
+        return result
+
+    def evaluate_test(self, test_dict):
+        '''Evaluate all gated metrics of a test
+
+        Returns:
+            list: Evaluation results of metrics flagged as regressions
+        '''
+        settings = self.test_settings(test_dict)
+        if not settings.get('enabled', True):
+            return []
+        metrics = flatten_metrics(test_dict)
+        repeated = test_dict.get('metric_samples') or {}
+        regressions = []
+        for metric, (value, validity) in metrics.items():
+            if not any(fnmatch.fnmatch(metric, pattern) for pattern in settings['metrics']):
+                continue
+            if str(validity or '').startswith('THROTTLED'):
+                logger.info(f"[{test_dict['name']}] {metric} measured while throttled, skipping regression check")
+                continue
+            samples = repeated.get(metric) or [value]
+            result = self.evaluate_metric(test_dict['name'], metric, samples, settings)
+            if result:
+                logger.debug(f"[{test_dict['name']}] regression check {result}")
+                if result['regression']:
+                    regressions.append(result)
+        return regressions
+
+
+def perf_regression_gate():
+    '''Run the regression gate over all tests of the suite (called in testsuite_post_step).
+    Tests with regressions get a PERF_REGRESSION verdict and the evaluation in their report entry.'''
+    if not varc.results_history_db_path:
+        return
+
+    from generic_utils.result_store_util import ResultStore
+
+    store = ResultStore(varc.test_suite_path)
+    with ResultsHistoryDB(varc.results_history_db_path) as history:
+        gate = RegressionGate(history)
+        for test_dict in varc.tests_list:
+            regressions = gate.evaluate_test(test_dict)
+            if not regressions:
+                continue
+
+            summary = ", ".join(f"{item['metric']} {item['change-pct']:+.1f}% (effect {item['effect-size']})" for item in regressions)
+            logger.warning(f"[{test_dict['name']}] {PERF_REGRESSION_VERDICT}: {summary}")
+            test_dict['subtest_dict']['perf-regression'] = summary
+            update = {'perf_regression': regressions, 'subtest_dict': test_dict['subtest_dict']}
+            if test_dict['verdicts'].get('final-verdict') == 'PASS':
+                test_dict['verdicts']['final-verdict'] = PERF_REGRESSION_VERDICT
+                update['final_verdict'] = PERF_REGRESSION_VERDICT
+            store.append_update(test_dict['updated_name'], update, f"{test_dict['updated_name']} - {PERF_REGRESSION_VERDICT}: {summary}\n\n")
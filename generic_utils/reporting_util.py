@@ -7,6 +7,9 @@ from tabulate import tabulate
 # Local imports
 from fwk.shared.variables_util import varc
 from fwk.fwk_logger.fwk_logging import get_logger
+from fwk.fwk_profiler.fwk_profiling import profile_span
+from generic_utils.result_store_util import ResultStore
+from generic_utils.junit_report_util import JUnitReporter
 
 logger = get_logger(__name__, varc.framework_logs_path)
 
@@ -14,6 +17,7 @@ class ReportingMethods():
     '''This class consist of all report file builder methods'''
     
     @staticmethod
+    @profile_span()
     def report_creator():
         '''This function is used to create report files of different formats'''
         
@@ -25,10 +29,16 @@ class ReportingMethods():
         # Create report.json
         with open(f"{varc.test_suite_path}/report.json", "w", encoding='utf-8') as json_file:
             json.dump(varc.header_dict, json_file, indent=4)
+
+        # Test results are appended here and materialised into report.json / report.txt at suite end
+        ResultStore(varc.test_suite_path).create(varc.header_dict)
+        JUnitReporter.start(varc.test_suite_path)
         
     @staticmethod
+    @profile_span()
     def report_updater(test_dict):
-        '''This function is used to update report files
+        '''This function is used to record a finished test in the result store and print its tables.
+        report.json / report.txt are built from the store by materialize_reports.
         Args:
             test_dict (dict): Test dictionary containing test information
         '''
@@ -78,16 +88,6 @@ class ReportingMethods():
             "result_logs_analysis": test_dict.get('result_logs_analysis', {}),
         }
 
-        #updation of report.json
-        with open(f"{varc.test_suite_path}/report.json", "r", encoding='utf-8') as json_file:
-            data = json.load(json_file)
-            if "test" not in data:
-                data['test']={}
-            test_key = test_name
-            data['test'][test_key]=report_data
-        with open(f"{varc.test_suite_path}/report.json", "w", encoding='utf-8') as json_file:
-            json.dump(data, json_file, indent=4)
-        
         # Convert the dictionary to a list of lists
         value_table = []
         headers_list = list(test_dict['verdicts'].keys())
@@ -118,37 +118,50 @@ class ReportingMethods():
             print('\n',analysis_table)
             logger.debug(analysis_table)
         
-        # Write all results to report.txt
-        with open(f"{varc.test_suite_path}/report.txt", "a", encoding='utf-8') as file:
-            # Write main test results
-            file.write(f"{process_table}\n\n")
-
-            # Write detailed analysis logs
-            detailed_logs = test_dict.get('detailed_analysis', {})
-            if detailed_logs.get('logs'):
-                file.write("Lines in which logs issues occurred:\n\n")
-                file.write("\n".join(detailed_logs['logs']) + "\n\n")
-
-            # Write pytest logs for UI tests
-            if detailed_logs.get('pytest_logs'):
-                file.write("Lines in which pytest logs issues occurred:\n\n")
-                file.write("\n".join(detailed_logs['pytest_logs']) + "\n\n")
-
-            # Write ATF warnings
-            if test_dict.get('dmf_warnings'):
-                file.write("Warnings encountered while running DMF:\n\n")
-                file.write("\n".join(test_dict['dmf_warnings']) + "\n\n")
-                            
-            # Write subtest results
-            if(test_dict['subtest_dict']):
-                file.write(f"{analysis_table}\n\n")
-        
-        # Very important to clear report_data as it may cause conflicts with next test execution
-        report_data.clear()
+        # Build the report.txt block of this test
+        text_lines = [f"{process_table}\n\n"]
+
+        # Write detailed analysis logs
+        detailed_logs = test_dict.get('detailed_analysis', {})
+        if detailed_logs.get('logs'):
+            text_lines.append("Lines in which logs issues occurred:\n\n")
+            text_lines.append("\n".join(detailed_logs['logs']) + "\n\n")
+
+        # Write pytest logs for UI tests
+        if detailed_logs.get('pytest_logs'):
+            text_lines.append("Lines in which pytest logs issues occurred:\n\n")
+            text_lines.append("\n".join(detailed_logs['pytest_logs']) + "\n\n")
+
+        # Write ATF warnings
+        if test_dict.get('dmf_warnings'):
+            text_lines.append("Warnings encountered while running DMF:\n\n")
+            text_lines.append("\n".join(test_dict['dmf_warnings']) + "\n\n")
+                        
+        # Write subtest results
+        if(test_dict['subtest_dict']):
+            text_lines.append(f"{analysis_table}\n\n")
+
+        # One atomic append per test, independent of how many tests ran before
+        ResultStore(varc.test_suite_path).append_test(test_name, report_data, "".join(text_lines))
+        try:
+            JUnitReporter.add_test(test_dict, report_data)
+        except Exception as e:
+            logger.warning(f"JUnit report update failed for {test_name}: {e}")
          
+    @staticmethod
+    @profile_span()
+    def materialize_reports():
+        '''This function is used to build report.json and report.txt from the result store'''
+
+        test_count = ResultStore(varc.test_suite_path).materialize()
+        logger.debug(f"Materialised report.json and report.txt with {test_count} tests")
+
+    @profile_span()
     def txt_report_printer():
         '''This function is used to print report.txt file at end of testsuite run'''
 
+        ReportingMethods.materialize_reports()
+
         # Print sharepoint verdict
         with open(f"{varc.test_suite_path}/report.txt", "a", encoding='utf-8') as file:
             if varc.share_point_verdict:
@@ -159,6 +172,7 @@ class ReportingMethods():
             file_content = file.read()
         logger.info(file_content)
         
+    @profile_span()
     def slack_txt_report_printer():
         '''This function is used to append results to slack report.txt file at end of testsuite run'''
         
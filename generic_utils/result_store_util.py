@@ -0,0 +1,192 @@
+'''This module keeps test results in an append-only JSON Lines file; report.json and report.txt are views built from it'''
+
+# Standard library imports
+import os
+import sys
+import json
+import time
+import tempfile
+
+# Local imports
+from fwk.shared.constants import RESULT_STORE_FILE_NAME
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+
+class ResultStore:
+    '''Append-only result store. Every finished test is one fsync'ed line, so reporting cost per test
+    does not grow with suite size and a crash can at most lose the line being written.'''
+
+    def __init__(self, suite_path):
+        '''
+        Args:
+            suite_path (str): Test suite output directory
+        '''
+        self.suite_path = suite_path
+        self.path = os.path.join(suite_path, RESULT_STORE_FILE_NAME)
+
+    def _append(self, record):
+        line = json.dumps(record, default=str) + "\n"
+        with open(self.path, "a", encoding='utf-8') as store_file:
+            store_file.write(line)
+            store_file.flush()
+            os.fsync(store_file.fileno())
+
+    def create(self, header):
+        '''Start a new store with the suite header as first record
+
+        Args:
+            header (dict): Suite header (varc.header_dict)
+        '''
+        with open(self.path, "w", encoding='utf-8') as store_file:
+            store_file.write(json.dumps({'type': 'header', 'data': header}, default=str) + "\n")
+            store_file.flush()
+            os.fsync(store_file.fileno())
+
+    def append_test(self, name, report_data, text):
+        '''Append one finished test
+
+        Args:
+            name (str): Test key in report.json
+            report_data (dict): report.json entry of the test
+            text (str): Rendered report.txt block of the test
+        '''
+        self._append({'type': 'test', 'name': name, 'data': report_data, 'text': text})
+
+    def append_update(self, name, fields, text=""):
+        '''Append a later change to an already stored test (e.g. a verdict set by a suite-level gate)
+
+        Args:
+            name (str): Test key in report.json
+            fields (dict): report.json fields to overwrite
+            text (str): Text appended to report.txt
+        '''
+        self._append({'type': 'update', 'name': name, 'data': fields, 'text': text})
+
+    def records(self):
+        '''Yield stored records; a truncated last line (crash while writing) is skipped'''
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding='utf-8') as store_file:
+            for line_number, line in enumerate(store_file, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping unreadable record at line {line_number} of {self.path}")
+
+    def materialize(self, json_path=None, txt_path=None):
+        '''Build report.json and report.txt from the store. Files are replaced atomically.
+
+        Args:
+            json_path (str): Output report.json path, defaults to the suite directory
+            txt_path (str): Output report.txt path, defaults to the suite directory
+
+        Returns:
+            int: Number of tests in report.json
+        '''
+        json_path = json_path or os.path.join(self.suite_path, "report.json")
+        txt_path = txt_path or os.path.join(self.suite_path, "report.txt")
+
+        header = {}
+        tests = {}
+        text_blocks = []
+        for record in self.records():
+            if record.get('type') == 'header':
+                header = record.get('data') or {}
+            elif record.get('type') == 'test':
+                # retries report the same test again; the last attempt wins in report.json, report.txt keeps all
+                tests[record['name']] = record['data']
+                text_blocks.append(record.get('text', ''))
+            elif record.get('type') == 'update':
+                tests.setdefault(record['name'], {}).update(record['data'])
+                text_blocks.append(record.get('text', ''))
+
+        report = dict(header)
+        report['test'] = tests
+        _atomic_write(json_path, json.dumps(report, indent=4, default=str))
+        _atomic_write(txt_path, json.dumps(header, indent=4, default=str) + '\n\n' + ''.join(text_blocks))
+        return len(tests)
+
+
+def _atomic_write(path, content):
+    '''Write content to a temporary file next to path and move it into place'''
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "w", encoding='utf-8') as temp_file:
+            temp_file.write(content)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def benchmark(count=5000, legacy_count=300):
+    '''Compare per-test reporting cost of the append-only store with the legacy whole-file rewrite
+
+    Args:
+        count (int): Synthetic results appended to the store
+        legacy_count (int): Results written with the legacy approach (quadratic, kept small)
+    '''
+    report_data = {
+        "logs_errors": "NA", "process_specific_errors": "NA", "final_verdict": "PASS",
+        "launch_time": "12.34s", "execution_time": "456.78s",
+        "subtest_dict": {"perf-test": {"vram-peak-usage-gb": {"GPU 0": 12}}},
+        "commands_executed": ["kit.exe --no-window", "pytest -s test_map2sim.py"] * 5,
+        "execution_metrics": {"launch_time": 12.34, "total_execution_time": 456.78},
+    }
+    text = "| test | PASS | NA | 12.34s | 456.78s |\n" * 8
+
+    def first_last_mean(timings):
+        window = max(len(timings) // 10, 1)
+        first = sum(timings[:window]) / window * 1000
+        last = sum(timings[-window:]) / window * 1000
+        return first, last
+
+    with tempfile.TemporaryDirectory() as suite_path:
+        store = ResultStore(suite_path)
+        store.create({"Build": "benchmark"})
+        timings = []
+        for index in range(count):
+            start = time.perf_counter()
+            store.append_test(f"test_{index}", report_data, text)
+            timings.append(time.perf_counter() - start)
+        first, last = first_last_mean(timings)
+        print(f"append-only store: {count} results, first 10% {first:.3f} ms/test, last 10% {last:.3f} ms/test")
+
+        start = time.perf_counter()
+        store.materialize()
+        print(f"materialize report.json/report.txt once: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        legacy_path = os.path.join(suite_path, "legacy_report.json")
+        with open(legacy_path, "w", encoding='utf-8') as json_file:
+            json.dump({"Build": "benchmark"}, json_file)
+        timings = []
+        for index in range(legacy_count):
+            start = time.perf_counter()
+            with open(legacy_path, "r", encoding='utf-8') as json_file:
+                data = json.load(json_file)
+            data.setdefault('test', {})[f"test_{index}"] = report_data
+            with open(legacy_path, "w", encoding='utf-8') as json_file:
+                json.dump(data, json_file, indent=4)
+            timings.append(time.perf_counter() - start)
+        first, last = first_last_mean(timings)
+        print(f"legacy rewrite: {legacy_count} results, first 10% {first:.3f} ms/test, last 10% {last:.3f} ms/test")
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.result_store_util <suite output dir>   -> rebuild report.json / report.txt
+    # python -m generic_utils.result_store_util --benchmark [count]
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark(int(sys.argv[2]) if len(sys.argv) > 2 else 5000)
+    elif len(sys.argv) > 1:
+        print(f"{ResultStore(sys.argv[1]).materialize()} tests written to report.json")
+    else:
+        print(__doc__)
@@ -0,0 +1,253 @@
+'''This module ingests suite results into a local SQLite history database and answers trend queries on it'''
+
+# Standard library imports
+import os
+import json
+import sqlite3
+import argparse
+
+# Local imports
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    suite_name TEXT NOT NULL UNIQUE,
+    toml_file TEXT,
+    component TEXT,
+    build TEXT,
+    started_at TEXT,
+    platform TEXT,
+    gpu_name TEXT,
+    driver_version TEXT,
+    header_json TEXT
+);
+CREATE TABLE IF NOT EXISTS tests (
+    test_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    verdict TEXT,
+    report_json TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    test_id INTEGER NOT NULL REFERENCES tests(test_id) ON DELETE CASCADE,
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    test_name TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    value REAL,
+    validity TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_started ON runs(started_at);
+CREATE INDEX IF NOT EXISTS idx_runs_build ON runs(build);
+CREATE INDEX IF NOT EXISTS idx_tests_name_run ON tests(name, run_id);
+CREATE INDEX IF NOT EXISTS idx_metrics_series ON metrics(test_name, metric, run_id);
+'''
+
+
+def flatten_metrics(report_data):
+    '''Collect numeric metrics of one report.json test entry
+
+    execution_metrics are taken as-is; numbers nested under subtest_dict (perf-test etc.)
+    are flattened into dotted names, e.g. "perf-test.disk-io.total-write-mb".
+
+    Returns:
+        dict: metric name -> (value, validity)
+    '''
+    execution_metrics = report_data.get('execution_metrics') or {}
+    validity = execution_metrics.get('performance_validity') or {}
+    metrics = {}
+    for name, value in execution_metrics.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[name] = (float(value), validity.get(name))
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, item in value.items():
+                walk(f"{prefix}.{key}", item)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[prefix] = (float(value), None)
+
+    for key, value in (report_data.get('subtest_dict') or {}).items():
+        walk(key, value)
+    return metrics
+
+
+class ResultsHistoryDB:
+    '''Local SQLite database of suite runs, tests and metrics'''
+
+    def __init__(self, db_path):
+        '''
+        Args:
+            db_path (str): Database file, created on first use
+        '''
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path, timeout=30)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def ingest_suite(self, suite_path):
+        '''Load a suite's report.json into the database; ingesting the same suite again replaces it
+
+        Args:
+            suite_path (str): Suite output directory containing report.json
+
+        Returns:
+            int: Number of tests ingested
+        '''
+        with open(os.path.join(suite_path, "report.json"), "r", encoding='utf-8') as json_file:
+            report = json.load(json_file)
+        tests = report.pop('test', {})
+        header = report
+        system = header.get('System Details') or {}
+        suite_name = header.get('Testsuite Name') or os.path.basename(os.path.normpath(suite_path))
+
+        with self.connection:
+            self.connection.execute("DELETE FROM runs WHERE suite_name = ?", (suite_name,))
+            run_id = self.connection.execute(
+                '''INSERT INTO runs (suite_name, toml_file, component, build, started_at, platform, gpu_name,
+                   driver_version, header_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+                (suite_name, header.get('TOML File'), header.get('Component'), header.get('Build'),
+                 header.get('Timestamp'), system.get('Platform'), system.get('GPU Name'),
+                 system.get('Driver Version'), json.dumps(header, default=str)),
+            ).lastrowid
+            for test_key, report_data in tests.items():
+                test_id = self.connection.execute(
+                    "INSERT INTO tests (run_id, name, verdict, report_json) VALUES (?, ?, ?, ?)",
+                    (run_id, report_data.get('name') or test_key, report_data.get('final_verdict'),
+                     json.dumps(report_data, default=str)),
+                ).lastrowid
+                self.connection.executemany(
+                    "INSERT INTO metrics (test_id, run_id, test_name, metric, value, validity) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(test_id, run_id, report_data.get('name') or test_key, metric, value, validity)
+                     for metric, (value, validity) in flatten_metrics(report_data).items()],
+                )
+        logger.info(f"Ingested {len(tests)} tests of {suite_name} into {self.db_path}")
+        return len(tests)
+
+    def metric_series(self, test_name, metric, last=60, build=None, platform=None, gpu_name=None, exclude_suite=None):
+        '''Time series of one metric of one test, oldest first
+
+        Args:
+            test_name (str): Test name as in the TOML
+            metric (str): Metric name, e.g. launch_time
+            last (int): Number of most recent runs to return
+            build (str): Optional build name filter (SQL LIKE pattern)
+            platform (str): Optional platform filter
+            gpu_name (str): Optional GPU name filter
+            exclude_suite (str): Optional suite name to leave out (e.g. the running suite)
+
+        Returns:
+            list: dicts with suite_name, started_at, build, platform, gpu_name, verdict, value, validity
+        '''
+        query = '''SELECT r.suite_name, r.started_at, r.build, r.platform, r.gpu_name, t.verdict, m.value, m.validity
+                   FROM metrics m JOIN runs r ON r.run_id = m.run_id JOIN tests t ON t.test_id = m.test_id
+                   WHERE m.test_name = ? AND m.metric = ?'''
+        params = [test_name, metric]
+        if build:
+            query += " AND r.build LIKE ?"
+            params.append(build)
+        if platform:
+            query += " AND r.platform = ?"
+            params.append(platform)
+        if gpu_name:
+            query += " AND r.gpu_name = ?"
+            params.append(gpu_name)
+        if exclude_suite:
+            query += " AND r.suite_name != ?"
+            params.append(exclude_suite)
+        query += " ORDER BY r.started_at DESC, r.run_id DESC LIMIT ?"
+        params.append(last)
+        rows = [dict(row) for row in self.connection.execute(query, params)]
+        return list(reversed(rows))
+
+    def verdict_series(self, test_name, last=60, exclude_suite=None):
+        '''Verdict of one test over the most recent runs, oldest first (iterations of a run are separate rows)'''
+        rows = self.connection.execute(
+            '''SELECT r.suite_name, r.started_at, r.build, t.verdict FROM tests t JOIN runs r ON r.run_id = t.run_id
+               WHERE t.name = ? AND r.suite_name != ? ORDER BY r.started_at DESC, r.run_id DESC, t.test_id DESC LIMIT ?''',
+            (test_name, exclude_suite or "", last),
+        )
+        return list(reversed([dict(row) for row in rows]))
+
+    def runs(self, last=20):
+        '''Most recent runs with their test counts, newest first'''
+        rows = self.connection.execute(
+            '''SELECT r.run_id, r.suite_name, r.started_at, r.build, r.platform, COUNT(t.test_id) AS tests
+               FROM runs r LEFT JOIN tests t ON t.run_id = r.run_id
+               GROUP BY r.run_id ORDER BY r.started_at DESC, r.run_id DESC LIMIT ?''',
+            (last,),
+        )
+        return [dict(row) for row in rows]
+
+    def test_names(self):
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT name FROM tests ORDER BY name")]
+
+    def metric_names(self, test_name):
+        return [row[0] for row in self.connection.execute(
+            "SELECT DISTINCT metric FROM metrics WHERE test_name = ? ORDER BY metric", (test_name,)
+        )]
+
+
+def ingest_current_suite():
+    '''Ingest the running suite at suite end (no-op when history is disabled in dmf_config.toml)'''
+    if not varc.results_history_db_path:
+        return
+    with ResultsHistoryDB(varc.results_history_db_path) as history:
+        history.ingest_suite(varc.test_suite_path)
+
+
+def main():
+    '''Command line interface, see --help'''
+    from tabulate import tabulate
+
+    parser = argparse.ArgumentParser(description='DMF results history')
+    parser.add_argument('--db', required=True, help='History database path')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    ingest = subparsers.add_parser('ingest', help='Ingest one or more suite output directories')
+    ingest.add_argument('suite_paths', nargs='+')
+    series = subparsers.add_parser('series', help='Time series of one metric of one test')
+    series.add_argument('test_name')
+    series.add_argument('metric')
+    series.add_argument('--last', type=int, default=60)
+    series.add_argument('--build', help='SQL LIKE pattern on build name')
+    series.add_argument('--platform')
+    series.add_argument('--json', action='store_true', help='Print json instead of a table')
+    runs = subparsers.add_parser('runs', help='Most recent runs')
+    runs.add_argument('--last', type=int, default=20)
+    subparsers.add_parser('tests', help='Known test names')
+    metrics = subparsers.add_parser('metrics', help='Known metrics of a test')
+    metrics.add_argument('test_name')
+    args = parser.parse_args()
+
+    with ResultsHistoryDB(args.db) as history:
+        if args.command == 'ingest':
+            for suite_path in args.suite_paths:
+                print(f"{suite_path}: {history.ingest_suite(suite_path)} tests")
+        elif args.command == 'series':
+            rows = history.metric_series(args.test_name, args.metric, args.last, args.build, args.platform)
+            print(json.dumps(rows, indent=4) if args.json else tabulate(rows, headers="keys", tablefmt="presto"))
+        elif args.command == 'runs':
+            print(tabulate(history.runs(args.last), headers="keys", tablefmt="presto"))
+        elif args.command == 'tests':
+            print("\n".join(history.test_names()))
+        elif args.command == 'metrics':
+            print("\n".join(history.metric_names(args.test_name)))
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.results_history_util --db Outputs/dmf_results_history.db series test_map_preprocessing launch_time
+    main()
@@ -0,0 +1,395 @@
+'''This module keeps the Outputs directory within bounds. At suite start the finished runs (<toml>_<timestamp> folders
+and their .tar.zst packages) are scanned, incrementally: sizes and verdicts are cached in Outputs/dmf_retention_index.json
+and only runs that changed since the last scan are walked again. The [retention] policy of dmf_config.toml then decides
+per run: keep (last runs of each suite, runs with failed tests for some days, runs with pending uploads), compress into
+a package, or delete; above the size budget the oldest remaining runs go first. A dry run only reports what would be
+reclaimed.'''
+
+# Standard library imports
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+import datetime
+
+# Local imports
+from fwk.shared.constants import (
+    RETENTION_INDEX_FILE_NAME, RETENTION_DEFAULTS, RETENTION_COMPRESSION_RATIO_ESTIMATE, RESULT_STORE_FILE_NAME,
+    UPLOAD_QUEUE_DB_FILE_NAME, ARTIFACT_STORE_DIR_NAME
+)
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.result_store_util import _atomic_write
+from generic_utils.artifact_store_util import remove_read_only
+from generic_utils.run_summary_util import directory_size
+from generic_utils.packaging_util import ZSTD_AVAILABLE, index_path, package_directory, read_file
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# <toml name>_<YYYY-mm-dd_HH-MM-SS> as created by main_runner, optionally packaged
+RUN_NAME_PATTERN = re.compile(r'^(?P<suite>.+)_(?P<started>\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2})(?P<archive>\.tar(\.zst)?)?$')
+RUN_TIME_FORMAT = "%Y-%m-%d_%H-%M-%S"
+# Artifact store blobs linked by no run any more are removed once they are this old (a blob is linked right after it is added)
+ORPHAN_BLOB_MIN_AGE = 3600
+GB = 1024 ** 3
+DAY = 24 * 3600
+
+
+def settings():
+    '''Defaults from constants, overridden by the [retention] section of dmf_config.toml'''
+    settings = dict(RETENTION_DEFAULTS)
+    settings.update(varc.retention_config or {})
+    return settings
+
+
+def _has_failures(lines):
+    '''True when a test of the run did not pass, or no test finished at all (the run crashed or stopped early)'''
+    verdicts = {}
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        data = record.get('data') or {}
+        if record.get('type') == 'test':
+            verdicts[record.get('name')] = data.get('final_verdict')
+        elif record.get('type') == 'update' and 'final_verdict' in data:
+            verdicts[record.get('name')] = data['final_verdict']
+    return not verdicts or any(verdict != 'PASS' for verdict in verdicts.values())
+
+
+def _signature(entry):
+    '''Changes when a run changes: size and mtime of a package; for a folder the entry count and newest mtime of
+    its first two levels, so files added to the logs and plots folders of a test are noticed'''
+    stat_result = entry.stat()
+    if entry.is_file():
+        return [stat_result.st_size, stat_result.st_mtime_ns]
+    newest = stat_result.st_mtime_ns
+    count = 0
+    try:
+        with os.scandir(entry.path) as children:
+            for child in children:
+                count += 1
+                newest = max(newest, child.stat(follow_symlinks=False).st_mtime_ns)
+                if not child.is_dir(follow_symlinks=False):
+                    continue
+                with os.scandir(child.path) as grandchildren:
+                    for grandchild in grandchildren:
+                        count += 1
+                        newest = max(newest, grandchild.stat(follow_symlinks=False).st_mtime_ns)
+    except OSError:
+        pass
+    return [count, newest]
+
+
+def _measure(path, archived):
+    '''Size, file count and failure state of a run folder or package'''
+    if archived:
+        size = os.path.getsize(path) + (os.path.getsize(index_path(path)) if os.path.exists(index_path(path)) else 0)
+        try:
+            lines = read_file(path, RESULT_STORE_FILE_NAME).decode('utf-8', errors='replace').splitlines()
+        except Exception:
+            lines = []
+        return {'size': size, 'files': 1, 'failed': _has_failures(lines)}
+    size, files = directory_size(path)
+    try:
+        with open(os.path.join(path, RESULT_STORE_FILE_NAME), 'r', encoding='utf-8', errors='replace') as store_file:
+            failed = _has_failures(store_file)
+    except OSError:
+        failed = True
+    return {'size': size, 'files': files, 'failed': failed}
+
+
+def load_index(outputs_path):
+    try:
+        with open(os.path.join(outputs_path, RETENTION_INDEX_FILE_NAME), 'r', encoding='utf-8') as index_file:
+            return json.load(index_file).get('runs', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_index(outputs_path, runs):
+    _atomic_write(os.path.join(outputs_path, RETENTION_INDEX_FILE_NAME), json.dumps({'version': 1, 'runs': runs}))
+
+
+def scan_outputs(outputs_path, exclude=()):
+    '''Runs in the Outputs directory, measured incrementally through the size index
+
+    Args:
+        outputs_path (str): Outputs directory
+        exclude (list): Run names that are not scanned (the running suite)
+
+    Returns:
+        tuple: (runs newest first, each a dict with name, suite, path, archived, started, size, files, failed;
+                scan statistics)
+    '''
+    started = time.monotonic()
+    cached_index = load_index(outputs_path)
+    index = {}
+    runs = []
+    rescanned = 0
+    with os.scandir(outputs_path) as entries:
+        for entry in entries:
+            match = RUN_NAME_PATTERN.match(entry.name)
+            if not match or entry.name in exclude:
+                continue
+            archived = bool(match.group('archive'))
+            if archived != entry.is_file():
+                continue
+            try:
+                signature = _signature(entry)
+                info = cached_index.get(entry.name)
+                if not info or info.get('signature') != signature:
+                    info = dict(cached_index.get(entry.name) or {}, signature=signature, **_measure(entry.path, archived))
+                    rescanned += 1
+            except OSError as e:
+                logger.warning(f"Retention: cannot measure {entry.path}: {e}")
+                continue
+            index[entry.name] = info
+            runs.append(dict(info, name=entry.name, suite=match.group('suite'), path=entry.path, archived=archived,
+                             started=datetime.datetime.strptime(match.group('started'), RUN_TIME_FORMAT).timestamp()))
+    save_index(outputs_path, index)
+    runs.sort(key=lambda run: run['started'], reverse=True)
+    return runs, {'runs': len(runs), 'rescanned': rescanned, 'cached': len(runs) - rescanned,
+                  'seconds': round(time.monotonic() - started, 3)}
+
+
+def _compression_ratio(runs):
+    '''Package size / folder size of the runs compressed so far, the estimate before the first one'''
+    packed = [run for run in runs if run['archived'] and run.get('source_bytes')]
+    source = sum(run['source_bytes'] for run in packed)
+    return sum(run['size'] for run in packed) / source if source else RETENTION_COMPRESSION_RATIO_ESTIMATE
+
+
+def plan_retention(runs, policy, protected=None, now=None):
+    '''Decide what happens to every run
+
+    Args:
+        runs (list): Runs from scan_outputs, newest first
+        policy (dict): Retention settings (RETENTION_DEFAULTS keys)
+        protected (dict): Run name -> reason for runs that must stay as they are (e.g. pending uploads)
+        now (float): Epoch seconds, defaults to the current time
+
+    Returns:
+        list: One dict per run: name, path, action ('keep', 'compress' or 'delete'), reason, size, reclaim (bytes)
+    '''
+    now = now or time.time()
+    protected = dict(protected or {})
+    ratio = _compression_ratio(runs)
+    # the newest run of a suite may still be running in another DMF instance, so at least that one is kept
+    keep_last = max(1, int(policy['keep_last_runs']))
+    seen = {}
+    for run in runs:
+        seen[run['suite']] = seen.get(run['suite'], 0) + 1
+        if seen[run['suite']] <= keep_last:
+            protected.setdefault(run['name'], f"last {keep_last} runs")
+
+    plan = []
+    for run in runs:
+        age_days = (now - run['started']) / DAY
+        decision = {'name': run['name'], 'path': run['path'], 'archived': run['archived'], 'size': run['size'],
+                    'age_days': round(age_days, 1), 'failed': run['failed'], 'action': 'keep', 'reason': '', 'reclaim': 0,
+                    'hard': run['name'] in protected, 'keep_failed': False}
+        if decision['hard']:
+            decision['reason'] = protected[run['name']]
+        elif run['failed'] and age_days < policy['keep_failed_days']:
+            decision.update(reason=f"failed tests, younger than {policy['keep_failed_days']} days", keep_failed=True)
+        elif policy['delete_after_days'] and age_days >= policy['delete_after_days']:
+            decision.update(action='delete', reason=f"older than {policy['delete_after_days']} days", reclaim=run['size'])
+        elif policy['compress_after_days'] and age_days >= policy['compress_after_days'] and not run['archived']:
+            if ZSTD_AVAILABLE:
+                decision.update(action='compress', reason=f"older than {policy['compress_after_days']} days",
+                                reclaim=int(run['size'] * (1 - ratio)))
+            else:
+                decision['reason'] = "compression due, zstandard is not installed"
+        plan.append(decision)
+
+    # size budget: oldest runs first, runs still inside keep_failed_days only after all others
+    budget = policy['max_total_gb'] * GB
+    remaining = sum(decision['size'] - decision['reclaim'] for decision in plan)
+    if budget and remaining > budget:
+        candidates = [decision for decision in plan if decision['action'] != 'delete' and not decision['hard']]
+        candidates.sort(key=lambda decision: (decision['keep_failed'], -decision['age_days']))
+        for decision in candidates:
+            if remaining <= budget:
+                break
+            remaining -= decision['size'] - decision['reclaim']
+            decision.update(action='delete', reason=f"over the {policy['max_total_gb']} GB budget", reclaim=decision['size'])
+        if remaining > budget:
+            logger.warning(f"Retention: protected runs alone take {remaining / GB:.1f} GB, more than the "
+                           f"{policy['max_total_gb']} GB budget")
+    return plan
+
+
+def _delete_run(decision):
+    if decision['archived']:
+        for path in (decision['path'], index_path(decision['path'])):
+            if os.path.exists(path):
+                os.remove(path)
+    else:
+        # files linked to artifact store blobs are read-only
+        shutil.rmtree(decision['path'], onerror=remove_read_only)
+
+
+def apply_plan(plan, outputs_path):
+    '''Compress and delete runs as planned; the size index is updated for packaged runs
+
+    Returns:
+        int: Bytes reclaimed
+    '''
+    index = load_index(outputs_path)
+    reclaimed = 0
+    for decision in plan:
+        try:
+            if decision['action'] == 'delete':
+                _delete_run(decision)
+                index.pop(decision['name'], None)
+                reclaimed += decision['size']
+            elif decision['action'] == 'compress':
+                package = package_directory(decision['path'])
+                archive_path = os.path.join(os.path.dirname(decision['path']), package['archive'])
+                shutil.rmtree(decision['path'], onerror=remove_read_only)
+                info = index.pop(decision['name'], {})
+                size = package['bytes_out'] + os.path.getsize(index_path(archive_path))
+                with os.scandir(outputs_path) as entries:
+                    entry = next(entry for entry in entries if entry.name == package['archive'])
+                    index[package['archive']] = {'signature': _signature(entry), 'size': size, 'files': 1,
+                                                 'failed': info.get('failed', False), 'source_bytes': decision['size']}
+                reclaimed += decision['size'] - size
+        except Exception as e:
+            logger.warning(f"Retention: could not {decision['action']} {decision['path']}: {e}")
+    save_index(outputs_path, index)
+    return reclaimed
+
+
+def orphaned_blobs(store_path, remove=False):
+    '''Artifact store blobs no run links to any more (hardlink count 1); deleted runs free their space only with them
+
+    Returns:
+        tuple: (blob count, bytes)
+    '''
+    count = 0
+    total = 0
+    cutoff = time.time() - ORPHAN_BLOB_MIN_AGE
+    for root, _, names in os.walk(os.path.join(store_path, 'objects')):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat_result = os.stat(path)
+                if stat_result.st_nlink != 1 or stat_result.st_mtime > cutoff:
+                    continue
+                if remove:
+                    try:
+                        os.remove(path)
+                    except PermissionError:
+                        remove_read_only(os.remove, path)
+            except OSError:
+                continue
+            count += 1
+            total += stat_result.st_size
+    return count, total
+
+
+def _pending_upload_suites(outputs_path):
+    db_path = os.path.join(outputs_path, UPLOAD_QUEUE_DB_FILE_NAME)
+    if not os.path.exists(db_path):
+        return set()
+    try:
+        from generic_utils.upload_queue_util import UploadQueueDB
+        with UploadQueueDB(db_path) as db:
+            return {os.path.basename(os.path.normpath(path)) for path in db.pending_suites()}
+    except Exception as e:
+        logger.warning(f"Retention: cannot read pending uploads from {db_path}, keeping every run: {e}")
+        return None
+
+
+def format_report(plan, scan_stats, policy, dry_run, orphans=(0, 0)):
+    '''Text report of a plan, one line per run that is compressed or deleted'''
+    total = sum(decision['size'] for decision in plan)
+    reclaim = sum(decision['reclaim'] for decision in plan)
+    lines = [f"Retention{' (dry run)' if dry_run else ''}: {scan_stats['runs']} runs, {total / GB:.2f} GB "
+             f"({scan_stats['cached']} from the size index, {scan_stats['rescanned']} scanned in {scan_stats['seconds']}s)"]
+    for decision in plan:
+        if decision['action'] != 'keep':
+            lines.append(f"  {decision['action']:8} {decision['name']:60} {decision['size'] / GB:8.2f} GB  "
+                         f"{decision['age_days']:6.1f} days  {decision['reason']} (reclaims {decision['reclaim'] / GB:.2f} GB)")
+    kept = {}
+    for decision in plan:
+        if decision['action'] == 'keep' and decision['reason']:
+            kept[decision['reason']] = kept.get(decision['reason'], 0) + 1
+    if kept:
+        lines.append("  kept: " + ", ".join(f"{count} ({reason})" for reason, count in sorted(kept.items())))
+    budget = f" of the {policy['max_total_gb']} GB budget" if policy['max_total_gb'] else ""
+    lines.append(f"{'Would reclaim' if dry_run else 'Reclaimed'} {reclaim / GB:.2f} GB"
+                 f" + {orphans[1] / GB:.2f} GB in {orphans[0]} orphaned artifact store blobs, "
+                 f"{(total - reclaim) / GB:.2f} GB left{budget}")
+    return "\n".join(lines)
+
+
+def run_retention(outputs_path=None, policy=None, dry_run=None, store_path=None):
+    '''Scan, plan and (unless dry run) apply the retention policy; called at suite start
+
+    Args:
+        outputs_path (str): Defaults to the folder of the running suite
+        policy (dict): Defaults to settings()
+        dry_run (bool): Defaults to the policy's dry_run
+        store_path (str): Artifact store whose orphaned blobs are removed, defaults to varc.artifact_store_path
+
+    Returns:
+        tuple: (plan, see plan_retention; report text), (None, None) when retention is disabled
+    '''
+    policy = policy or settings()
+    if not policy['enabled']:
+        return None, None
+    dry_run = policy['dry_run'] if dry_run is None else dry_run
+    outputs_path = outputs_path or os.path.dirname(varc.test_suite_path)
+    store_path = store_path if store_path is not None else varc.artifact_store_path
+    current = [os.path.basename(varc.test_suite_path)] if varc.test_suite_path else []
+
+    pending = _pending_upload_suites(outputs_path)
+    runs, scan_stats = scan_outputs(outputs_path, exclude=current)
+    if pending is None:
+        protected = {run['name']: "upload queue unreadable" for run in runs}
+    else:
+        protected = {run['name']: "pending uploads" for run in runs if run['name'] in pending}
+    plan = plan_retention(runs, policy, protected)
+
+    if not dry_run:
+        apply_plan(plan, outputs_path)
+    orphans = orphaned_blobs(store_path, remove=not dry_run) if store_path and os.path.isdir(store_path) else (0, 0)
+    report = format_report(plan, scan_stats, policy, dry_run, orphans)
+    logger.info(report)
+    return plan, report
+
+
+def main():
+    '''Command line interface, see --help'''
+    parser = argparse.ArgumentParser(description='DMF Outputs retention (dry run unless --apply)')
+    parser.add_argument('--outputs', required=True, help='Outputs directory')
+    parser.add_argument('--apply', action='store_true', help='Compress and delete runs instead of only reporting')
+    parser.add_argument('--config', help='dmf_config.toml whose [retention] section is used instead of the defaults')
+    for key, value in RETENTION_DEFAULTS.items():
+        if key not in ('enabled', 'dry_run'):
+            parser.add_argument(f"--{key.replace('_', '-')}", type=type(value))
+    args = parser.parse_args()
+
+    policy = dict(RETENTION_DEFAULTS)
+    if args.config:
+        try:
+            import tomllib  # type: ignore
+        except ModuleNotFoundError:
+            import tomli as tomllib
+        with open(args.config, 'rb') as config_file:
+            policy.update(tomllib.load(config_file).get('retention', {}))
+    policy.update({key: getattr(args, key) for key in RETENTION_DEFAULTS if getattr(args, key, None) is not None})
+    policy['enabled'] = True
+    _, report = run_retention(args.outputs, policy, dry_run=not args.apply,
+                              store_path=os.path.join(args.outputs, ARTIFACT_STORE_DIR_NAME))
+    print(report)
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.retention_util --outputs Outputs [--apply] [--config dmf_config.toml] [--max-total-gb 500]
+    main()
@@ -0,0 +1,168 @@
+'''This module compares two suite runs from their run summaries: verdict changes, metrics moving beyond noise,
+new and vanished P0/P1 log signatures, Kit extension startup deltas and artifact size changes'''
+
+# Standard library imports
+import sys
+import json
+import argparse
+
+# Local imports
+from fwk.shared.constants import RUN_DIFF_DEFAULTS
+from generic_utils.run_summary_util import load_run_summary
+
+
+def relative_change(before, after):
+    if before == 0:
+        return float('inf') if after else 0.0
+    return 100 * (after - before) / abs(before)
+
+
+def metric_changes(tests_a, tests_b, threshold_pct, min_abs):
+    '''Metrics of tests present in both runs that moved more than threshold_pct and min_abs.
+    Throttled measurements are reported but marked, they are not comparable.'''
+    changes = []
+    for test_key in sorted(set(tests_a) & set(tests_b)):
+        metrics_a, metrics_b = tests_a[test_key]['metrics'], tests_b[test_key]['metrics']
+        for metric in sorted(set(metrics_a) & set(metrics_b)):
+            before, after = metrics_a[metric], metrics_b[metric]
+            change = relative_change(before, after)
+            if abs(change) < threshold_pct or abs(after - before) < min_abs:
+                continue
+            throttled = any(
+                str(tests[test_key].get('validity', {}).get(metric, '')).startswith('THROTTLED') for tests in (tests_a, tests_b)
+            )
+            changes.append({
+                'test': test_key, 'metric': metric, 'a': round(before, 4), 'b': round(after, 4),
+                'change-pct': round(change, 1) if change != float('inf') else 'new', 'throttled': throttled,
+            })
+    return changes
+
+
+def signature_changes(tests_a, tests_b):
+    '''P0/P1 log signatures that appear only in run B (new) or only in run A (vanished)'''
+    new, vanished = [], []
+    for test_key in sorted(set(tests_a) | set(tests_b)):
+        signatures_a = (tests_a.get(test_key) or {}).get('log_signatures', {})
+        signatures_b = (tests_b.get(test_key) or {}).get('log_signatures', {})
+        for signature in signatures_b.keys() - signatures_a.keys():
+            new.append(dict(signatures_b[signature], test=test_key, signature=signature))
+        for signature in signatures_a.keys() - signatures_b.keys():
+            vanished.append(dict(signatures_a[signature], test=test_key, signature=signature))
+    # P0 first
+    new.sort(key=lambda item: (item['severity'], item['test']))
+    vanished.sort(key=lambda item: (item['severity'], item['test']))
+    return new, vanished
+
+
+def extension_startup_changes(tests_a, tests_b, min_delta_ms):
+    '''Extensions whose startup time changed by at least min_delta_ms, plus extensions loaded in only one run'''
+    changes = []
+    for test_key in sorted(set(tests_a) & set(tests_b)):
+        startup_a = tests_a[test_key].get('extension_startup', {})
+        startup_b = tests_b[test_key].get('extension_startup', {})
+        for extension in sorted(set(startup_a) | set(startup_b)):
+            before = startup_a.get(extension, {}).get('startup_ms')
+            after = startup_b.get(extension, {}).get('startup_ms')
+            if before is None or after is None:
+                changes.append({'test': test_key, 'extension': extension, 'a-ms': before, 'b-ms': after,
+                                'delta-ms': 'only in B' if before is None else 'only in A'})
+            elif abs(after - before) >= min_delta_ms:
+                changes.append({'test': test_key, 'extension': extension, 'a-ms': before, 'b-ms': after, 'delta-ms': after - before})
+    return changes
+
+
+def artifact_changes(tests_a, tests_b, threshold_pct, min_bytes):
+    '''Artifact folders whose size changed by more than threshold_pct and min_bytes'''
+    changes = []
+    for test_key in sorted(set(tests_a) & set(tests_b)):
+        artifacts_a = tests_a[test_key].get('artifacts', {})
+        artifacts_b = tests_b[test_key].get('artifacts', {})
+        for folder in sorted(set(artifacts_a) | set(artifacts_b)):
+            before = artifacts_a.get(folder, {}).get('bytes', 0)
+            after = artifacts_b.get(folder, {}).get('bytes', 0)
+            if abs(after - before) < min_bytes or abs(relative_change(before, after)) < threshold_pct:
+                continue
+            changes.append({
+                'test': test_key, 'artifact': folder, 'a-mb': round(before / 1024 ** 2, 2), 'b-mb': round(after / 1024 ** 2, 2),
+                'change-pct': round(relative_change(before, after), 1) if before else 'new',
+            })
+    return changes
+
+
+def diff_runs(summary_a, summary_b, settings=None):
+    '''Compare two run summaries
+
+    Args:
+        summary_a (dict): Summary of the reference run
+        summary_b (dict): Summary of the run under investigation
+        settings (dict): Thresholds, defaults from RUN_DIFF_DEFAULTS
+
+    Returns:
+        dict: Sections of the diff
+    '''
+    settings = dict(RUN_DIFF_DEFAULTS, **(settings or {}))
+    tests_a, tests_b = summary_a['tests'], summary_b['tests']
+
+    verdicts = [
+        {'test': test_key, 'a': (tests_a.get(test_key) or {}).get('verdict', 'missing'),
+         'b': (tests_b.get(test_key) or {}).get('verdict', 'missing'),
+         'reason-b': (tests_b.get(test_key) or {}).get('reason')}
+        for test_key in sorted(set(tests_a) | set(tests_b))
+        if (tests_a.get(test_key) or {}).get('verdict') != (tests_b.get(test_key) or {}).get('verdict')
+    ]
+    new_signatures, vanished_signatures = signature_changes(tests_a, tests_b)
+    return {
+        'run-a': summary_a['header'].get('Testsuite Name') or summary_a.get('suite_path'),
+        'run-b': summary_b['header'].get('Testsuite Name') or summary_b.get('suite_path'),
+        'build-a': summary_a['header'].get('Build'),
+        'build-b': summary_b['header'].get('Build'),
+        'verdict-changes': verdicts,
+        'metric-changes': metric_changes(tests_a, tests_b, settings['metric_threshold_pct'], settings['metric_min_abs']),
+        'new-log-signatures': new_signatures,
+        'vanished-log-signatures': vanished_signatures,
+        'extension-startup-changes': extension_startup_changes(tests_a, tests_b, settings['extension_min_delta_ms']),
+        'artifact-changes': artifact_changes(tests_a, tests_b, settings['artifact_threshold_pct'], settings['artifact_min_bytes']),
+    }
+
+
+def format_diff(diff):
+    '''Render a diff as text tables'''
+    from tabulate import tabulate
+
+    lines = [f"A: {diff['run-a']} (build {diff['build-a']})", f"B: {diff['run-b']} (build {diff['build-b']})", ""]
+    for section in ('verdict-changes', 'metric-changes', 'new-log-signatures', 'vanished-log-signatures',
+                    'extension-startup-changes', 'artifact-changes'):
+        rows = diff[section]
+        lines.append(f"{section.replace('-', ' ').capitalize()}: {len(rows)}")
+        if rows:
+            lines.append(tabulate(rows, headers="keys", tablefmt="presto", maxcolwidths=80))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    '''dmf-diff <runA> <runB>: compare two suite output directories'''
+    parser = argparse.ArgumentParser(prog='dmf-diff', description='Compare two DMF suite runs (A = reference, B = new)')
+    parser.add_argument('run_a', help='Reference suite output directory')
+    parser.add_argument('run_b', help='Suite output directory to compare')
+    parser.add_argument('--metric-threshold-pct', type=float, default=RUN_DIFF_DEFAULTS['metric_threshold_pct'])
+    parser.add_argument('--extension-min-delta-ms', type=int, default=RUN_DIFF_DEFAULTS['extension_min_delta_ms'])
+    parser.add_argument('--artifact-threshold-pct', type=float, default=RUN_DIFF_DEFAULTS['artifact_threshold_pct'])
+    parser.add_argument('--json', action='store_true', help='Print json instead of tables')
+    args = parser.parse_args(argv)
+
+    settings = {
+        'metric_threshold_pct': args.metric_threshold_pct,
+        'extension_min_delta_ms': args.extension_min_delta_ms,
+        'artifact_threshold_pct': args.artifact_threshold_pct,
+    }
+    diff = diff_runs(load_run_summary(args.run_a), load_run_summary(args.run_b), settings)
+    print(json.dumps(diff, indent=2, default=str) if args.json else format_diff(diff))
+    # non-zero exit when B got worse, so CI can use the command as a check
+    worse = any(item['b'] not in ('PASS', 'SKIPPED') and item['a'] == 'PASS' for item in diff['verdict-changes'])
+    return 1 if worse or diff['new-log-signatures'] else 0
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.run_diff_util Outputs/<suite A> Outputs/<suite B>
+    sys.exit(main())
@@ -0,0 +1,190 @@
+'''This module condenses a finished suite into run_summary.json: verdicts, metrics, normalized P0/P1 log
+signatures, Kit extension startup times and artifact sizes per test. Run diffs work on these summaries
+instead of the raw logs, so comparing two suites takes seconds regardless of log volume.'''
+
+# Standard library imports
+import os
+import re
+import json
+import hashlib
+from collections import Counter
+
+# Local imports
+from fwk.shared.constants import RUN_SUMMARY_FILE_NAME, RUN_SUMMARY_VERSION, KIT_LOG_COPY_FILE_NAME
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.result_store_util import _atomic_write
+from generic_utils.results_history_util import flatten_metrics
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# Variable parts of log lines replaced so the same issue gets the same signature in every run
+SIGNATURE_SUBSTITUTIONS = [
+    (re.compile(r'^.*?issue found here\s*:?\s*', re.IGNORECASE), ''),
+    (re.compile(r'\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?'), '<ts>'),
+    (re.compile(r'\[[\d,]+ms\]'), '[<ms>]'),
+    (re.compile(r'(?:[A-Za-z]:)?(?:[\\/][\w.\- ]+){2,}'), '<path>'),
+    (re.compile(r'0x[0-9a-fA-F]+'), '<hex>'),
+    (re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'), '<uuid>'),
+    (re.compile(r'\d+(?:\.\d+)?'), '<n>'),
+    (re.compile(r'\s+'), ' '),
+]
+
+# Kit log line of an extension startup, e.g. "... [12,345ms] [Info] [omni.ext.plugin] [ext: omni.kit.window.file-1.3.54] startup"
+EXTENSION_STARTUP_PATTERN = re.compile(r'\[([\d,]+)ms\].*\[ext: ([^\]]+?)(?:-\d[\w.+\-]*)?\] startup')
+
+
+def severity_of(reason):
+    '''Severity prefix of a logs analysis reason line (p0 / p1 / other)'''
+    text = str(reason).strip().lower()
+    if text.startswith('pytest '):
+        text = text[len('pytest '):]
+    if text.startswith('p0'):
+        return 'p0'
+    if text.startswith('p1') and not text.startswith('p1 ignored'):
+        return 'p1'
+    return 'other'
+
+
+def log_signature(reason):
+    '''Normalize a logs analysis reason line into (signature id, severity, normalized text)'''
+    text = str(reason).strip()
+    for pattern, replacement in SIGNATURE_SUBSTITUTIONS:
+        text = pattern.sub(replacement, text)
+    text = text.strip()
+    severity = severity_of(reason)
+    signature = hashlib.sha1(f"{severity}|{text}".encode('utf-8')).hexdigest()[:12]
+    return signature, severity, text
+
+
+def log_signatures(reasons):
+    '''Signatures of all reason lines with their hit counts
+
+    Returns:
+        dict: signature id -> {'severity', 'text', 'count'}
+    '''
+    counts = Counter()
+    details = {}
+    for reason in reasons or []:
+        if not str(reason).strip() or severity_of(reason) == 'other':
+            continue
+        signature, severity, text = log_signature(reason)
+        counts[signature] += 1
+        details[signature] = {'severity': severity, 'text': text}
+    return {signature: dict(details[signature], count=count) for signature, count in counts.items()}
+
+
+def extension_startup_times(kit_log_path):
+    '''Startup time of every Kit extension from a Kit log, measured as the gap to the previous extension startup
+
+    Returns:
+        dict: extension name -> {'at_ms': ms since Kit start, 'startup_ms': gap to previous startup}
+    '''
+    times = {}
+    if not os.path.exists(kit_log_path):
+        return times
+    previous = None
+    with open(kit_log_path, 'r', encoding='utf-8', errors='ignore') as log_file:
+        for line in log_file:
+            # cheap substring check first, the regex only runs on candidate lines
+            if '[ext: ' not in line or 'startup' not in line:
+                continue
+            match = EXTENSION_STARTUP_PATTERN.search(line)
+            if not match:
+                continue
+            at_ms = int(match.group(1).replace(',', ''))
+            times[match.group(2)] = {'at_ms': at_ms, 'startup_ms': at_ms - previous if previous is not None else at_ms}
+            previous = at_ms
+    return times
+
+
+def directory_size(path):
+    '''Total size in bytes and file count of a directory tree (metadata only, file contents are not read)'''
+    total = 0
+    files = 0
+    stack = [path]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    total += entry.stat(follow_symlinks=False).st_size
+                    files += 1
+            except OSError:
+                continue
+    return total, files
+
+
+def artifact_sizes(test_path):
+    '''Size of every top-level artifact folder of a test (logs, videos, raw_data, ...)
+
+    Returns:
+        dict: folder name -> {'bytes', 'files'}
+    '''
+    sizes = {}
+    if not os.path.isdir(test_path):
+        return sizes
+    for entry in os.scandir(test_path):
+        if entry.is_dir(follow_symlinks=False):
+            size, files = directory_size(entry.path)
+        elif entry.is_file(follow_symlinks=False):
+            size, files = entry.stat().st_size, 1
+        else:
+            continue
+        sizes[entry.name] = {'bytes': size, 'files': files}
+    return sizes
+
+
+def build_run_summary(suite_path, write=True):
+    '''Build the summary of a suite from its report.json and test folders
+
+    Args:
+        suite_path (str): Suite output directory
+        write (bool): Save the summary as run_summary.json in the suite directory
+
+    Returns:
+        dict: Run summary
+    '''
+    with open(os.path.join(suite_path, "report.json"), "r", encoding='utf-8') as json_file:
+        report = json.load(json_file)
+    tests = report.pop('test', {})
+
+    summary = {'version': RUN_SUMMARY_VERSION, 'suite_path': os.path.abspath(suite_path), 'header': report, 'tests': {}}
+    for test_key, report_data in tests.items():
+        test_path = os.path.join(suite_path, test_key)
+        if not os.path.isdir(test_path):
+            # the last iteration of an iterated test keeps the plain test name as folder name
+            test_path = os.path.join(suite_path, report_data.get('name') or test_key)
+        reasons = (report_data.get('detailed_analysis_logs') or []) + (report_data.get('detailed_analysis_pytest_logs') or [])
+        summary['tests'][test_key] = {
+            'name': report_data.get('name') or test_key,
+            'verdict': report_data.get('final_verdict'),
+            'reason': report_data.get('process_specific_errors') if report_data.get('process_specific_errors') not in (None, 'NA')
+                      else report_data.get('logs_errors'),
+            'metrics': {name: value for name, (value, _) in flatten_metrics(report_data).items()},
+            'validity': (report_data.get('execution_metrics') or {}).get('performance_validity') or {},
+            'log_signatures': log_signatures(reasons),
+            'extension_startup': extension_startup_times(os.path.join(test_path, 'logs', KIT_LOG_COPY_FILE_NAME)),
+            'artifacts': artifact_sizes(test_path),
+        }
+
+    if write:
+        _atomic_write(os.path.join(suite_path, RUN_SUMMARY_FILE_NAME), json.dumps(summary, indent=2, default=str))
+    return summary
+
+
+def load_run_summary(suite_path):
+    '''Load run_summary.json of a suite, building (and saving) it first for suites that predate summaries'''
+    summary_path = os.path.join(suite_path, RUN_SUMMARY_FILE_NAME)
+    if os.path.exists(summary_path):
+        with open(summary_path, "r", encoding='utf-8') as json_file:
+            summary = json.load(json_file)
+        if summary.get('version') == RUN_SUMMARY_VERSION:
+            return summary
+    logger.info(f"No current {RUN_SUMMARY_FILE_NAME} in {suite_path}, building it")
+    return build_run_summary(suite_path)
@@ -0,0 +1,246 @@
+'''This module exposes live suite progress as JSON over a local HTTP endpoint: queue state, current test,
+elapsed time, an ETA from historical test durations, the latest telemetry samples and recent P0/P1 hits'''
+
+# Standard library imports
+import sys
+import json
+import time
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local imports
+from fwk.shared.constants import STATUS_RECENT_HITS
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+
+class RunStatus:
+    '''Progress of the running suite. Runners and recorders push small updates under a lock;
+    the status server only reads snapshots, so the runner never waits on HTTP clients.'''
+
+    _lock = threading.Lock()
+    _suite_started = None
+    _queue = []
+    _current = None
+    _finished = []
+    _expected = {}
+    _telemetry = {}
+    _hits = deque(maxlen=STATUS_RECENT_HITS)
+
+    @classmethod
+    def start_suite(cls, test_names, expected_durations=None):
+        '''Reset the state for a new suite
+
+        Args:
+            test_names (list): Test names in execution order
+            expected_durations (dict): test name -> expected seconds (e.g. from the results history)
+        '''
+        with cls._lock:
+            cls._suite_started = time.time()
+            cls._queue = list(test_names)
+            cls._current = None
+            cls._finished = []
+            cls._expected = dict(expected_durations or {})
+            cls._telemetry = {}
+            cls._hits.clear()
+
+    @classmethod
+    def set_queue(cls, test_names):
+        '''Replace the pending queue (iterations and retries change it while the suite runs)'''
+        with cls._lock:
+            cls._queue = list(test_names)
+
+    @classmethod
+    def test_started(cls, test_dict, attempt=1):
+        '''Mark a test as running (the runner sets the remaining queue with set_queue)'''
+        with cls._lock:
+            # a retried test is running again, not finished
+            cls._finished = [item for item in cls._finished if item['run_name'] != test_dict.get('updated_name', test_dict['name'])]
+            cls._current = {
+                'name': test_dict['name'],
+                'run_name': test_dict.get('updated_name', test_dict['name']),
+                'type': test_dict.get('type'),
+                'attempt': attempt,
+                'started_at': time.time(),
+            }
+
+    @classmethod
+    def test_finished(cls, test_dict, verdict):
+        '''Record the verdict of an attempt; a later attempt of the same test run replaces it'''
+        run_name = test_dict.get('updated_name', test_dict['name'])
+        with cls._lock:
+            started_at = cls._current['started_at'] if cls._current else time.time()
+            attempt = cls._current['attempt'] if cls._current else 1
+            cls._finished = [item for item in cls._finished if item['run_name'] != run_name]
+            cls._finished.append({
+                'name': test_dict['name'],
+                'run_name': run_name,
+                'attempt': attempt,
+                'verdict': verdict,
+                'duration_s': round(time.time() - started_at, 1),
+            })
+            cls._current = None
+
+    @classmethod
+    def telemetry(cls, source, sample):
+        '''Keep the latest sample of a telemetry source (vram, process memory, io, gpu throttle)'''
+        cls._telemetry[source] = {'t': time.time(), 'sample': sample}
+
+    @classmethod
+    def severity_hit(cls, test_name, severity, message):
+        '''Record a P0/P1 hit of the logs analysis'''
+        with cls._lock:
+            cls._hits.append({'t': time.time(), 'test': test_name, 'severity': severity, 'message': message})
+
+    @classmethod
+    def _expected_duration(cls, name, fallback):
+        return cls._expected.get(name, fallback)
+
+    @classmethod
+    def snapshot(cls):
+        '''Return the current status as a json-friendly dict'''
+        now = time.time()
+        with cls._lock:
+            queue = list(cls._queue)
+            current = dict(cls._current) if cls._current else None
+            finished = list(cls._finished)
+            telemetry = dict(cls._telemetry)
+            hits = list(cls._hits)
+            started = cls._suite_started
+
+        # tests without history are expected to take as long as the average finished test of this suite
+        average = sum(item['duration_s'] for item in finished) / len(finished) if finished else None
+        eta = None
+        unknown = 0
+        remaining = 0.0
+        for name in queue:
+            expected = cls._expected_duration(name, average)
+            if expected is None:
+                unknown += 1
+            else:
+                remaining += expected
+        if current:
+            current['elapsed_s'] = round(now - current['started_at'], 1)
+            expected = cls._expected_duration(current['name'], average)
+            current['expected_s'] = round(expected, 1) if expected is not None else None
+            if expected is not None:
+                remaining += max(expected - current['elapsed_s'], 0.0)
+            else:
+                unknown += 1
+        if unknown == 0:
+            eta = {'remaining_s': round(remaining, 1), 'finish_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now + remaining))}
+
+        return {
+            'suite': varc.test_suite_name,
+            'component': getattr(varc, 'component', None),
+            'elapsed_s': round(now - started, 1) if started else None,
+            'tests': {'finished': len(finished), 'running': 1 if current else 0, 'queued': len(queue)},
+            'current': current,
+            'queue': queue,
+            'finished': finished,
+            'eta': eta,
+            'eta_unknown_tests': unknown,
+            'telemetry': telemetry,
+            'recent_hits': hits,
+        }
+
+
+def expected_durations_from_history(test_names, runs=10):
+    '''Median total_execution_time of the last runs of every test (empty when history is disabled)'''
+    if not varc.results_history_db_path:
+        return {}
+    from generic_utils.results_history_util import ResultsHistoryDB
+    from generic_utils.regression_gate_util import median
+
+    expected = {}
+    with ResultsHistoryDB(varc.results_history_db_path) as history:
+        for name in set(test_names):
+            values = [row['value'] for row in history.metric_series(name, 'total_execution_time', last=runs) if row['value']]
+            if values:
+                expected[name] = median(values)
+    return expected
+
+
+class _StatusRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        if path in ('/', '/status'):
+            body = json.dumps(RunStatus.snapshot(), default=str).encode('utf-8')
+            content_type = 'application/json'
+        elif path == '/metrics':
+            from generic_utils.metrics_registry_util import MetricsRegistry
+            body = MetricsRegistry.render().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"status server: {format % args}")
+
+
+class StatusServer:
+    '''Serves RunStatus snapshots on http://127.0.0.1:<port>/status and Prometheus metrics on /metrics from a daemon thread'''
+
+    _server = None
+    _thread = None
+
+    @staticmethod
+    def start(port, host='127.0.0.1'):
+        '''Start serving; port 0 picks a free port
+
+        Returns:
+            int: Port the server listens on
+        '''
+        StatusServer._server = ThreadingHTTPServer((host, port), _StatusRequestHandler)
+        StatusServer._server.daemon_threads = True
+        StatusServer._thread = threading.Thread(target=StatusServer._server.serve_forever, name='dmf-status-server', daemon=True)
+        StatusServer._thread.start()
+        port = StatusServer._server.server_address[1]
+        logger.info(f"Status server running on http://{host}:{port}/status")
+        return port
+
+    @staticmethod
+    def stop():
+        if StatusServer._server is None:
+            return
+        StatusServer._server.shutdown()
+        StatusServer._server.server_close()
+        StatusServer._server = None
+
+
+def demo(port=0, tests=4, duration=2.0):
+    '''Drive the status server with a fake runner (no Kit, works on Linux) and print the snapshots'''
+    from urllib.request import urlopen
+
+    names = [f"fake_test_{index}" for index in range(tests)]
+    RunStatus.start_suite(names, {name: duration for name in names[:2]})
+    port = StatusServer.start(port)
+    try:
+        for name in names:
+            test_dict = {'name': name, 'type': 'FAKE'}
+            RunStatus.test_started(test_dict)
+            RunStatus.set_queue(names[names.index(name) + 1:])
+            RunStatus.telemetry('process-memory-gb', round(2 + len(RunStatus._finished) * 0.1, 2))
+            time.sleep(duration / 2)
+            print(urlopen(f"http://127.0.0.1:{port}/status").read().decode())
+            RunStatus.test_finished(test_dict, 'PASS')
+    finally:
+        StatusServer.stop()
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.status_server_util --demo
+    if len(sys.argv) > 1 and sys.argv[1] == '--demo':
+        demo()
+    else:
+        print(__doc__)
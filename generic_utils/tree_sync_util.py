@@ -0,0 +1,286 @@
+'''This module mirrors a folder into another one incrementally. Files whose size and mtime (optionally hash) match
+are left alone; new or changed files are hardlinked when both folders are on one volume, reflinked where the file
+system supports it and copied otherwise (holes of sparse files are kept). Files are placed by a thread pool through
+a temporary name, so an interrupted sync never leaves half-written files behind.'''
+
+# Standard library imports
+import os
+import sys
+import time
+import errno
+import shutil
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Optional imports, reflinks use the Linux FICLONE ioctl
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# Local imports
+from fwk.shared.constants import TREE_SYNC_WORKERS
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.artifact_store_util import file_digest
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+# _IOW(0x94, 9, int) from linux/fs.h
+FICLONE = 0x40049409
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+TEMP_SUFFIX = '.dmf_sync'
+
+
+def _reflink(source, destination):
+    if not FCNTL_AVAILABLE or not sys.platform.startswith('linux'):
+        raise OSError(errno.EOPNOTSUPP, "reflinks are not supported on this platform")
+    with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+        fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+    shutil.copystat(source, destination)
+
+
+def _copy(source, destination):
+    '''Copy a file with its metadata; only the data segments of sparse files are copied, holes stay holes'''
+    stat_result = os.stat(source)
+    sparse = hasattr(os, 'SEEK_DATA') and hasattr(stat_result, 'st_blocks') and stat_result.st_blocks * 512 < stat_result.st_size
+    if not sparse:
+        shutil.copy2(source, destination)
+        return
+    with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+        source_fd = source_file.fileno()
+        offset = 0
+        while offset < stat_result.st_size:
+            try:
+                data_start = os.lseek(source_fd, offset, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # only a hole is left
+                    break
+                raise
+            data_end = os.lseek(source_fd, data_start, os.SEEK_HOLE)
+            source_file.seek(data_start)
+            destination_file.seek(data_start)
+            remaining = data_end - data_start
+            while remaining:
+                chunk = source_file.read(min(remaining, COPY_CHUNK_SIZE))
+                if not chunk:
+                    break
+                destination_file.write(chunk)
+                remaining -= len(chunk)
+            offset = data_end
+        destination_file.truncate(stat_result.st_size)
+    shutil.copystat(source, destination)
+
+
+class TreeSync:
+    '''Mirrors source into destination; see sync()'''
+
+    METHODS = ('link', 'reflink', 'copy')
+
+    def __init__(self, verify_hash=False, method='link', workers=TREE_SYNC_WORKERS, delete=True):
+        '''
+        Args:
+            verify_hash (bool): Also compare content hashes of files whose size and mtime match
+            method (str): Cheapest placement to try first: 'link' (hardlink, then reflink, then copy), 'reflink'
+                          (reflink, then copy; destination files stay independent of the source) or 'copy'
+            workers (int): Files placed in parallel
+            delete (bool): Remove destination files that are not in the source
+        '''
+        if method not in self.METHODS:
+            raise ValueError(f"method must be one of {self.METHODS}")
+        self.verify_hash = verify_hash
+        self.methods = self.METHODS[self.METHODS.index(method):]
+        self.workers = workers
+        self.delete = delete
+        self._lock = threading.Lock()
+
+    def _unchanged(self, source, destination, source_stat):
+        try:
+            destination_stat = os.stat(destination)
+        except FileNotFoundError:
+            return False
+        if (destination_stat.st_dev, destination_stat.st_ino) == (source_stat.st_dev, source_stat.st_ino):
+            # a hardlink of an earlier sync is replaced by an independent file when links are not allowed
+            return 'link' in self.methods
+        if (destination_stat.st_size, destination_stat.st_mtime_ns) != (source_stat.st_size, source_stat.st_mtime_ns):
+            return False
+        return not self.verify_hash or file_digest(source) == file_digest(destination)
+
+    def _place(self, source, destination, stats):
+        '''Place one file through a temporary name with the cheapest method that works'''
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        temp_path = f"{destination}.{threading.get_ident()}{TEMP_SUFFIX}"
+        size = os.path.getsize(source)
+        try:
+            for method in self.methods:
+                try:
+                    if method == 'link':
+                        os.link(source, temp_path)
+                    elif method == 'reflink':
+                        _reflink(source, temp_path)
+                    else:
+                        _copy(source, temp_path)
+                    break
+                except OSError as e:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                    if method == 'copy':
+                        raise
+                    logger.debug(f"Cannot {method} {source} ({e}), trying the next method")
+            os.replace(temp_path, destination)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        key = {'link': 'linked', 'reflink': 'reflinked', 'copy': 'copied'}[method]
+        with self._lock:
+            stats[key] += 1
+            stats[f"bytes_{key}"] += size
+
+    def sync(self, source_path, destination_path):
+        '''Mirror a folder (or a single file) into destination_path
+
+        Returns:
+            dict: Statistics (files, unchanged, linked, reflinked, copied, removed, bytes_* per placement, failed, seconds)
+        '''
+        started = time.monotonic()
+        stats = {'files': 0, 'unchanged': 0, 'linked': 0, 'reflinked': 0, 'copied': 0, 'removed': 0,
+                 'bytes_unchanged': 0, 'bytes_linked': 0, 'bytes_reflinked': 0, 'bytes_copied': 0, 'failed': []}
+
+        pairs = []
+        if os.path.isfile(source_path):
+            pairs.append((source_path, destination_path))
+        else:
+            for root, directories, names in os.walk(source_path):
+                directories.sort()
+                relative_root = os.path.relpath(root, source_path)
+                os.makedirs(os.path.normpath(os.path.join(destination_path, relative_root)), exist_ok=True)
+                for name in sorted(names):
+                    pairs.append((os.path.join(root, name), os.path.normpath(os.path.join(destination_path, relative_root, name))))
+
+        pending = []
+        for source, destination in pairs:
+            stats['files'] += 1
+            source_stat = os.stat(source)
+            if self._unchanged(source, destination, source_stat):
+                stats['unchanged'] += 1
+                stats['bytes_unchanged'] += source_stat.st_size
+            else:
+                pending.append((source, destination))
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='tree-sync') as pool:
+            futures = {pool.submit(self._place, source, destination, stats): source for source, destination in pending}
+        for future, source in futures.items():
+            if future.exception():
+                logger.warning(f"Could not sync {source}: {future.exception()}")
+                stats['failed'].append(source)
+
+        if self.delete and os.path.isdir(source_path):
+            expected = {destination for _, destination in pairs}
+            for root, directories, names in os.walk(destination_path, topdown=False):
+                for name in names:
+                    path = os.path.join(root, name)
+                    if path not in expected:
+                        os.remove(path)
+                        stats['removed'] += 1
+                for directory in directories:
+                    path = os.path.join(root, directory)
+                    if not os.path.exists(os.path.join(source_path, os.path.relpath(path, destination_path))):
+                        shutil.rmtree(path, ignore_errors=True)
+
+        stats['seconds'] = round(time.monotonic() - started, 3)
+        placed = stats['bytes_linked'] + stats['bytes_reflinked'] + stats['bytes_copied']
+        logger.info(f"Synced {source_path} -> {destination_path}: {stats['files']} files, {stats['unchanged']} unchanged, "
+                    f"{stats['linked']} linked, {stats['reflinked']} reflinked, {stats['copied']} copied "
+                    f"({stats['bytes_copied'] / 1024 ** 2:.1f} MB of {placed / 1024 ** 2:.1f} MB copied), "
+                    f"{stats['removed']} removed in {stats['seconds']}s")
+        return stats
+
+
+def sync_tree(source_path, destination_path, **kwargs):
+    '''Mirror source_path into destination_path, see TreeSync for the options'''
+    return TreeSync(**kwargs).sync(source_path, destination_path)
+
+
+def selftest(root=None):
+    '''Sync sparse and large synthetic trees with every method, change them and check the mirrors (Linux)'''
+    import filecmp
+    import tempfile
+
+    work_dir = tempfile.mkdtemp(prefix='tree_sync_selftest_', dir=root)
+    try:
+        source = os.path.join(work_dir, 'source')
+        for index in range(500):
+            path = os.path.join(source, f"tiles/{index % 10:02d}/tile_{index:04d}.bin")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as data_file:
+                data_file.write(os.urandom(1024 + index))
+        with open(os.path.join(source, 'scene.usd'), 'wb') as data_file:
+            data_file.write(os.urandom(64 * 1024 * 1024))
+        sparse_path = os.path.join(source, 'sparse.bin')
+        with open(sparse_path, 'wb') as data_file:
+            for offset in (0, 512 * 1024 * 1024, 1024 * 1024 * 1024):
+                data_file.seek(offset)
+                data_file.write(os.urandom(4096))
+            data_file.truncate(2 * 1024 * 1024 * 1024)
+
+        def same_tree(left, right):
+            comparison = filecmp.dircmp(left, right)
+            if comparison.left_only or comparison.right_only or comparison.diff_files:
+                return False
+            _, mismatch, errors = filecmp.cmpfiles(left, right, comparison.common_files, shallow=False)
+            return not mismatch and not errors and all(same_tree(os.path.join(left, name), os.path.join(right, name))
+                                                       for name in comparison.common_dirs)
+
+        for method in TreeSync.METHODS:
+            destination = os.path.join(work_dir, f"mirror_{method}")
+            first = sync_tree(source, destination, method=method)
+            assert same_tree(source, destination) and not first['failed'], f"{method}: first sync differs"
+            if method != 'link':
+                # independent copies: changing the mirror must not touch the source
+                assert os.stat(os.path.join(destination, 'scene.usd')).st_ino != os.stat(os.path.join(source, 'scene.usd')).st_ino
+            blocks = os.stat(os.path.join(destination, 'sparse.bin')).st_blocks * 512
+            assert blocks < 64 * 1024 * 1024, f"{method}: sparse file was expanded to {blocks} bytes"
+
+            second = sync_tree(source, destination, method=method, verify_hash=True)
+            assert second['unchanged'] == second['files'], f"{method}: unchanged tree was synced again"
+            print(f"{method:8} first: {first['seconds']:6.2f}s, {first['linked']} linked, {first['reflinked']} reflinked, "
+                  f"{first['copied']} copied; second: {second['seconds']:6.2f}s, all {second['unchanged']} unchanged")
+
+        # new, changed and deleted files
+        changed = os.path.join(source, 'tiles/03/tile_0003.bin')
+        os.remove(changed)
+        with open(changed, 'wb') as data_file:
+            data_file.write(b'changed')
+        with open(os.path.join(source, 'tiles/new.bin'), 'wb') as data_file:
+            data_file.write(b'new')
+        shutil.rmtree(os.path.join(source, 'tiles/09'))
+        for method in TreeSync.METHODS:
+            destination = os.path.join(work_dir, f"mirror_{method}")
+            third = sync_tree(source, destination, method=method)
+            assert same_tree(source, destination), f"{method}: incremental sync differs"
+            placed = third['linked'] + third['reflinked'] + third['copied']
+            assert placed == 2, f"{method}: {placed} files placed, expected the changed and the new one"
+            assert third['removed'] == 50, third
+        print("selftest passed")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.tree_sync_util <source> <destination> [--method link|reflink|copy] [--verify-hash]
+    # python -m generic_utils.tree_sync_util --selftest [--root <folder on the volume to test>]
+    parser = argparse.ArgumentParser(description='Incremental folder mirror with hardlinks, reflinks or copies')
+    parser.add_argument('paths', nargs='*')
+    parser.add_argument('--method', choices=TreeSync.METHODS, default='link')
+    parser.add_argument('--verify-hash', action='store_true')
+    parser.add_argument('--selftest', action='store_true')
+    parser.add_argument('--root')
+    args = parser.parse_args()
+    if args.selftest:
+        selftest(args.root)
+    elif len(args.paths) == 2:
+        print(sync_tree(args.paths[0], args.paths[1], method=args.method, verify_hash=args.verify_hash))
+    else:
+        parser.print_help()
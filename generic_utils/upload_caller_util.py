@@ -1,20 +1,30 @@
 import json
 from generic_utils.googledrive_upload_util import GoogleDriveUploadMethods
 from fwk.shared.variables_util import varc
+from fwk.fwk_profiler.fwk_profiling import profile_span
 
 class UploadMethods:
     '''This class consist of methods that help prepare for cloud drive upload activities'''
                 
     @staticmethod
-    def google_drive_upload_caller():
-        '''This function is used to call google drive upload class method'''
+    def google_drive_target():
+        '''This function returns the service account key path and the parent folder ID of google drive uploads'''
         
         #hardcoded secrets file
-        service_account_key_path=f"{varc.cwd}/dependencies/secrets/google_drive_client_secrets.json"                
-        source_path=varc.test_suite_path
+        service_account_key_path=f"{varc.cwd}/dependencies/secrets/google_drive_client_secrets.json"
         #hardcored folder ID 
         folder_id="1opQIN8Rh2OB3FV76NfBfMkw1rIS3xMJd"
-        GoogleDriveUploadMethods.google_drive_uploader(source_path,folder_id,service_account_key_path)
+        return service_account_key_path,folder_id
+
+    @staticmethod
+    @profile_span()
+    def google_drive_upload_caller():
+        '''This function is used to call google drive upload class method'''
+        
+        service_account_key_path,folder_id=UploadMethods.google_drive_target()
+        source_path=varc.test_suite_path
+        package=bool((varc.upload_queue_config or {}).get('package', False))
+        GoogleDriveUploadMethods.google_drive_uploader(source_path,folder_id,service_account_key_path,package=package)
             
     @staticmethod
     def one_drive_upload_caller():
@@ -0,0 +1,514 @@
+'''This module overlaps artifact uploads with test execution. Every finished test enqueues the files of its folder
+into a persistent queue (sqlite in the Outputs directory) and the runner moves on; background workers upload them to
+Google Drive in priority order (reports first, videos last), optionally capped to a bandwidth. Uploads a crashed or
+interrupted run left behind are replayed by the next run or by python -m generic_utils.upload_queue_util --drain.'''
+
+# Standard library imports
+import os
+import sys
+import time
+import atexit
+import fnmatch
+import sqlite3
+import argparse
+import threading
+
+# Local imports
+from fwk.shared.constants import (
+    UPLOAD_QUEUE_DB_FILE_NAME, UPLOAD_PRIORITIES, UPLOAD_DEFAULT_PRIORITY, UPLOAD_QUEUE_DEFAULTS, DRIVE_SKIP_FOLDERS
+)
+from fwk.shared.variables_util import varc
+from fwk.fwk_logger.fwk_logging import get_logger
+from generic_utils.artifact_store_util import ArtifactStore
+from generic_utils.googledrive_upload_util import DriveUploader, GoogleDriveBackend, ARTIFACT_STORE_REMOTE
+from generic_utils.packaging_util import archive_suffix, index_path, package_directory
+from generic_utils.metrics_registry_util import UPLOAD_QUEUE_PENDING, UPLOADED_BYTES_TOTAL
+from generic_utils.status_server_util import RunStatus
+
+logger = get_logger(__name__, varc.framework_logs_path)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS uploads (
+    upload_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    suite_path TEXT NOT NULL,
+    parent_id TEXT NOT NULL,
+    relative_path TEXT NOT NULL,
+    kind TEXT NOT NULL DEFAULT 'file',
+    priority INTEGER NOT NULL,
+    size INTEGER,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    enqueued_at REAL,
+    finished_at REAL,
+    UNIQUE (suite_path, parent_id, relative_path)
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_next ON uploads(state, priority, upload_id);
+'''
+
+
+def upload_priority(relative_path):
+    '''Priority of a file from UPLOAD_PRIORITIES, lower uploads first'''
+    name = relative_path.lower()
+    for pattern, priority in UPLOAD_PRIORITIES:
+        if fnmatch.fnmatch(name, pattern):
+            return priority
+    return UPLOAD_DEFAULT_PRIORITY
+
+
+class BandwidthLimiter:
+    '''Token bucket shared by all upload workers; consume() sleeps until the bytes sent fit under the cap'''
+
+    def __init__(self, bytes_per_second, burst_seconds=1.0):
+        self.rate = bytes_per_second
+        self.capacity = bytes_per_second * burst_seconds
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount):
+        '''Account for amount bytes sent
+
+        Returns:
+            float: Seconds slept
+        '''
+        if self.rate <= 0 or amount <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # the bucket goes into debt, later callers wait for it to be paid off as well
+            self._tokens -= amount
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+        return delay
+
+
+class UploadQueueDB:
+    '''Persistent upload queue; every state change is committed, so a crash loses at most the progress of the files in flight'''
+
+    def __init__(self, db_path):
+        '''
+        Args:
+            db_path (str): Database file, created on first use
+        '''
+        self.db_path = db_path
+        # shared by the runner thread and the workers, all access goes through the lock
+        self.connection = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        if 'kind' not in [row['name'] for row in self.connection.execute("PRAGMA table_info(uploads)")]:
+            # queue databases created before folders could be queued as packages
+            self.connection.execute("ALTER TABLE uploads ADD COLUMN kind TEXT NOT NULL DEFAULT 'file'")
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def recover(self):
+        '''Put uploads that were in flight when an earlier run stopped back into the queue
+
+        Returns:
+            int: Number of uploads waiting, including those of earlier runs
+        '''
+        with self._lock, self.connection:
+            self.connection.execute("UPDATE uploads SET state = 'pending' WHERE state = 'active'")
+            return self.connection.execute("SELECT COUNT(*) FROM uploads WHERE state = 'pending'").fetchone()[0]
+
+    def add(self, suite_path, parent_id, files, kind='file'):
+        '''Queue files of a suite; files already queued (in any state) are left alone
+
+        Args:
+            files (list): (path relative to the suite, size) tuples
+            kind (str): 'file', or 'package' for archives the worker packages from the folder of the same name
+
+        Returns:
+            int: Number of newly queued files
+        '''
+        now = time.time()
+        with self._lock, self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany(
+                '''INSERT OR IGNORE INTO uploads (suite_path, parent_id, relative_path, kind, priority, size, enqueued_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                [(suite_path, parent_id, relative_path, kind, upload_priority(relative_path), size, now)
+                 for relative_path, size in files],
+            )
+            return self.connection.total_changes - before
+
+    def claim(self):
+        '''Mark the next upload (lowest priority, then oldest) as active and return it, None when the queue is empty'''
+        with self._lock, self.connection:
+            row = self.connection.execute(
+                "SELECT * FROM uploads WHERE state = 'pending' ORDER BY priority, upload_id LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self.connection.execute("UPDATE uploads SET state = 'active' WHERE upload_id = ?", (row['upload_id'],))
+            return dict(row) if row else None
+
+    def finish(self, upload_id, state='done', error=None):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE uploads SET state = ?, error = ?, attempts = attempts + 1, finished_at = ? WHERE upload_id = ?",
+                (state, error, time.time(), upload_id),
+            )
+
+    def retry(self, upload_id, error):
+        with self._lock, self.connection:
+            self.connection.execute(
+                "UPDATE uploads SET state = 'pending', error = ?, attempts = attempts + 1 WHERE upload_id = ?",
+                (error, upload_id),
+            )
+
+    def packaged_folders(self, suite_path):
+        '''Folders of a suite (relative paths) that are uploaded as packages'''
+        with self._lock:
+            return [row[0].rsplit('.tar', 1)[0] for row in self.connection.execute(
+                "SELECT relative_path FROM uploads WHERE suite_path = ? AND kind = 'package'", (suite_path,))]
+
+    def counts(self, suite_path=None):
+        '''Number of uploads per state, of one suite or of the whole queue'''
+        query = "SELECT state, COUNT(*) FROM uploads"
+        params = ()
+        if suite_path:
+            query += " WHERE suite_path = ?"
+            params = (suite_path,)
+        with self._lock:
+            return dict(self.connection.execute(query + " GROUP BY state", params).fetchall())
+
+    def pending_suites(self):
+        '''Suite paths with uploads that are still waiting or in flight'''
+        with self._lock:
+            return {row[0] for row in self.connection.execute(
+                "SELECT DISTINCT suite_path FROM uploads WHERE state IN ('pending', 'active')")}
+
+    def failures(self, suite_path=None):
+        query = "SELECT suite_path, relative_path, attempts, error FROM uploads WHERE state = 'failed'"
+        params = ()
+        if suite_path:
+            query += " AND suite_path = ?"
+            params = (suite_path,)
+        with self._lock:
+            return [dict(row) for row in self.connection.execute(query, params)]
+
+
+class UploadQueue:
+    '''Background upload workers shared by the runners of this process (started in command_runner)'''
+
+    _db = None
+    _uploader = None
+    _parent_id = None
+    _settings = {}
+    _threads = []
+    _journals = {}
+    _journals_lock = threading.Lock()
+    _wakeup = threading.Condition()
+    _stopping = False
+    _active = 0
+
+    @staticmethod
+    def settings():
+        '''Defaults from constants, overridden by the [upload_queue] section of dmf_config.toml'''
+        settings = dict(UPLOAD_QUEUE_DEFAULTS)
+        settings.update(varc.upload_queue_config or {})
+        return settings
+
+    @classmethod
+    def is_running(cls):
+        return cls._db is not None
+
+    @classmethod
+    def start(cls, backend=None, parent_id=None, db_path=None, settings=None):
+        '''Open the queue, replay pending uploads and start the workers
+
+        Args:
+            backend (DriveBackend): Defaults to Google Drive with the key of UploadMethods.google_drive_target
+            parent_id (str): Drive folder the suite folders are created in (with the default backend: from google_drive_target)
+            db_path (str): Defaults to Outputs/dmf_upload_queue.db
+            settings (dict): Defaults to settings()
+
+        Returns:
+            bool: True when the workers are running
+        '''
+        settings = settings or cls.settings()
+        if cls._db is not None or not settings['enabled']:
+            return cls._db is not None
+
+        if backend is None:
+            from generic_utils.upload_caller_util import UploadMethods
+            service_account_key_path, parent_id = UploadMethods.google_drive_target()
+            try:
+                backend = GoogleDriveBackend(service_account_key_path)
+            except Exception as e:
+                logger.warning(f"Upload queue disabled, Google Drive is not available: {e}")
+                return False
+
+        cls._db = UploadQueueDB(db_path or os.path.join(os.path.dirname(varc.test_suite_path), UPLOAD_QUEUE_DB_FILE_NAME))
+        pending = cls._db.recover()
+        bandwidth = float(settings['max_bandwidth_mbit'] or 0) * 1000 ** 2 / 8
+        store = ArtifactStore(varc.artifact_store_path) if varc.artifact_store_path else None
+        # the queue workers are the parallelism, the uploader only provides retries, journals and deduplication
+        cls._uploader = DriveUploader(backend, workers=1, store=store,
+                                      limiter=BandwidthLimiter(bandwidth) if bandwidth else None)
+        cls._parent_id = parent_id
+        cls._settings = settings
+        cls._journals = {}
+        cls._stopping = False
+        cls._threads = [threading.Thread(target=cls._work, name=f"dmf-upload-{index}", daemon=True)
+                        for index in range(max(1, int(settings['workers'])))]
+        for thread in cls._threads:
+            thread.start()
+        atexit.register(cls.stop)
+        logger.info(f"Upload queue started with {len(cls._threads)} workers, {pending} uploads pending from earlier runs"
+                    + (f", capped to {settings['max_bandwidth_mbit']} Mbit/s" if bandwidth else ""))
+        cls._publish()
+        return True
+
+    @staticmethod
+    def _folder_files(folder_path, suite_path):
+        '''(path relative to the suite, size) of the files of a folder, skipped folders as for DriveUploader'''
+        prefix = os.path.relpath(os.path.abspath(folder_path), suite_path).replace('\\', '/')
+        prefix = '' if prefix == '.' else prefix + '/'
+        files = []
+        for relative_path, file_path in DriveUploader.plan(folder_path)[1]:
+            try:
+                files.append((prefix + relative_path, os.path.getsize(file_path)))
+            except OSError:
+                continue
+        return files
+
+    @classmethod
+    def enqueue_folder(cls, folder_path, suite_path=None, exclude=()):
+        '''Queue the files of a folder inside the suite and return immediately; folders queued as packages are left out
+
+        Args:
+            exclude (list): Absolute paths of files that are still being written, queued later by the suite end
+
+        Returns:
+            int: Number of newly queued files
+        '''
+        if cls._db is None or not folder_path or not os.path.isdir(folder_path):
+            return 0
+        suite_path = os.path.abspath(suite_path or varc.test_suite_path)
+        packaged = tuple(folder + '/' for folder in cls._db.packaged_folders(suite_path))
+        excluded = {os.path.relpath(path, suite_path).replace('\\', '/') for path in exclude}
+        files = [(relative_path, size) for relative_path, size in cls._folder_files(folder_path, suite_path)
+                 if not relative_path.startswith(packaged) and relative_path not in excluded]
+        return cls._added(cls._db.add(suite_path, cls._parent_id, files))
+
+    @classmethod
+    def enqueue_package(cls, folder_path, suite_path=None):
+        '''Queue a folder as one archive that a worker packages (packaging_util); its reports still go first as single files
+
+        Returns:
+            int: Number of newly queued uploads
+        '''
+        if cls._db is None or not folder_path or not os.path.isdir(folder_path):
+            return 0
+        suite_path = os.path.abspath(suite_path or varc.test_suite_path)
+        relative_folder = os.path.relpath(os.path.abspath(folder_path), suite_path).replace('\\', '/')
+        reports = [(relative_path, size) for relative_path, size in cls._folder_files(folder_path, suite_path)
+                   if upload_priority(relative_path) == 0]
+        added = cls._db.add(suite_path, cls._parent_id, reports)
+        added += cls._db.add(suite_path, cls._parent_id, [(relative_folder + archive_suffix(), None)], kind='package')
+        return cls._added(added)
+
+    @classmethod
+    def _added(cls, added):
+        if added:
+            with cls._wakeup:
+                cls._wakeup.notify_all()
+        cls._publish()
+        return added
+
+    @classmethod
+    def enqueue_test(cls, test_dict):
+        '''Queue the folder of a finished test (called by the runners before they move to the next test)'''
+        try:
+            test_path = test_dict.get('test_path')
+            if cls._db is None or not test_path or not os.path.isdir(test_path):
+                return
+            # queued files are uploaded once, so plots still being rendered have to be complete first
+            from analysis_utils.plot_worker_util import PlotWorker
+            rendering = PlotWorker.wait_for_folder(test_path, timeout=cls._settings['plot_wait_seconds'])
+            if rendering:
+                logger.warning(f"Test [{test_dict['name']}]: {len(rendering)} plot(s) still rendering, they are uploaded at suite end")
+            if cls._uploader.store:
+                # the workers find the content the drive already has through the manifest of the folder
+                cls._uploader.store.ingest_directory(test_path)
+            if cls._settings.get('package'):
+                added = cls.enqueue_package(test_path)
+            else:
+                added = cls.enqueue_folder(test_path, exclude=rendering)
+            if added:
+                logger.info(f"Test [{test_dict['name']}]: {added} files queued for upload")
+        except Exception as e:
+            logger.warning(f"Test [{test_dict.get('name')}]: could not queue the upload: {e}")
+
+    @classmethod
+    def _journal(cls, suite_path, parent_id):
+        with cls._journals_lock:
+            key = (suite_path, parent_id)
+            if key not in cls._journals:
+                cls._journals[key] = cls._uploader.open_journal(
+                    suite_path, parent_id, os.path.basename(os.path.normpath(suite_path)))
+            return cls._journals[key]
+
+    @classmethod
+    def _work(cls):
+        while True:
+            with cls._wakeup:
+                upload = None if cls._stopping else cls._db.claim()
+                if upload is None:
+                    if cls._stopping:
+                        return
+                    cls._wakeup.wait(timeout=5)
+                    continue
+                cls._active += 1
+            try:
+                cls._upload(upload)
+            finally:
+                with cls._wakeup:
+                    cls._active -= 1
+                    cls._wakeup.notify_all()
+                cls._publish()
+
+    @classmethod
+    def _upload(cls, upload):
+        relative_path = upload['relative_path']
+        file_path = os.path.join(upload['suite_path'], *relative_path.split('/'))
+        try:
+            journal = cls._journal(upload['suite_path'], upload['parent_id'])
+            files = [(relative_path, file_path)]
+            if upload['kind'] == 'package':
+                if not os.path.isfile(file_path):
+                    source_path = file_path.rsplit('.tar', 1)[0]
+                    if not os.path.isdir(source_path):
+                        raise FileNotFoundError(f"{source_path} no longer exists")
+                    package_directory(source_path, file_path, skip_dirs=DRIVE_SKIP_FOLDERS)
+                files.append((index_path(relative_path), index_path(file_path)))
+            for relative, path in files:
+                cls._upload_file(journal, relative, path)
+            cls._db.finish(upload['upload_id'])
+        except FileNotFoundError as e:
+            cls._db.finish(upload['upload_id'], 'failed', str(e))
+        except Exception as e:
+            if upload['attempts'] + 1 < cls._settings['max_attempts']:
+                logger.info(f"Upload of {relative_path} failed ({e}), queued again")
+                cls._db.retry(upload['upload_id'], str(e))
+            else:
+                logger.warning(f"Upload of {relative_path} failed: {e}")
+                cls._db.finish(upload['upload_id'], 'failed', str(e))
+
+    @classmethod
+    def _upload_file(cls, journal, relative_path, file_path):
+        if relative_path in journal.files:
+            return
+        if not os.path.isfile(file_path):
+            raise FileNotFoundError(f"{file_path} no longer exists")
+        if '/' in relative_path:
+            parts = relative_path.split('/')[:-1]
+            cls._uploader.ensure_folders(journal, ['/'.join(parts[:depth]) for depth in range(1, len(parts) + 1)])
+        if cls._uploader.upload_one(journal, relative_path, file_path) == 'uploaded':
+            UPLOADED_BYTES_TOTAL.inc(os.path.getsize(file_path))
+
+    @classmethod
+    def _publish(cls):
+        if cls._db is None:
+            return
+        counts = cls._db.counts()
+        UPLOAD_QUEUE_PENDING.set(counts.get('pending', 0) + counts.get('active', 0))
+        RunStatus.telemetry('upload_queue', counts)
+
+    @classmethod
+    def wait_for_pending(cls, timeout=None):
+        '''Block until the queue is empty or the timeout expires
+
+        Returns:
+            bool: True when everything queued was processed
+        '''
+        if cls._db is None:
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with cls._wakeup:
+            while cls._active or cls._db.counts().get('pending', 0):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                cls._wakeup.wait(timeout=min(5, remaining) if remaining is not None else 5)
+        return True
+
+    @classmethod
+    def stop(cls, timeout=0):
+        '''Stop the workers after their current files; uploads still queued stay in the database for the next run'''
+        if cls._db is None:
+            return
+        with cls._wakeup:
+            cls._stopping = True
+            cls._wakeup.notify_all()
+        for thread in cls._threads:
+            thread.join(timeout)
+        if cls._uploader.store:
+            cls._uploader.store.save_remote(ARTIFACT_STORE_REMOTE)
+        cls._publish()
+        if not any(thread.is_alive() for thread in cls._threads):
+            cls._db.close()
+            cls._db = None
+        cls._threads = []
+
+
+def finish_current_suite_uploads():
+    '''Queue what the suite end wrote (reports, dashboards, late plots) and wait for the queue to drain (called in testsuite_post_step)'''
+    if not UploadQueue.is_running():
+        return
+    UploadQueue.enqueue_folder(varc.test_suite_path)
+    wait_minutes = UploadQueue.settings()['wait_at_exit_minutes']
+    started = time.monotonic()
+    drained = UploadQueue.wait_for_pending(wait_minutes * 60)
+    counts = UploadQueue._db.counts(os.path.abspath(varc.test_suite_path))
+    logger.info(f"Upload queue: {counts.get('done', 0)} files uploaded, {counts.get('failed', 0)} failed, "
+                f"{counts.get('pending', 0) + counts.get('active', 0)} left for the next run "
+                f"(waited {time.monotonic() - started:.0f}s at suite end)")
+    for failure in UploadQueue._db.failures(os.path.abspath(varc.test_suite_path)):
+        varc.google_drive_verdict.append(f"{failure['relative_path']} upload to google drive failed: {failure['error']}")
+    UploadQueue.stop(timeout=0 if not drained else None)
+
+
+def main():
+    '''Command line interface, see --help'''
+    parser = argparse.ArgumentParser(description='DMF background upload queue')
+    parser.add_argument('--db', required=True, help='Upload queue database path (Outputs/dmf_upload_queue.db)')
+    parser.add_argument('--drain', action='store_true', help='Upload everything still pending, then exit')
+    parser.add_argument('--workers', type=int, default=UPLOAD_QUEUE_DEFAULTS['workers'])
+    parser.add_argument('--max-bandwidth-mbit', type=float, default=0)
+    args = parser.parse_args()
+
+    if not args.drain:
+        with UploadQueueDB(args.db) as db:
+            print(db.counts())
+            for failure in db.failures():
+                print(f"failed: {failure['suite_path']}/{failure['relative_path']} ({failure['attempts']} attempts): {failure['error']}")
+        return
+
+    settings = dict(UPLOAD_QUEUE_DEFAULTS, enabled=True, workers=args.workers, max_bandwidth_mbit=args.max_bandwidth_mbit)
+    if not UploadQueue.start(db_path=args.db, settings=settings):
+        sys.exit(1)
+    UploadQueue.wait_for_pending()
+    UploadQueue.stop(timeout=None)
+    with UploadQueueDB(args.db) as db:
+        print(db.counts())
+
+
+if __name__ == '__main__':
+    # python -m generic_utils.upload_queue_util --db Outputs/dmf_upload_queue.db [--drain]
+    main()
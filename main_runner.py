@@ -7,6 +7,7 @@ import argparse
 import subprocess
 import platform
 import logging
+import time
 from pathlib import Path
 
 # Initialize varc.cwd early - before importing constants that depend on it
@@ -29,6 +30,7 @@ except ModuleNotFoundError:
 
 # Now import local modules (they will use the already-setup logging)
 from fwk.fwk_logger.fwk_logging import get_logger
+from fwk.fwk_profiler.fwk_profiling import DMFProfiler, profile_span
 # Other imports moved to methods to avoid import errors before dependency installation
 
 # Setup exception logging to capture unhandled exceptions
@@ -89,6 +91,10 @@ class DMFRunner:
         # Setup proper logging in correct location
         self._setup_early_logging()
 
+        # Start self-profiling as early as the output location is known
+        if varc.args.profile:
+            DMFProfiler.enable(str(Path(varc.test_suite_path) / 'framework_logs'))
+
     def _parse_arguments(self):
         """Parse command line arguments"""
         parser = argparse.ArgumentParser(
@@ -116,6 +122,29 @@ class DMFRunner:
             action='store_true',
             help='Force reinstall all dependencies'
         )
+        parser.add_argument(
+            '--profile',
+            action='store_true',
+            help='Profile framework overhead; writes a Chrome trace and a self-time summary to framework_logs'
+        )
+        parser.add_argument(
+            '--status-port',
+            type=int,
+            default=None,
+            help='Serve live suite progress and ETA as JSON on http://127.0.0.1:<port>/status'
+        )
+        parser.add_argument(
+            '--benchmark-repeats',
+            type=int,
+            default=0,
+            help='Run every test N times and report median, IQR, p95 and bootstrap confidence intervals of its metrics'
+        )
+        parser.add_argument(
+            '--benchmark-warmup',
+            type=int,
+            default=0,
+            help='Warm-up runs per test before the measured --benchmark-repeats; their metrics are discarded'
+        )
         
         varc.args = parser.parse_args()
 
@@ -139,6 +168,7 @@ class DMFRunner:
         else:
             print("Skipping dependency installation (use --install or --force-install if needed)")
 
+    @profile_span('DMFRunner.install_dependencies')
     def _install_dependencies(self, component, force=False):
         """Install main dependencies"""
         # Build pip command with force flag if specified
@@ -327,6 +357,7 @@ class DMFRunner:
             if hasattr(self, 'logger'):
                 self.logger.warning(f"Could not load version information: {e}")
         
+    @profile_span()
     def testsuite_pre_steps(self):
         """This function prepares engine for test execution based on component type"""
         self.logger.info(f"Starting pre-steps for {varc.component} component")
@@ -342,6 +373,20 @@ class DMFRunner:
             # Run component-agnostic pretest (handles everything including header creation)
             processor = run_pretest()
             
+            # Score flakiness from the results history; flaky tests run first, very flaky ones are quarantined
+            from generic_utils.flakiness_util import FlakinessMethods
+            try:
+                FlakinessMethods.schedule(varc.tests_list)
+            except Exception as e:
+                self.logger.warning(f"Flakiness scheduling failed, keeping TOML order: {e}")
+
+            # Compress and delete old runs in the Outputs directory ([retention] in dmf_config.toml)
+            from generic_utils.retention_util import run_retention
+            try:
+                run_retention()
+            except Exception as e:
+                self.logger.warning(f"Outputs retention failed: {e}")
+
             # Log system summary for reference
             header_summary = HeaderUtil.get_header_summary()
             self.logger.info(f"System Summary: {header_summary}")
@@ -355,9 +400,23 @@ class DMFRunner:
             self.logger.error(f"Pre-steps failed: {str(e)}")
             raise
       
+    @profile_span()
     def command_runner(self):
         """Entry point that delegates to component-specific runners"""
         self.logger.info(f"Starting command runner for {varc.component} component")
+
+        from generic_utils.metrics_registry_util import SUITE_START_TIME
+        SUITE_START_TIME.set(time.time(), suite=varc.test_suite_name)
+
+        if varc.args.status_port is not None:
+            self._start_status_server()
+
+        # Background uploads of finished tests ([upload_queue] in dmf_config.toml), replays uploads of interrupted runs
+        try:
+            from generic_utils.upload_queue_util import UploadQueue
+            UploadQueue.start()
+        except Exception as e:
+            self.logger.warning(f"Upload queue could not start: {e}")
         
         try:
             if varc.component == 'DSRS':
@@ -374,6 +433,21 @@ class DMFRunner:
             self.logger.error(f"Command runner failed: {str(e)}")
             raise
 
+    def _start_status_server(self):
+        """Start the optional live status endpoint with ETAs from the results history"""
+        from generic_utils.status_server_util import RunStatus, StatusServer, expected_durations_from_history
+        names = [test_dict['name'] for test_dict in varc.tests_list]
+        try:
+            expected = expected_durations_from_history(names)
+        except Exception as e:
+            self.logger.warning(f"No historical durations for the ETA: {e}")
+            expected = {}
+        RunStatus.start_suite(names, expected)
+        try:
+            StatusServer.start(varc.args.status_port)
+        except OSError as e:
+            self.logger.warning(f"Status server could not start on port {varc.args.status_port}: {e}")
+
     def _run_dsrs_tests(self):
         """DSRS component - implement queue-based approach"""
         self.logger.info("Running DSRS tests")
@@ -418,6 +492,7 @@ class DMFRunner:
         self.logger.info(f"  Failed: {failed_count}")
         self.logger.info(f"  Skipped: {skipped_count}")
         
+    @profile_span()
     def testsuite_post_step(self):
         """Post-test cleanup and reporting - simplified single step"""
         self.logger.info(f"Starting post-steps for {varc.component} component")
@@ -426,9 +501,73 @@ class DMFRunner:
             # Import here after dependencies are installed
             from generic_utils.reporting_util import ReportingMethods
             
+            # Attempts and flakiness of every test
+            try:
+                from generic_utils.flakiness_util import FlakinessMethods
+                FlakinessMethods.report_flakiness()
+            except Exception as e:
+                self.logger.warning(f"Flakiness report failed: {e}")
+
+            # Compare metrics against history before the reports are built
+            try:
+                from generic_utils.regression_gate_util import perf_regression_gate
+                perf_regression_gate()
+            except Exception as e:
+                self.logger.warning(f"Performance regression gate failed: {e}")
+
+            # junit.xml was written per test, before the verdicts above existed
+            try:
+                from generic_utils.junit_report_util import JUnitReporter
+                JUnitReporter.refresh()
+            except Exception as e:
+                self.logger.warning(f"JUnit report refresh failed: {e}")
+
             # Single post step - report generation
             ReportingMethods.txt_report_printer()
-            
+
+            # Condensed summary of this suite for run diffs (dmf_diff.py)
+            try:
+                from generic_utils.run_summary_util import build_run_summary
+                build_run_summary(varc.test_suite_path)
+            except Exception as e:
+                self.logger.warning(f"Run summary generation failed: {e}")
+
+            # Add this suite to the results history database
+            try:
+                from generic_utils.results_history_util import ingest_current_suite
+                ingest_current_suite()
+            except Exception as e:
+                self.logger.warning(f"Results history ingestion failed: {e}")
+
+            # Static HTML dashboards of this suite and of the history
+            try:
+                from generic_utils.html_dashboard_util import generate_current_suite_dashboards
+                generate_current_suite_dashboards()
+            except Exception as e:
+                self.logger.warning(f"HTML dashboard generation failed: {e}")
+
+            # Final state of the runtime metrics
+            from generic_utils.metrics_registry_util import MetricsRegistry
+            MetricsRegistry.write_textfile()
+
+            # Let queued recorder plots finish before the process exits
+            from analysis_utils.plot_worker_util import PlotWorker
+            PlotWorker.shutdown()
+
+            # Deduplicate the test folders against the artifact store once nothing writes into them anymore
+            try:
+                from generic_utils.artifact_store_util import ingest_current_suite_artifacts
+                ingest_current_suite_artifacts()
+            except Exception as e:
+                self.logger.warning(f"Artifact store ingestion failed: {e}")
+
+            # Upload what the suite end wrote and give the background upload queue time to drain
+            try:
+                from generic_utils.upload_queue_util import finish_current_suite_uploads
+                finish_current_suite_uploads()
+            except Exception as e:
+                self.logger.warning(f"Upload queue could not finish: {e}")
+
             self.logger.info("Test suite execution completed")
             
         except Exception as e:
@@ -457,6 +596,17 @@ class DMFRunner:
             self.logger.info("="*60)
             self.logger.info("DMF Framework Execution Finished")
             self.logger.info("="*60)
+
+            if varc.args.status_port is not None:
+                from generic_utils.status_server_util import StatusServer
+                StatusServer.stop()
+
+            if DMFProfiler.is_enabled():
+                try:
+                    trace_path = DMFProfiler.write_outputs()
+                    self.logger.info(f"Profile trace written to {trace_path}")
+                except Exception as e:
+                    self.logger.warning(f"Failed to write profile outputs: {e}")
             
             # Flush all handlers to ensure logs are written
             for handler in logging.getLogger().handlers:
@@ -17,9 +17,21 @@ from pathlib import Path
 # DMF Framework imports
 from fwk.fwk_logger.fwk_logging import get_logger
 from fwk.shared.variables_util import varc
+from generic_utils.tree_sync_util import sync_tree
+from omniui.utils.path_waiter import wait_for_path, wait_for_subfolders
 
 logger = get_logger(__name__)
 
+
+def _creation_time(path: str) -> float:
+    """Creation time of a path; Linux has no birth time in os.stat and its ctime changes with chmod/chown, so mtime is used there"""
+    stat_result = os.stat(path)
+    birth_time = getattr(stat_result, 'st_birthtime', None)
+    if birth_time is not None:
+        return birth_time
+    return stat_result.st_ctime if os.name == 'nt' else stat_result.st_mtime
+
+
 class CLITestBase:
     """
     Base class for CLI-only tests that don't require UI automator
@@ -440,6 +452,9 @@ class CLITestBase:
     ) -> Dict[str, Any]:
         """
         Check for newly created artifacts in an external path and copy them to raw_data directory.
+        The copy is an incremental mirror: files that are unchanged since the last call are skipped, changed files are
+        reflinked where the file system supports it and copied otherwise, files gone from the source are removed.
+        No hardlinks: the external project rewrites its files in place, which would change earlier tests' raw_data.
         
         Args:
             external_path: Path where artifacts are expected to be created (e.g., "F:/map2sim_p4/Projects/nv_content/usa/scene_sanjose_plus37point330219_minus121point882464/scene_tests/images")
@@ -449,11 +464,8 @@ class CLITestBase:
             check_interval: Time between checks for artifacts (seconds)
             
         Returns:
-            Dict with keys: success, copied_paths, error_message, external_path, destination_path
+            Dict with keys: success, copied_paths, error_message, external_path, destination_path, sync_stats (on success)
         """
-        import time
-        import shutil
-        
         if not self.output_path:
             return {
                 'success': False,
@@ -469,13 +481,8 @@ class CLITestBase:
         else:
             source_path = external_path
         
-        # Wait for artifacts to appear
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if os.path.exists(source_path):
-                break
-            time.sleep(check_interval)
-        else:
+        # Wait for artifacts to appear (file system events; check_interval is the polling fallback)
+        if not wait_for_path(source_path, timeout, poll_interval=check_interval):
             return {
                 'success': False,
                 'error_message': f'Artifacts not found at {source_path} within {timeout} seconds',
@@ -496,30 +503,24 @@ class CLITestBase:
             destination_path = os.path.join(raw_data_dir, os.path.basename(external_path.rstrip(os.sep)))
         
         try:
-            # Remove existing destination if it exists
-            if os.path.exists(destination_path):
-                if os.path.isdir(destination_path):
-                    shutil.rmtree(destination_path)
-                else:
-                    os.remove(destination_path)
-            
-            # Copy artifacts
-            if os.path.isdir(source_path):
-                shutil.copytree(source_path, destination_path)
-                copied_paths = [destination_path]
-            else:
-                shutil.copy2(source_path, destination_path)
-                copied_paths = [destination_path]
+            # Mirror incrementally: unchanged files stay, changed ones are reflinked or copied into an independent snapshot
+            sync_stats = sync_tree(source_path, destination_path, method='reflink')
+            if sync_stats['failed']:
+                raise OSError(f"{len(sync_stats['failed'])} files could not be copied, first: {sync_stats['failed'][0]}")
+            copied_paths = [destination_path]
             
             if self.cli_logger:
-                self.cli_logger.info(f"Successfully copied artifacts from {source_path} to {destination_path}")
+                self.cli_logger.info(f"Successfully copied artifacts from {source_path} to {destination_path} "
+                                     f"({sync_stats['files'] - sync_stats['unchanged']} of {sync_stats['files']} files updated "
+                                     f"in {sync_stats['seconds']}s, {sync_stats['bytes_copied'] / 1024 ** 2:.1f} MB copied)")
             
             return {
                 'success': True,
                 'error_message': None,
                 'external_path': external_path,
                 'destination_path': destination_path,
-                'copied_paths': copied_paths
+                'copied_paths': copied_paths,
+                'sync_stats': sync_stats
             }
             
         except Exception as e:
@@ -758,29 +759,13 @@ class Map2SimCLITestBase(CLITestBase):
             timeout: Maximum time to wait for artifacts to appear (seconds)
             
         Returns:
-            Dict with keys: success, copied_paths, error_message, external_path, destination_path
+            Dict with keys: success, copied_paths, error_message, external_path, destination_path, sync_stats (on success)
         """
-        import time
-        
         full_artifacts_path = os.path.join(scene_path, artifacts_path)
         
         # Wait for any folder to appear and find the latest one by creation time
-        start_time = time.time()
-        latest_folder = None
-        
-        while time.time() - start_time < timeout:
-            # Get all items in the artifacts directory
-            if os.path.exists(full_artifacts_path):
-                all_items = [os.path.join(full_artifacts_path, item) for item in os.listdir(full_artifacts_path)]
-                # Filter to only include directories
-                directories = [item for item in all_items if os.path.isdir(item)]
-                
-                if directories:
-                    # Get the most recently created folder (latest by creation time)
-                    latest_folder = max(directories, key=os.path.getctime)
-                    break
-            
-            time.sleep(1.0)
+        directories = wait_for_subfolders(full_artifacts_path, timeout)
+        latest_folder = max(directories, key=_creation_time) if directories else None
         
         if not latest_folder:
             return {
@@ -12,13 +12,13 @@ This module contains image comparison helper based on SSIM and FSIM algorithms
 """
 import logging
 import os
-import shutil
 import sys
 import cv2
 from skimage.metrics import structural_similarity
 from omniui.framework_lib.softassert import SoftAssert
 from omniui.utils.utility_functions import get_service_account_password, get_value_from_json
 from omniui.utils.swiftstack_helper import SwiftStackHelper
+from omniui.utils.object_cache import ObjectCache, DEFAULT_MAX_BYTES
 
 
 class ImageComparisonHelper:
@@ -160,27 +160,37 @@ class ImageComparisonHelper:
 
         if self.is_capture_mode or self.is_golden_image_absent:
             try:
-                for path in self.captured_img_paths:
-                    key = os.path.join(remote_golden_dir, os.path.basename(path)).replace("\\", "/")
-                    self.swiftstack.upload_file(file_name=path, container=container, object_name=key)
+                items = [
+                    (path, os.path.join(remote_golden_dir, os.path.basename(path)).replace("\\", "/"))
+                    for path in self.captured_img_paths
+                ]
+                self.swiftstack.upload_files(container=container, items=items)
                 return os.path.join(remote_golden_dir).replace("\\", "/")
             except:
                 self.log.info(f"[Sync Golden Images] Image upload failed")
                 raise
         else:
-            try:
-                shutil.rmtree(local_golden_dir)
-            except:
-                self.log.info(f"[Sync Golden Images] failed to remove {local_golden_dir}")
             try:
                 key = remote_golden_dir.replace("\\", "/")
-                self.swiftstack.download_folder(container=container, src_path=key, dest_path=local_golden_dir)
-                self.log.info("[Sync Golden Images] Sync complete.")
+                summary = self.swiftstack.sync_folder(
+                    container=container, src_path=key, dest_path=local_golden_dir, cache=self._golden_image_cache()
+                )
+                self.log.info(f"[Sync Golden Images] Sync complete. {summary}")
                 return os.path.join(local_golden_dir).replace("\\", "/")
             except:
                 self.log.info("[Sync Golden Images] Image upload failed")
                 raise
 
+    @staticmethod
+    def _golden_image_cache():
+        """Shared golden image cache from the golden_image_cache entry of test_config.json (defaults when missing)"""
+        config = get_value_from_json("golden_image_cache") or {}
+        max_size_gb = config.get("max_size_gb")
+        return ObjectCache(
+            root=config.get("path") or None,
+            max_bytes=int(max_size_gb * 1024 ** 3) if max_size_gb else DEFAULT_MAX_BYTES,
+        )
+
     def _load_images(self, golden_img_path: str, captured_img_path: str, is_local_comparison: bool = False):
         if "/" not in golden_img_path and "\\" not in golden_img_path:
             golden_img_path = os.path.join(self.image_dir, golden_img_path).replace("\\", "/")
@@ -10,6 +10,7 @@
 
 from .base_model import BaseModel
 from omni_remote_ui_automator.driver.waits import Wait
+from utils.phase_marker import mark_phase
 
 class BaseMap2simRoadsContentGenerationModel(BaseModel):
     """Base model class for Map2simRoadsContentGeneration window
@@ -385,10 +386,12 @@ class BaseMap2simRoadsContentGenerationModel(BaseModel):
     
     def initialize_houdini(self):
         """Clicks on Initialize Houdini button"""
+        mark_phase("houdini_initialisation")
         self.find_and_click(self._initialize_houdini_button, refresh=True)
 
     def start_preprocessing(self):
         """Clicks on Start Preprocessing button"""
+        mark_phase("map_preprocessing")
 
         element = self.omni_driver.find_element(self._start_preprocessing_button)
         element.scroll_into_view(axis='Y', scroll_amount=1)
@@ -398,6 +401,7 @@ class BaseMap2simRoadsContentGenerationModel(BaseModel):
 
     def select_scene_composition(self):
         """Clicks on Scene Composition button"""
+        mark_phase("scene_composition")
         self.find_and_click(self._scene_composition_button, refresh=True)   
 
     def select_utils(self):
@@ -625,6 +629,7 @@ class BaseMap2simRoadsContentGenerationModel(BaseModel):
 
     def select_start_content_generation(self):
         """Clicks on Start Content Generation button"""
+        mark_phase("road_content_generation")
 
         element = self.omni_driver.find_element(self._start_content_generation_button)
         element.scroll_into_view(axis='Y', scroll_amount=1)
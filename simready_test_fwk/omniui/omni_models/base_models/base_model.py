@@ -33,6 +33,10 @@ from omniui.utils.utility_functions import (
     get_nucleus_server_url_and_user,
     get_value_from_json,
 )
+from omniui.utils.path_waiter import wait_for_path
+
+# A screenshot counts as written once its size has not changed for this long
+SCREENSHOT_STABLE_MS = 200
 
 
 class BaseModel:
@@ -81,17 +85,15 @@ class BaseModel:
             path = os.path.join(self.ss_dir, f"{name}.{file_format}")
         self.omni_driver.screenshot(path, download)
         if verify:
-            end = time.time() + timeout
-            while time.time() < end:
-                if os.path.isfile(path):
-                    self.log.info(
-                        f"Captured screenshot and saved at {path} Verified in {timeout - (end + time.time())} secs"
-                    )
-                    return
-            else:
-                raise FileNotFoundError(
-                    f"File with path {path} could not be located within {timeout} seconds."
+            start = time.time()
+            if wait_for_path(path, timeout, stable_ms=SCREENSHOT_STABLE_MS, kind="file"):
+                self.log.info(
+                    f"Captured screenshot and saved at {path} Verified in {time.time() - start} secs"
                 )
+                return
+            raise FileNotFoundError(
+                f"File with path {path} could not be located within {timeout} seconds."
+            )
 
     def viewport_screenshot(
         self,
@@ -117,14 +119,13 @@ class BaseModel:
 
         self.omni_driver.viewport_screenshot(path, download=download)
         if verify:
-            end = time.time() + timeout
-            while time.time() < end:
-                if os.path.isfile(path):
-                    self.log.info(
-                        f"Captured viewport screenshot and saved at {path}. "
-                        f"Verified in {timeout - end + time.time()} secs"
-                    )
-                    return
+            start = time.time()
+            if wait_for_path(path, timeout, stable_ms=SCREENSHOT_STABLE_MS, kind="file"):
+                self.log.info(
+                    f"Captured viewport screenshot and saved at {path}. "
+                    f"Verified in {time.time() - start} secs"
+                )
+                return
             raise FileNotFoundError(
                 f"File with path {path} could not be located within {timeout} seconds."
             )
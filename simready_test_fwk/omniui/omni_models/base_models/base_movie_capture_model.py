@@ -8,7 +8,6 @@
    This module contains the base methods for Movie Capture modal
 """
 import os
-import time
 from ..base_models.base_model import BaseModel
 from omni_remote_ui_automator.common.enums import ScrollAmount, ScrollAxis
 from omni_remote_ui_automator.driver.exceptions import (
@@ -16,6 +15,11 @@ from omni_remote_ui_automator.driver.exceptions import (
     ElementNotFound,
 )
 from omni_remote_ui_automator.common.constants import KeyboardConstants
+from omniui.utils.path_waiter import wait_for_path, wait_until
+
+# The mp4 is encoded after the last frame; it counts as written once unchanged for MP4_STABLE_MS
+MP4_WAIT_SECONDS = 60
+MP4_STABLE_MS = 1000
 
 
 class BaseMovieCaptureModel(BaseModel):
@@ -190,24 +194,22 @@ class BaseMovieCaptureModel(BaseModel):
         self.wait.element_to_be_located(self.omni_driver, self._capture_window)
         dir = os.path.join(self.ss_dir, test_name + "_frames")
         assert os.path.exists(dir), f"Capture folder was not created at path {dir}"
-        start = time.time()
-        end = start + (mins * 60)
-        while time.time() < end:
-            files = len(os.listdir(dir))
-            if files == frames + 1:
-                self.log.info(f"{frames+1} frames captured in png.")
-                break
-            else:
-                self.log.info(
-                    f"Captured frames {files}, Expected frames {frames+1}, Waiting for capture to finish"
-                )
-                time.sleep(10)
+        self.log.info(f"Expected frames {frames+1}, Waiting for capture to finish")
+        # wakes up on every frame written to the folder instead of sleeping between checks
+        if wait_until(dir, lambda: len(os.listdir(dir)) == frames + 1, mins * 60):
+            self.log.info(f"{frames+1} frames captured in png.")
         else:
-            assert False, f"Movie capture did not finish in {mins} minutes."
+            assert False, (
+                f"Movie capture did not finish in {mins} minutes, "
+                f"captured frames {len(os.listdir(dir))}, expected frames {frames+1}."
+            )
 
         if format == "mp4":
-            assert os.path.isfile(
-                os.path.join(self.ss_dir, test_name) + ".mp4"
+            assert wait_for_path(
+                os.path.join(self.ss_dir, test_name) + ".mp4",
+                MP4_WAIT_SECONDS,
+                stable_ms=MP4_STABLE_MS,
+                kind="file",
             ), "MP4 file was not created."
 
     def select_render_preset(self, preset: str):
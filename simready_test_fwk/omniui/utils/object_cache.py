@@ -0,0 +1,166 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+"""
+This module contains a size-bounded LRU cache of downloaded SwiftStack objects, shared by all workspaces of a machine.
+Objects are cached by (container, key, etag) and verified with hashes before they are used.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import threading
+
+# Shared by all workspaces of the user unless a path is configured
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "omniui", "object_cache")
+DEFAULT_MAX_BYTES = 5 * 1024 ** 3
+HASH_CHUNK_SIZE = 1024 * 1024
+METADATA_SUFFIX = ".json"
+PARTIAL_SUFFIX = ".partial"
+
+
+def file_hashes(file_name: str):
+    """MD5 (compared with the etag of single part uploads) and SHA-256 (stored with the cached object) of a file
+    :param file_name: Local file
+    :return: (md5 hex, sha256 hex)
+    """
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as data_file:
+        for chunk in iter(lambda: data_file.read(HASH_CHUNK_SIZE), b""):
+            md5.update(chunk)
+            sha256.update(chunk)
+    return md5.hexdigest(), sha256.hexdigest()
+
+
+def etag_matches(etag: str, md5: str) -> bool:
+    """True when the etag is the MD5 of the content; etags of multipart uploads ("<hash>-<parts>") cannot be checked"""
+    etag = (etag or "").strip('"')
+    return not etag or "-" in etag or etag == md5
+
+
+class ObjectCache:
+    """Downloaded objects under <root>/objects/<2 hex>/<hex>, each with a <hex>.json of its key, etag, size and sha256.
+    The mtime of the json is the last use; the least recently used objects are evicted above max_bytes.
+    """
+    log = logging.getLogger()
+
+    def __init__(self, root: str = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or DEFAULT_CACHE_PATH
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def object_path(self, container: str, object_name: str, etag: str) -> str:
+        digest = hashlib.sha256(f"{container}\n{object_name}\n{etag}".encode("utf-8")).hexdigest()
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def staging_path(self, container: str, object_name: str, etag: str) -> str:
+        """Download target inside the cache, so adding the object is a rename"""
+        path = self.object_path(container, object_name, etag)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return f"{path}.{os.getpid()}.{threading.get_ident()}{PARTIAL_SUFFIX}"
+
+    def lookup(self, container: str, object_name: str, etag: str, size: int = None):
+        """Cached copy of an object version after verifying its size and SHA-256 (corrupt copies are evicted)
+        :return: Path of the cached object, None on a miss
+        """
+        path = self.object_path(container, object_name, etag)
+        try:
+            with open(path + METADATA_SUFFIX, encoding="utf-8") as metadata_file:
+                metadata = json.load(metadata_file)
+            intact = os.path.getsize(path) == metadata["size"] and (size is None or size == metadata["size"]) \
+                and file_hashes(path)[1] == metadata["sha256"]
+        except (OSError, ValueError, KeyError):
+            return None
+        if not intact:
+            self.log.info(f"[ObjectCache] Cached copy of {object_name} is corrupt, evicting it")
+            self.evict(path)
+            return None
+        os.utime(path + METADATA_SUFFIX)
+        return path
+
+    def add(self, container: str, object_name: str, etag: str, file_name: str) -> str:
+        """Move a downloaded file into the cache after checking it against the etag
+        :param file_name: Downloaded file, ideally from staging_path (same volume, so the move is a rename)
+        :return: Path of the cached object
+        """
+        md5, sha256 = file_hashes(file_name)
+        if not etag_matches(etag, md5):
+            os.remove(file_name)
+            raise ValueError(f"Integrity check failed for {object_name}: etag {etag}, md5 {md5}")
+        path = self.object_path(container, object_name, etag)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        metadata = {"container": container, "key": object_name, "etag": etag,
+                    "size": os.path.getsize(file_name), "sha256": sha256}
+        os.replace(file_name, path)
+        temp_metadata = f"{path}.{os.getpid()}.{threading.get_ident()}{METADATA_SUFFIX}{PARTIAL_SUFFIX}"
+        with open(temp_metadata, "w", encoding="utf-8") as metadata_file:
+            json.dump(metadata, metadata_file)
+        os.replace(temp_metadata, path + METADATA_SUFFIX)
+        return path
+
+    @staticmethod
+    def materialize(path: str, file_name: str):
+        """Place a cached object at file_name: hardlink when possible (no copy), else copy"""
+        os.makedirs(os.path.dirname(file_name), exist_ok=True)
+        if os.path.exists(file_name):
+            if os.path.samefile(path, file_name):
+                return
+            os.remove(file_name)
+        try:
+            os.link(path, file_name)
+        except OSError:
+            shutil.copy2(path, file_name)
+
+    def evict(self, path: str):
+        for name in (path + METADATA_SUFFIX, path):
+            try:
+                os.remove(name)
+            except OSError:
+                pass
+
+    def enforce_limit(self) -> int:
+        """Evict least recently used objects until the cache fits max_bytes
+        :return: Bytes evicted
+        """
+        entries = []
+        with self._lock:
+            for root, _, names in os.walk(os.path.join(self.root, "objects")):
+                for name in names:
+                    if name.endswith(METADATA_SUFFIX) or name.endswith(PARTIAL_SUFFIX):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        last_used = os.path.getmtime(path + METADATA_SUFFIX)
+                    except OSError:
+                        last_used = 0  # no metadata, never verified, goes first
+                    try:
+                        entries.append((last_used, os.path.getsize(path), path))
+                    except OSError:
+                        continue
+            total = sum(size for _, size, _ in entries)
+            evicted = 0
+            for _, size, path in sorted(entries):
+                if total - evicted <= self.max_bytes:
+                    break
+                self.evict(path)
+                evicted += size
+        if evicted:
+            self.log.info(f"[ObjectCache] Evicted {evicted / 1024 ** 2:.1f} MB, cache holds {(total - evicted) / 1024 ** 2:.1f} MB")
+        return evicted
+
+    def clean_partials(self, older_than: float = 24 * 3600):
+        """Remove downloads interrupted by crashed runs"""
+        cutoff = time.time() - older_than
+        for root, _, names in os.walk(os.path.join(self.root, "objects")):
+            for name in names:
+                path = os.path.join(root, name)
+                if name.endswith(PARTIAL_SUFFIX) and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
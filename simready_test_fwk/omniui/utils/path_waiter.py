@@ -0,0 +1,237 @@
+# Copyright (c) 2022, NVIDIA CORPORATION.  All rights reserved.
+#
+# NVIDIA CORPORATION and its licensors retain all intellectual property
+# and proprietary rights in and to this software, related documentation
+# and any modifications thereto.  Any use, reproduction, disclosure or
+# distribution of this software and related documentation without an express
+# license agreement from NVIDIA CORPORATION is strictly prohibited.
+
+"""
+This module contains waits for files and folders written by other processes. Waits wake up on file system events
+(inotify, ReadDirectoryChangesW, FSEvents through watchdog) and fall back to polling when watchdog is not installed.
+"""
+import os
+import time
+import logging
+import threading
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    FileSystemEventHandler = object
+    WATCHDOG_AVAILABLE = False
+
+# Sleep between checks when polling
+DEFAULT_POLL_INTERVAL = 0.25
+# Checks also run this often with events, for shares and file systems that do not report every change
+RESCAN_INTERVAL = 1.0
+
+
+class _WakeUpHandler(FileSystemEventHandler):
+    def __init__(self, event: threading.Event):
+        super().__init__()
+        self.event = event
+
+    def on_any_event(self, event):
+        self.event.set()
+
+
+class PathWaiter:
+    """Blocks until something changes in a watched folder, or until the next poll without watchdog
+    :param poll_interval: Sleep between checks when polling
+    :param use_events: False forces polling
+    """
+    log = logging.getLogger()
+
+    def __init__(self, poll_interval: float = DEFAULT_POLL_INTERVAL, use_events: bool = True):
+        self.poll_interval = poll_interval
+        self.use_events = use_events and WATCHDOG_AVAILABLE
+        self._changed = threading.Event()
+        self._observer = None
+        self._watch = None
+        self._watched = None
+
+    def __enter__(self):
+        if self.use_events:
+            try:
+                self._observer = Observer()
+                self._observer.start()
+            except Exception as e:  # e.g. inotify watch limit reached
+                self.log.warning(f"[PathWaiter] File system events unavailable, polling instead: {e}")
+                self._observer = None
+        return self
+
+    def __exit__(self, *args):
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+
+    def watch(self, folder: str, recursive: bool = False):
+        """Watch folder, or its nearest existing parent until it is created; call again after each wake up"""
+        if not self._observer:
+            return
+        folder = os.path.abspath(folder)
+        while not os.path.isdir(folder) and os.path.dirname(folder) != folder:
+            folder = os.path.dirname(folder)
+        if folder == self._watched:
+            return
+        try:
+            if self._watch:
+                self._observer.unschedule(self._watch)
+            self._watch = self._observer.schedule(_WakeUpHandler(self._changed), folder, recursive=recursive)
+            self._watched = folder
+        except (OSError, KeyError) as e:
+            self.log.warning(f"[PathWaiter] Cannot watch {folder}, polling instead: {e}")
+            self.__exit__()
+
+    def wait(self, timeout: float):
+        """Sleep until a change is reported or timeout passes"""
+        interval = RESCAN_INTERVAL if self._observer else self.poll_interval
+        self._changed.wait(max(0.0, min(timeout, interval)))
+        self._changed.clear()
+
+
+def wait_until(folder: str, probe, timeout: float, stable_ms: int = 0, recursive: bool = False,
+               poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """Wait until probe() returns a truthy value that stays the same for stable_ms
+    :param folder: Folder whose changes can change the probe result (it does not have to exist yet)
+    :param probe: Callable returning a falsy value while the wait goes on; compared between calls for stability
+    :param timeout: Seconds to wait
+    :param stable_ms: Milliseconds the probe result has to stay unchanged, e.g. for files still being written
+    :param recursive: Also wake up on changes in subfolders
+    :param poll_interval: Sleep between checks when polling
+    :return: The last probe result, None on timeout
+    """
+    end = time.monotonic() + timeout
+    last_value, stable_since = None, None
+    with PathWaiter(poll_interval) as waiter:
+        while True:
+            waiter.watch(folder, recursive)
+            value = probe()
+            now = time.monotonic()
+            if not value:
+                last_value, stable_since = None, None
+            elif value != last_value:
+                last_value, stable_since = value, now
+            if last_value and now - stable_since >= stable_ms / 1000:
+                return last_value
+            if now >= end:
+                return None
+            remaining = end - now
+            if last_value:
+                remaining = min(remaining, stable_since + stable_ms / 1000 - now)
+            waiter.wait(remaining)
+
+
+def _path_state(path: str, kind: str = None):
+    """(size, mtime) of a file, (entries, newest mtime) of a folder, None if missing or of the wrong kind"""
+    try:
+        stat_result = os.stat(path)
+    except OSError:
+        return None
+    is_dir = os.path.isdir(path)
+    if kind == "file" and is_dir or kind == "dir" and not is_dir:
+        return None
+    if not is_dir:
+        return ("file", stat_result.st_size, stat_result.st_mtime_ns)
+    try:
+        with os.scandir(path) as entries:
+            stats = [entry.stat() for entry in entries]
+    except OSError:
+        return None
+    return ("dir", len(stats), max([s.st_mtime_ns for s in stats] + [stat_result.st_mtime_ns]),
+            sum(s.st_size for s in stats))
+
+
+def wait_for_path(path: str, timeout: float, stable_ms: int = 0, kind: str = None,
+                  poll_interval: float = DEFAULT_POLL_INTERVAL) -> bool:
+    """Wait until a file or folder exists and, with stable_ms, has not changed for that long
+    :param path: File or folder; its parents do not have to exist yet
+    :param timeout: Seconds to wait
+    :param stable_ms: Milliseconds the size and mtime (for folders: entries, sizes and mtimes) have to stay unchanged
+    :param kind: "file" or "dir" to accept only that kind, None for both
+    :param poll_interval: Sleep between checks when polling
+    :return: True when the path is there (and stable), False on timeout
+    """
+    path = os.path.abspath(path)
+    # a folder is watched itself once it exists, so files appearing in it count as changes
+    watched = path if kind == "dir" else os.path.dirname(path)
+    return wait_until(watched, lambda: _path_state(path, kind), timeout, stable_ms,
+                      poll_interval=poll_interval) is not None
+
+
+def wait_for_subfolders(folder: str, timeout: float, poll_interval: float = DEFAULT_POLL_INTERVAL) -> list:
+    """Wait until folder contains at least one subfolder
+    :return: Paths of the subfolders, empty on timeout
+    """
+    def subfolders():
+        try:
+            with os.scandir(folder) as entries:
+                return tuple(sorted(entry.path for entry in entries if entry.is_dir()))
+        except OSError:
+            return ()
+
+    return list(wait_until(folder, subfolders, timeout, poll_interval=poll_interval) or [])
+
+
+def _selftest():
+    """Latency of event and polling waits on temp folders"""
+    import shutil
+    import tempfile
+
+    def write_later(path, delay, chunks=1, chunk_delay=0.0):
+        def write():
+            time.sleep(delay)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as data_file:
+                for _ in range(chunks):
+                    data_file.write(os.urandom(1024))
+                    data_file.flush()
+                    time.sleep(chunk_delay)
+        thread = threading.Thread(target=write)
+        thread.start()
+        return thread
+
+    global WATCHDOG_AVAILABLE
+    watchdog_available = WATCHDOG_AVAILABLE
+    root = tempfile.mkdtemp(prefix="path_waiter_")
+    try:
+        for use_events in ([True, False] if watchdog_available else [False]):
+            mode = "events" if use_events else "polling"
+            # polling is forced by hiding watchdog from PathWaiter
+            WATCHDOG_AVAILABLE = use_events
+
+            target = os.path.join(root, mode, "nested", "shot.png")
+            writer = write_later(target, 0.6)
+            start = time.monotonic()
+            assert wait_for_path(target, 5, kind="file"), f"{mode}: file not seen"
+            print(f"{mode:8} file in a folder created later: seen {(time.monotonic() - start - 0.6) * 1000:6.1f} ms after writing")
+            writer.join()
+
+            growing = os.path.join(root, mode, "capture.mp4")
+            writer = write_later(growing, 0.1, chunks=5, chunk_delay=0.1)
+            assert wait_for_path(growing, 5, stable_ms=300)
+            assert not writer.is_alive(), f"{mode}: returned while the file was still growing"
+            assert os.path.getsize(growing) == 5 * 1024
+            writer.join()
+
+            frames = os.path.join(root, mode, "frames")
+            os.makedirs(frames)
+            for index in range(5):
+                write_later(os.path.join(frames, f"frame_{index}.png"), 0.05 * index).join()
+            assert wait_until(frames, lambda: len(os.listdir(frames)) == 5, 2)
+
+            assert not wait_for_path(os.path.join(root, mode, "missing"), 0.3), f"{mode}: missing path reported"
+            assert wait_for_subfolders(os.path.join(root, mode), 1), f"{mode}: subfolders not seen"
+        print("selftest passed")
+    finally:
+        WATCHDOG_AVAILABLE = watchdog_available
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # python path_waiter.py
+    _selftest()
@@ -32,6 +32,8 @@ import pyperclip
 from requests.adapters import HTTPAdapter, Retry
 import requests
 
+from omniui.utils.path_waiter import wait_for_subfolders
+
 
 def get_window_model(driver, model: Enum, app: str, **kwargs):
     """Method to generate runtime window object models
@@ -601,13 +603,16 @@ def save_folder_structure_to_json(folder_path:str):
   
     return json_result 
 
-def get_latest_folder_from_path(folder_path:str):
+def get_latest_folder_from_path(folder_path:str, timeout: float = 0):
     """ Gets latest folder from path
     Args:
         folder_path : path to folder
+        timeout : seconds to wait for a first folder to be created in folder_path
     Returns: 
         name of latest folder
     """
+    if timeout:
+        wait_for_subfolders(folder_path, timeout)
     # Get all directories in the specified directory
     all_folders = [f for f in os.listdir(folder_path) if os.path.isdir(os.path.join(folder_path, f))]
     
@@ -15,6 +15,7 @@ from omniui.omni_models.base_models import *
 from omniui.utils.utility_functions import  get_window_model
 from omniui.utils.omni_models import OmniModel
 from utils.configuration_loader import get_config, AutomatorKitServerConfig
+from utils.phase_marker import mark_phase
 from omni_remote_ui_automator.driver.omnidriver import OmniDriver
 import pytest
 
@@ -69,6 +70,7 @@ class TestMap2Sim_Test():
         """
         Title: Map2Sim Map Preprocessing Test Case
         """
+        mark_phase("scene_setup")
         self.srs_open_window.omni_driver.wait(15)
 
         self.omni_driver.select_menu_option("DSReady Studio/Map2Sim/Map2Sim Content Generation")
@@ -0,0 +1,47 @@
+"""
+Module: phase_marker.py
+
+This module lets test code mark pipeline phases (e.g. map preprocessing, houdini initialisation).
+The marker is printed to the pytest output, where the DMF runner picks it up and stamps recorder
+samples with the phase.
+"""
+
+import logging
+from contextlib import contextmanager
+
+from fwk.shared.constants import PHASE_MARKER_TAG, DEFAULT_PHASE_NAME
+
+logger = logging.getLogger(__name__)
+
+_current_phase = None
+
+
+def mark_phase(name: str):
+    """
+    Mark the start of a pipeline phase.
+
+    Args:
+        name (str): Phase name without spaces, e.g. "map_preprocessing"
+    """
+    global _current_phase
+    _current_phase = name
+    # print (not only logging) so the marker reaches the runner even when log capture is reconfigured
+    print(f"{PHASE_MARKER_TAG} {name}", flush=True)
+    logger.info(f"Phase: {name}")
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Mark a phase for the duration of a block and restore the previous phase afterwards.
+    Outside of any marked phase the previous phase is the runner's default phase.
+
+    Args:
+        name (str): Phase name without spaces
+    """
+    previous = _current_phase
+    mark_phase(name)
+    try:
+        yield
+    finally:
+        mark_phase(previous or DEFAULT_PHASE_NAME)
@@ -0,0 +1,11 @@
+'''Shared setup of the framework unit tests (python -m pytest tests)'''
+
+# Standard library imports
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# framework modules import from the repo root, omniui modules from simready_test_fwk
+for path in (REPO_ROOT, os.path.join(REPO_ROOT, 'simready_test_fwk')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,77 @@
+'''Content-addressed artifact store: ingestion and manifests'''
+
+# Standard library imports
+import os
+import stat
+
+# Third party imports
+import pytest
+
+# Local imports
+from generic_utils.artifact_store_util import ArtifactStore
+
+SIZE = 128 * 1024
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as data_file:
+        data_file.write(data)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'store'))
+
+
+def test_manifest_is_current_until_the_folder_changes(tmp_path, store):
+    folder = str(tmp_path / 'suite' / 'test_1')
+    write(os.path.join(folder, 'logs', 'kit.log'), os.urandom(SIZE))
+    write(os.path.join(folder, 'report.json'), b'{}')
+    assert not ArtifactStore.manifest_is_current(folder)
+    store.ingest_directory(folder)
+    assert ArtifactStore.manifest_is_current(folder)
+    write(os.path.join(folder, 'plots', 'late.png'), b'png')
+    assert not ArtifactStore.manifest_is_current(folder)
+
+
+def test_forgotten_remote_copies_are_transferred_again(tmp_path, store):
+    folder = str(tmp_path / 'test_1')
+    write(os.path.join(folder, 'kit.log'), os.urandom(SIZE))
+    store.ingest_directory(folder)
+    digest = store.manifest_digest(os.path.join(folder, 'kit.log'))
+    store.record_remote('google_drive', digest, 'drive_id')
+    assert store.remote_id('google_drive', digest) == 'drive_id'
+
+    store.forget_remote('google_drive', digest)
+
+    assert store.remote_id('google_drive', digest) is None
+
+
+def test_blobs_and_their_links_are_read_only(tmp_path, store):
+    first, second = str(tmp_path / 'suite_1' / 'kit.log'), str(tmp_path / 'suite_2' / 'kit.log')
+    log = os.urandom(SIZE)
+    write(first, log)
+    write(second, log)
+    store.ingest_directory(os.path.dirname(first))
+    store.ingest_directory(os.path.dirname(second))
+    assert os.path.samefile(first, second)
+
+    if os.name != 'nt' and os.geteuid() != 0:
+        # an in-place write fails instead of changing the blob and the copy of the other suite
+        with pytest.raises(PermissionError):
+            open(second, 'r+b')
+    assert not os.stat(first).st_mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+    with open(first, 'rb') as log_file:
+        assert log_file.read() == log
+
+
+def test_retention_deletes_runs_with_read_only_links(tmp_path, store):
+    from generic_utils.retention_util import _delete_run
+    run = str(tmp_path / 'suite_2026-01-01_10-00-00')
+    write(os.path.join(run, 'test_1', 'kit.log'), os.urandom(SIZE))
+    store.ingest_directory(os.path.join(run, 'test_1'))
+
+    _delete_run({'archived': False, 'path': run})
+
+    assert not os.path.exists(run)
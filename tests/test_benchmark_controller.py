@@ -0,0 +1,82 @@
+'''Benchmark repeats that fail inside the runner loop still end in a finalized benchmark'''
+
+# Standard library imports
+import json
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+from fwk.shared.variables_util import varc
+from fwk.runners.benchmark_controller import BenchmarkController, _is_inside
+from generic_utils.result_store_util import ResultStore
+
+map2sim_runner = pytest.importorskip('fwk.runners.map2sim_runner')
+
+
+def test_is_inside(tmp_path):
+    assert _is_inside(str(tmp_path / 'test' / 'logs'), str(tmp_path / 'test'))
+    assert _is_inside(str(tmp_path / 'test'), str(tmp_path / 'test'))
+    assert not _is_inside(str(tmp_path / 'test_other'), str(tmp_path / 'test'))
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    monkeypatch.setattr(varc, 'test_attempts', {}, raising=False)
+    monkeypatch.setattr(varc, 'component', 'MAP2SIM', raising=False)
+    monkeypatch.setattr(varc, 'test_suite_path', str(tmp_path), raising=False)
+    monkeypatch.setattr(map2sim_runner.UploadQueue, 'enqueue_test', staticmethod(lambda test_dict: None))
+    monkeypatch.setattr(map2sim_runner.FlakinessMethods, 'max_attempts', staticmethod(lambda test_dict: 2))
+    ResultStore(str(tmp_path)).create({})
+    runner = map2sim_runner.MAP2SIMRunner()
+    runner.benchmark_controller = BenchmarkController(repeats=3)
+    monkeypatch.setattr(runner, '_generate_reports', lambda test_dict: None)
+    return runner
+
+
+def make_test(tmp_path):
+    test_path = tmp_path / 'bench'
+    return {
+        'name': 'bench', 'updated_name': 'bench', 'type': 'MAP2SIM', 'verdicts': {}, 'subtest_dict': {},
+        'execution_metrics': {}, 'test_path': str(test_path), 'logs_path': str(test_path / 'logs'),
+    }
+
+
+def scripted(runner, outcomes):
+    '''execute_test replacement: PASS, RETRY or an exception per attempt, in order'''
+    def execute_test(test_dict, result):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        test_dict['verdicts']['final-verdict'] = outcome
+        test_dict['execution_metrics']['launch_time'] = 10.0
+        result.status = map2sim_runner.TestStatus.RETRY if outcome == 'RETRY' else map2sim_runner.TestStatus.COMPLETED
+    runner.execute_test = execute_test
+
+
+@pytest.mark.parametrize('failure', [[RuntimeError('kit crashed')], ['RETRY', 'RETRY']], ids=['exception', 'retries-exhausted'])
+def test_failed_repeat_is_recorded_and_the_repeats_continue(runner, tmp_path, failure):
+    test_dict = make_test(tmp_path)
+    scripted(runner, ['PASS'] + failure + ['PASS'])
+
+    runner.run_tests([test_dict])
+
+    assert 'benchmark' not in test_dict
+    assert test_dict['logs_path'] == str(tmp_path / 'bench' / 'logs')
+    with open(os.path.join(test_dict['test_path'], 'benchmark_summary.json')) as summary_file:
+        summary = json.load(summary_file)
+    assert [sample['verdict'] == 'PASS' for sample in summary['repeats']] == [True, False, True]
+    assert summary['settings']['failed_repeats'] == [1]
+    assert summary['stats']['launch_time']['n'] == 2
+
+
+def test_failed_last_repeat_finalizes(runner, tmp_path):
+    test_dict = make_test(tmp_path)
+    scripted(runner, ['PASS', 'PASS', RuntimeError('kit crashed')])
+
+    runner.run_tests([test_dict])
+
+    assert 'benchmark' not in test_dict
+    assert test_dict['verdicts']['final-verdict'] == 'FAIL'
+    assert os.path.exists(os.path.join(test_dict['test_path'], 'benchmark_summary.json'))
@@ -0,0 +1,69 @@
+'''Self time of DMFProfiler spans across threads'''
+
+# Standard library imports
+import time
+import threading
+
+# Local imports
+from fwk.fwk_profiler.fwk_profiling import DMFProfiler
+
+
+def rows_by_name():
+    return {row[0]: row for row in DMFProfiler.summary_rows()}
+
+
+def run_in_threads(name, count, seconds):
+    def work():
+        with DMFProfiler.span(name):
+            time.sleep(seconds)
+    threads = [threading.Thread(target=work) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_span_waiting_for_another_thread_has_no_self_time_for_the_wait(tmp_path):
+    DMFProfiler.enable(str(tmp_path))
+    try:
+        with DMFProfiler.span('map2sim_runner'):
+            time.sleep(0.05)
+            run_in_threads('Kit scenario', 1, 0.3)
+            with DMFProfiler.span('analysis'):
+                time.sleep(0.05)
+    finally:
+        DMFProfiler._enabled = False
+
+    rows = rows_by_name()
+    assert rows['Kit scenario'][3] >= 0.29
+    # 0.35s of the runner's 0.4s are the Kit thread and its own child span
+    assert 0.04 <= rows['map2sim_runner'][3] < 0.1
+    assert rows['map2sim_runner'][2] >= 0.4
+
+
+def test_parallel_child_threads_are_subtracted_once(tmp_path):
+    DMFProfiler.enable(str(tmp_path))
+    try:
+        with DMFProfiler.span('upload'):
+            run_in_threads('worker', 3, 0.2)
+    finally:
+        DMFProfiler._enabled = False
+
+    rows = rows_by_name()
+    assert rows['worker'][1] == 3
+    assert 0.0 <= rows['upload'][3] < 0.05
+
+
+def test_spans_of_the_same_thread_keep_their_self_time(tmp_path):
+    DMFProfiler.enable(str(tmp_path))
+    try:
+        with DMFProfiler.span('outer'):
+            time.sleep(0.05)
+            with DMFProfiler.span('inner'):
+                time.sleep(0.1)
+    finally:
+        DMFProfiler._enabled = False
+
+    rows = rows_by_name()
+    assert 0.04 <= rows['outer'][3] < 0.09
+    assert rows['inner'][3] >= 0.09
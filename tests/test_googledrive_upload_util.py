@@ -0,0 +1,113 @@
+'''Google Drive uploads deduplicated through the artifact store, on FakeDriveBackend'''
+
+# Standard library imports
+import os
+
+# Third party imports
+import pytest
+
+# Local imports
+from fwk.shared.variables_util import varc
+from generic_utils.artifact_store_util import ArtifactStore
+from generic_utils.googledrive_upload_util import DriveUploader, FakeDriveBackend, ARTIFACT_STORE_REMOTE
+
+SIZE = 128 * 1024
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as data_file:
+        data_file.write(data)
+
+
+def make_suite(root, name, log):
+    '''Suite folder with one test: a log above the store threshold and a small report'''
+    suite = os.path.join(root, name)
+    write(os.path.join(suite, 'test_1', 'logs', 'kit.log'), log)
+    write(os.path.join(suite, 'test_1', 'report.json'), name.encode())
+    return suite
+
+
+def upload(backend, store, suite, parent_id):
+    store.ingest_directory(os.path.join(suite, 'test_1'))
+    return DriveUploader(backend, workers=2, store=store).upload(suite, parent_id, os.path.basename(suite))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(str(tmp_path / 'store'))
+
+
+def test_known_content_is_copied_into_the_new_folder(tmp_path, store):
+    log = os.urandom(SIZE)
+    backend = FakeDriveBackend()
+    first = upload(backend, store, make_suite(str(tmp_path), 'suite_1', log), 'parent')
+    received = backend.bytes_received
+
+    second = upload(backend, store, make_suite(str(tmp_path), 'suite_2', log), 'other_parent')
+
+    assert (second['uploaded'], second['deduplicated'], backend.copies) == (first['uploaded'] - 1, 1, 1)
+    assert backend.bytes_received - received < SIZE
+    # the second suite folder is complete on the drive
+    uploaded = backend.tree(second['root_id'])
+    assert (uploaded['test_1/logs/kit.log'], uploaded['test_1/report.json']) == (log, b'suite_2')
+    assert set(uploaded) == set(backend.tree(first['root_id']))
+
+
+def test_deleted_copy_is_uploaded_again(tmp_path, store):
+    log = os.urandom(SIZE)
+    backend = FakeDriveBackend()
+    upload(backend, store, make_suite(str(tmp_path), 'suite_1', log), 'parent')
+    digest = store.manifest_digest(os.path.join(str(tmp_path), 'suite_1', 'test_1', 'logs', 'kit.log'))
+    deleted_id = store.remote_id(ARTIFACT_STORE_REMOTE, digest)
+    del backend.items[deleted_id]
+
+    summary = upload(backend, store, make_suite(str(tmp_path), 'suite_2', log), 'parent')
+
+    assert (summary['deduplicated'], backend.copies) == (0, 0)
+    assert backend.tree(summary['root_id'])['test_1/logs/kit.log'] == log
+    new_id = store.remote_id(ARTIFACT_STORE_REMOTE, digest)
+    assert new_id not in (None, deleted_id) and backend.items[new_id]['data'] == log
+
+
+def test_queued_test_folders_are_ingested_before_upload(tmp_path, monkeypatch):
+    pytest.importorskip('numpy')  # enqueue_test waits for the plots of PlotWorker
+    upload_queue_util = pytest.importorskip('generic_utils.upload_queue_util')
+    UploadQueue = upload_queue_util.UploadQueue
+    log = os.urandom(SIZE)
+    suite = str(tmp_path / 'suite')
+    for name in ('test_1', 'test_2'):
+        write(os.path.join(suite, name, 'logs', 'kit.log'), log)
+    monkeypatch.setattr(varc, 'artifact_store_path', str(tmp_path / 'store'), raising=False)
+    monkeypatch.setattr(varc, 'test_suite_path', suite, raising=False)
+    backend = FakeDriveBackend()
+    settings = dict(upload_queue_util.UPLOAD_QUEUE_DEFAULTS, enabled=True, workers=1)
+
+    assert UploadQueue.start(backend=backend, parent_id='parent', db_path=str(tmp_path / 'queue.db'), settings=settings)
+    try:
+        UploadQueue.enqueue_test({'name': 'test_1', 'test_path': os.path.join(suite, 'test_1')})
+        assert UploadQueue.wait_for_pending(30)
+        UploadQueue.enqueue_test({'name': 'test_2', 'test_path': os.path.join(suite, 'test_2')})
+        assert UploadQueue.wait_for_pending(30)
+    finally:
+        UploadQueue.stop(timeout=10)
+
+    assert backend.copies == 1
+    assert SIZE <= backend.bytes_received < 2 * SIZE
+    assert ArtifactStore.manifest_is_current(os.path.join(suite, 'test_2'))
+
+
+def test_backends_must_implement_every_drive_operation():
+    from generic_utils.googledrive_upload_util import DriveBackend
+
+    class UploadOnlyBackend(DriveBackend):
+        def create_folders(self, folders):
+            return []
+
+        def upload_file(self, file_path, name, parent_id, resume_uri=None, on_progress=None):
+            return 'id'
+
+    with pytest.raises(TypeError):
+        UploadOnlyBackend()
+    with pytest.raises(TypeError):
+        DriveBackend()
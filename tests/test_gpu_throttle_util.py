@@ -0,0 +1,125 @@
+'''GPU throttle detection driven by FakeNvmlBackend'''
+
+# Standard library imports
+import json
+
+# Third party imports
+import pytest
+
+# Local imports
+from analysis_utils.gpu_throttle_util import (
+    FakeNvmlBackend, GpuThrottleMonitor, VALID, UNKNOWN, decode_throttle_reasons
+)
+
+NORMAL = {'throttle-mask': 0x0, 'sm-clock-mhz': 1980, 'temperature-c': 60, 'power-w': 250.0, 'power-limit-w': 450.0}
+IDLE = dict(NORMAL, **{'throttle-mask': 0x1})
+THERMAL = dict(NORMAL, **{'throttle-mask': 0x40, 'sm-clock-mhz': 1200, 'temperature-c': 91})
+POWER = dict(NORMAL, **{'throttle-mask': 0x4, 'sm-clock-mhz': 1500})
+
+
+def make_monitor(tmp_path, scripts):
+    test_dict = {'name': 'test_fake', 'subtest_dict': {}}
+    return GpuThrottleMonitor(str(tmp_path / 'test_fake'), test_dict, backend=FakeNvmlBackend(scripts), interval=0.01)
+
+
+def sample(monitor, timestamps):
+    monitor.backend.init()
+    monitor.available = True
+    for timestamp in timestamps:
+        monitor.sample_once(timestamp)
+
+
+def test_decode_throttle_reasons():
+    assert decode_throttle_reasons(0x40 | 0x4) == ['sw_power_cap', 'hw_thermal_slowdown']
+    assert decode_throttle_reasons(0) == []
+
+
+def test_throttle_interval_is_detected(tmp_path):
+    monitor = make_monitor(tmp_path, [[NORMAL, THERMAL, THERMAL, NORMAL, NORMAL]])
+    sample(monitor, [100, 101, 102, 103, 104])
+
+    assert monitor.throttle_intervals() == [
+        {'gpu': 0, 'start': 101, 'end': 103, 'duration-s': 2, 'reasons': ['hw_thermal_slowdown']}
+    ]
+    assert [item['throttled'] for item in monitor.samples] == [[], ['hw_thermal_slowdown'], ['hw_thermal_slowdown'], [], []]
+
+
+def test_benign_reasons_are_not_throttling(tmp_path):
+    monitor = make_monitor(tmp_path, [[NORMAL, IDLE, IDLE, NORMAL]])
+    sample(monitor, [100, 101, 102, 103])
+
+    assert monitor.throttle_intervals() == []
+    assert monitor.validity(100, 103) == VALID
+
+
+def test_intervals_are_tracked_per_gpu(tmp_path):
+    monitor = make_monitor(tmp_path, [[NORMAL, NORMAL, NORMAL], [POWER, POWER, NORMAL]])
+    sample(monitor, [100, 101, 102])
+
+    intervals = monitor.throttle_intervals()
+    assert [(item['gpu'], item['start'], item['end'], item['reasons']) for item in intervals] == [
+        (1, 100, 102, ['sw_power_cap'])
+    ]
+
+
+def test_validity_of_measurement_windows(tmp_path):
+    monitor = make_monitor(tmp_path, [[NORMAL, NORMAL, THERMAL, NORMAL, POWER, NORMAL]])
+    sample(monitor, [100, 110, 120, 130, 140, 150])
+
+    assert monitor.validity(100, 115) == VALID
+    assert monitor.validity(100, 125) == 'THROTTLED: hw_thermal_slowdown'
+    assert monitor.validity(135, 160) == 'THROTTLED: sw_power_cap'
+    assert monitor.validity(100, 160) == 'THROTTLED: hw_thermal_slowdown, sw_power_cap'
+
+
+def test_attach_validity_flags_each_metric(tmp_path):
+    monitor = make_monitor(tmp_path, [[NORMAL, NORMAL, THERMAL, NORMAL]])
+    sample(monitor, [100, 110, 120, 130])
+    metrics = {'launch_time': 15.0, 'total_execution_time': 40.0, 'fps': 55.5, 'label': 'x'}
+
+    monitor.attach_validity(metrics, 100)
+
+    assert metrics['performance_validity'] == {
+        'launch_time': VALID,
+        'total_execution_time': 'THROTTLED: hw_thermal_slowdown',
+        'fps': 'THROTTLED: hw_thermal_slowdown',
+    }
+
+
+def test_validity_is_unknown_without_monitoring(tmp_path):
+    monitor = GpuThrottleMonitor(str(tmp_path / 'test_fake'), {'name': 'test_fake', 'subtest_dict': {}}, backend=None)
+    metrics = {'launch_time': 5.0, 'total_execution_time': 10.0}
+
+    monitor.start()
+    monitor.stop()
+    monitor.attach_validity(metrics, 100)
+
+    assert set(metrics['performance_validity'].values()) == {UNKNOWN}
+
+
+def test_start_stop_saves_intervals_and_flags_the_test(tmp_path):
+    monitor = make_monitor(tmp_path, [[THERMAL]])
+    monitor.start()
+    monitor._stop_event.wait(0.05)
+    monitor.stop()
+
+    with open(tmp_path / 'test_fake_gpu_throttle.json') as json_file:
+        saved = json.load(json_file)
+    assert saved['intervals'] and saved['samples']
+    assert 'hw_thermal_slowdown' in monitor.test_dict['subtest_dict']['gpu-throttle-test']
+    assert not monitor._thread.is_alive()
+
+
+def test_runner_stops_the_monitor_and_attaches_validity(tmp_path):
+    # command_runner_util needs psutil and the recorder dependencies
+    CommandRunnerMethods = pytest.importorskip('generic_utils.command_runner_util').CommandRunnerMethods
+
+    class Result:
+        metrics = {'launch_time': 1.0, 'total_execution_time': 2.0}
+
+    monitor = make_monitor(tmp_path, [[NORMAL]])
+    monitor.start()
+    CommandRunnerMethods._stop_run_monitors(monitor.test_dict, Result, 100, gpu_monitor=monitor)
+
+    assert not monitor._thread.is_alive()
+    assert Result.metrics['performance_validity']['launch_time'] == VALID
@@ -0,0 +1,69 @@
+'''junit.xml after the suite-end perf regression gate and quarantine'''
+
+# Standard library imports
+import xml.etree.ElementTree as ET
+
+# Third party imports
+import pytest
+
+# Local imports
+from fwk.shared.variables_util import varc
+from generic_utils.result_store_util import ResultStore
+from generic_utils.junit_report_util import JUnitReporter
+
+
+@pytest.fixture
+def suite(tmp_path, monkeypatch):
+    monkeypatch.setattr(varc, 'test_attempts', {}, raising=False)
+    monkeypatch.setattr(varc, 'test_suite_name', 'suite', raising=False)
+    monkeypatch.setattr(varc, 'component', 'MAP2SIM', raising=False)
+    ResultStore(str(tmp_path)).create({})
+    JUnitReporter.start(str(tmp_path))
+    return tmp_path
+
+
+def add(suite, name, verdict):
+    test_dict = {'name': name, 'updated_name': name, 'type': 'MAP2SIM'}
+    report_data = {'final_verdict': verdict, 'execution_metrics': {'total_execution_time': 1.0}}
+    ResultStore(str(suite)).append_test(name, report_data, "")
+    JUnitReporter.add_test(test_dict, report_data)
+
+
+def read(suite):
+    return ET.parse(str(suite / 'junit.xml')).getroot().find('testsuite')
+
+
+def test_suite_end_verdicts_reach_junit(suite):
+    add(suite, 'fast', 'PASS')
+    add(suite, 'flaky', 'FAIL')
+    add(suite, 'stable', 'PASS')
+    assert read(suite).get('failures') == '1'
+
+    store = ResultStore(str(suite))
+    store.append_update('fast', {'final_verdict': 'PERF_REGRESSION'})
+    store.append_update('flaky', {'final_verdict': 'QUARANTINED', 'flakiness': {'flip-rate': 0.8}})
+    JUnitReporter.refresh()
+
+    testsuite = read(suite)
+    assert (testsuite.get('tests'), testsuite.get('failures'), testsuite.get('skipped')) == ('3', '1', '1')
+    testcases = {testcase.get('name'): testcase for testcase in testsuite.iter('testcase')}
+    assert testcases['fast'].find('failure').get('type') == 'PERF_REGRESSION'
+    assert testcases['flaky'].find('skipped') is not None
+    assert testcases['flaky'].find("properties/property[@name='flip_rate']").get('value') == '0.8'
+    assert len(testcases['stable']) == 1  # properties only, still passing
+
+
+def test_retried_test_is_reported_once_with_its_last_attempt(suite):
+    add(suite, 'flaky', 'FAIL')
+    varc.test_attempts['flaky'] = [{'verdict': 'FAIL'}]
+    add(suite, 'flaky', 'PASS')
+
+    testsuite = read(suite)
+    assert (testsuite.get('tests'), testsuite.get('failures')) == ('1', '0')
+    testcase = testsuite.find('testcase')
+    assert testcase.find('failure') is None
+    assert testcase.find("properties/property[@name='retries']").get('value') == '1'
+
+    ResultStore(str(suite)).append_update('flaky', {'final_verdict': 'PERF_REGRESSION'})
+    JUnitReporter.refresh()
+    assert (read(suite).get('tests'), read(suite).get('failures')) == ('1', '1')
@@ -0,0 +1,70 @@
+'''Prometheus exposition of the DMF metrics registry'''
+
+# Third party imports
+import pytest
+
+# Local imports
+from fwk.shared.variables_util import varc
+from generic_utils.metrics_registry_util import (
+    MetricsRegistry, Counter, Gauge, Histogram, TESTS_TOTAL, LAUNCH_TIME, LOG_CLASSIFICATIONS_TOTAL
+)
+
+parser = pytest.importorskip('prometheus_client.parser')
+
+
+def families():
+    return {family.name: family for family in parser.text_string_to_metric_families(MetricsRegistry.render())}
+
+
+def samples(family, name):
+    return {tuple(sorted(sample.labels.items())): sample.value for sample in family.samples if sample.name == name}
+
+
+def test_rendered_registry_parses(monkeypatch):
+    for metric in (TESTS_TOTAL, LAUNCH_TIME):
+        metric.clear()
+    TESTS_TOTAL.inc(component='MAP2SIM', type='SIM', verdict='PASS')
+    TESTS_TOTAL.inc(2, component='MAP2SIM', type='SIM', verdict='FAIL "quoted"\nsecond line')
+    LAUNCH_TIME.observe(12.5, component='MAP2SIM', type='SIM')
+    LAUNCH_TIME.observe(400, component='MAP2SIM', type='SIM')
+
+    parsed = families()
+
+    # the parser strips the _total suffix from counter family names
+    tests_total = samples(parsed['dmf_tests'], 'dmf_tests_total')
+    assert tests_total[(('component', 'MAP2SIM'), ('type', 'SIM'), ('verdict', 'PASS'))] == 1
+    assert tests_total[(('component', 'MAP2SIM'), ('type', 'SIM'), ('verdict', 'FAIL "quoted"\nsecond line'))] == 2
+
+    launch = parsed['dmf_launch_time_seconds']
+    assert launch.type == 'histogram'
+    buckets = {sample.labels['le']: sample.value for sample in launch.samples if sample.name.endswith('_bucket')}
+    assert buckets['+Inf'] == 2
+    assert sorted(buckets.values()) == list(buckets.values())  # cumulative
+    assert samples(launch, 'dmf_launch_time_seconds_sum')[(('component', 'MAP2SIM'), ('type', 'SIM'))] == 412.5
+    assert {name for name in parsed} >= {'dmf_queue_depth', 'dmf_upload_queue_pending', 'dmf_log_classifications'}
+
+
+def test_standalone_metric_types_parse():
+    text = "\n".join(metric.render() for metric in (
+        Counter('demo_events_total', 'Help with \\ backslash', ('kind',)),
+        Gauge('demo_level', 'Level'),
+        Histogram('demo_seconds', 'Seconds', buckets=(0.5, 1.0)),
+    )) + "\n"
+    parsed = {family.name: family for family in parser.text_string_to_metric_families(text)}
+    assert parsed['demo_events'].documentation == 'Help with \\ backslash'
+    assert (parsed['demo_level'].type, parsed['demo_seconds'].type) == ('gauge', 'histogram')
+
+
+def test_kit_log_classification_is_counted(tmp_path, monkeypatch):
+    validate_logs_util = pytest.importorskip('analysis_utils.validate_logs_util')
+    monkeypatch.setattr(varc, 'component', 'DSRS', raising=False)
+    monkeypatch.setattr(varc, 'p1_list', ['[Error]'], raising=False)
+    LOG_CLASSIFICATIONS_TOTAL.clear()
+    kit_log = tmp_path / 'kit.log'
+    kit_log.write_text("[Info] started\n[Error] shader compile failed\n")
+
+    result = validate_logs_util.ValidateLogsMethod.analyze_kit_logs(str(kit_log), {'name': 'test'})
+
+    assert result['severity'] == 'p1'
+    counts = samples(families()['dmf_log_classifications'], 'dmf_log_classifications_total')
+    assert counts == {(('component', 'DSRS'), ('log', 'kit'), ('severity', 'p1')): 1}
@@ -0,0 +1,45 @@
+'''Outputs retention: incremental scan and the retention plan'''
+
+# Standard library imports
+import os
+import json
+
+# Local imports
+from fwk.shared.constants import RESULT_STORE_FILE_NAME, RETENTION_DEFAULTS
+from generic_utils.retention_util import scan_outputs, plan_retention, GB, DAY
+
+RUN = 'suite_2026-01-01_10-00-00'
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as data_file:
+        data_file.write(data)
+
+
+def test_files_added_below_a_test_folder_rescan_the_run(tmp_path):
+    outputs = str(tmp_path)
+    write(os.path.join(outputs, RUN, RESULT_STORE_FILE_NAME),
+          json.dumps({'type': 'test', 'name': 'test_1', 'data': {'final_verdict': 'PASS'}}) + '\n')
+    write(os.path.join(outputs, RUN, 'test_1', 'plots', 'vram.png'), 'x')
+    runs, stats = scan_outputs(outputs)
+    assert (stats['rescanned'], runs[0]['files']) == (1, 2)
+
+    assert scan_outputs(outputs)[1]['rescanned'] == 0
+
+    write(os.path.join(outputs, RUN, 'test_1', 'plots', 'late.png'), 'x')
+    runs, stats = scan_outputs(outputs)
+    assert (stats['rescanned'], runs[0]['files']) == (1, 3)
+
+
+def test_budget_deletes_failed_runs_past_keep_failed_days_by_age(tmp_path):
+    now = 100 * DAY
+    runs = [{'name': name, 'suite': 'suite', 'path': str(tmp_path / name), 'archived': False, 'size': GB,
+             'started': now - age * DAY, 'failed': failed}
+            for name, age, failed in [('newest', 0, False), ('young_failed', 2, True), ('passed', 5, False), ('old_failed', 20, True)]]
+    policy = dict(RETENTION_DEFAULTS, keep_last_runs=1, compress_after_days=0, delete_after_days=0, max_total_gb=3)
+
+    plan = {decision['name']: decision for decision in plan_retention(runs, policy, now=now)}
+
+    assert [name for name, decision in plan.items() if decision['action'] == 'delete'] == ['old_failed']
+    assert plan['young_failed']['reason'].startswith('failed tests')
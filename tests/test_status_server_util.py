@@ -0,0 +1,66 @@
+'''Live status of a suite whose tests are retried, driven through the MAP2SIM runner loop'''
+
+# Third party imports
+import pytest
+
+# Local imports
+from fwk.shared.variables_util import varc
+from generic_utils.status_server_util import RunStatus
+
+map2sim_runner = pytest.importorskip('fwk.runners.map2sim_runner')
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(varc, 'test_attempts', {}, raising=False)
+    monkeypatch.setattr(varc, 'component', 'MAP2SIM', raising=False)
+    monkeypatch.setattr(varc, 'test_suite_name', 'suite', raising=False)
+    monkeypatch.setattr(map2sim_runner.UploadQueue, 'enqueue_test', staticmethod(lambda test_dict: None))
+    monkeypatch.setattr(map2sim_runner.FlakinessMethods, 'max_attempts', staticmethod(lambda test_dict: 3))
+    runner = map2sim_runner.MAP2SIMRunner()
+    monkeypatch.setattr(runner, '_generate_reports', lambda test_dict: None)
+    return runner
+
+
+def fake_execute(verdicts):
+    '''execute_test replacement returning the scripted verdicts of every test, one per attempt'''
+    def execute_test(test_dict, result):
+        verdict = verdicts[test_dict['name']].pop(0)
+        test_dict['verdicts']['final-verdict'] = verdict
+        if verdict == 'RETRY':
+            result.status = map2sim_runner.TestStatus.RETRY
+        elif verdict == 'PASS':
+            result.status = map2sim_runner.TestStatus.COMPLETED
+        else:
+            result.status = map2sim_runner.TestStatus.FAILED
+    return execute_test
+
+
+def make_tests(*names):
+    return [{'name': name, 'updated_name': name, 'type': 'MAP2SIM', 'verdicts': {}, 'subtest_dict': {}} for name in names]
+
+
+def test_retried_test_is_counted_once_with_its_final_verdict(runner, monkeypatch):
+    monkeypatch.setattr(runner, 'execute_test', fake_execute({'flaky': ['RETRY', 'RETRY', 'PASS'], 'broken': ['FAIL']}))
+    tests = make_tests('flaky', 'broken')
+    RunStatus.start_suite([test['name'] for test in tests])
+
+    runner.run_tests(tests)
+
+    status = RunStatus.snapshot()
+    assert status['tests'] == {'finished': 2, 'running': 0, 'queued': 0}
+    finished = {item['name']: item for item in status['finished']}
+    assert (finished['flaky']['verdict'], finished['flaky']['attempt']) == ('PASS', 3)
+    assert finished['broken']['verdict'] == 'FAIL'
+
+
+def test_retry_is_not_finished_while_the_next_attempt_runs():
+    test_dict = make_tests('flaky')[0]
+    RunStatus.start_suite(['flaky'])
+    RunStatus.test_started(test_dict, 1)
+    RunStatus.test_finished(test_dict, 'RETRY')
+    RunStatus.test_started(test_dict, 2)
+
+    status = RunStatus.snapshot()
+    assert status['tests']['finished'] == 0
+    assert status['current']['attempt'] == 2
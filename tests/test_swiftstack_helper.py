@@ -0,0 +1,182 @@
+'''SwiftStack helper against an in-memory S3 client'''
+
+# Standard library imports
+import hashlib
+import threading
+
+# Third party imports
+import pytest
+
+botocore_exceptions = pytest.importorskip('botocore.exceptions')
+swiftstack_helper = pytest.importorskip('omniui.utils.swiftstack_helper')
+
+BUCKET = 'bucket'
+
+
+class FakeS3:
+    '''The part of the boto3 S3 client used by SwiftStackHelper, backed by a dict; counts requests by kind'''
+
+    def __init__(self, objects=None, page_size=1000):
+        self.objects = dict(objects or {})
+        self.page_size = page_size
+        self.requests = {'head': 0, 'list': 0, 'get': 0, 'put': 0}
+        self.prefixes = []
+        self.head_error = None
+        self._lock = threading.Lock()
+
+    def _count(self, kind):
+        with self._lock:
+            self.requests[kind] += 1
+
+    def head_object(self, Bucket, Key):
+        self._count('head')
+        if self.head_error:
+            raise botocore_exceptions.ClientError({'Error': {'Code': self.head_error}}, 'HeadObject')
+        if Key not in self.objects:
+            raise botocore_exceptions.ClientError(
+                {'Error': {'Code': '404'}, 'ResponseMetadata': {'HTTPStatusCode': 404}}, 'HeadObject')
+        return {'ContentLength': len(self.objects[Key])}
+
+    def list_objects_v2(self, Bucket, Prefix='', ContinuationToken=None, MaxKeys=None):
+        self._count('list')
+        self.prefixes.append(Prefix)
+        keys = sorted(key for key in self.objects if key.startswith(Prefix))
+        start = int(ContinuationToken or 0)
+        page = keys[start:start + (MaxKeys or self.page_size)]
+        response = {
+            'KeyCount': len(page),
+            'IsTruncated': start + len(page) < len(keys),
+            'NextContinuationToken': str(start + len(page)),
+        }
+        if page:
+            response['Contents'] = [{'Key': key, 'Size': len(self.objects[key]),
+                                     'ETag': f'"{hashlib.md5(self.objects[key]).hexdigest()}"'} for key in page]
+        return response
+
+    def put_object(self, Bucket, Key, Body):
+        self._count('put')
+        self.objects[Key] = Body
+
+    def download_file(self, Bucket, Key, Filename, Callback=None, Config=None):
+        self._count('get')
+        with open(Filename, 'wb') as data_file:
+            data_file.write(self.objects[Key])
+        if Callback:
+            Callback(len(self.objects[Key]))
+
+    def upload_file(self, Filename, Bucket, Key, Callback=None, Config=None):
+        self._count('put')
+        with open(Filename, 'rb') as data_file:
+            self.objects[Key] = data_file.read()
+        if Callback:
+            Callback(len(self.objects[Key]))
+
+
+def make_helper(client):
+    '''SwiftStackHelper on the fake client, without the connection check of __init__'''
+    helper = swiftstack_helper.SwiftStackHelper.__new__(swiftstack_helper.SwiftStackHelper)
+    helper.s3 = client
+    helper.transfer = swiftstack_helper.TransferManager(client, max_workers=4)
+    helper.known_keys = swiftstack_helper.KeyCache()
+    return helper
+
+
+@pytest.mark.parametrize('key, folder, expected', [
+    ('golden/test_1/image.png', 'golden/test_1', 'image.png'),
+    ('golden/test_1/image.png', 'golden/test_1/', 'image.png'),
+    ('golden/test_1/image.png', '/golden/test_1/', 'image.png'),
+    ('golden/test_1/sub/image.png', 'golden', 'test_1/sub/image.png'),
+    ('golden/test_10/image.png', 'golden/test_1', None),
+    ('golden/test_1', 'golden/test_1', None),
+    ('other/image.png', 'golden', None),
+    ('/image.png', '', 'image.png'),
+    ('golden/image.png', '/', 'golden/image.png'),
+])
+def test_relative_key(key, folder, expected):
+    assert swiftstack_helper.relative_key(key, folder) == expected
+
+
+def test_keys_exist_small_batch_uses_cached_heads():
+    client = FakeS3({'golden/a.png': b'a', 'golden/b.png': b'b'})
+    helper = make_helper(client)
+
+    result = helper.keys_exist(BUCKET, ['golden/a.png', 'golden/missing.png', 'golden/b.png', 'golden/a.png'])
+
+    assert result == {'golden/a.png': True, 'golden/missing.png': False, 'golden/b.png': True}
+    assert client.requests['head'] == 3 and client.requests['list'] == 0
+
+    # answered from the cache until the entries expire
+    assert helper.keys_exist(BUCKET, ['golden/a.png', 'golden/missing.png']) == {'golden/a.png': True, 'golden/missing.png': False}
+    assert client.requests['head'] == 3
+    helper.known_keys.ttl = 0
+    helper.known_keys.put(BUCKET, 'golden/a.png', True)
+    helper.keys_exist(BUCKET, ['golden/a.png'])
+    assert client.requests['head'] == 4
+
+
+def test_head_errors_other_than_not_found_are_raised():
+    client = FakeS3({'golden/a.png': b'a'})
+    client.head_error = 'AccessDenied'
+    with pytest.raises(botocore_exceptions.ClientError):
+        make_helper(client).keys_exist(BUCKET, ['golden/a.png'])
+
+
+def test_keys_exist_large_batch_lists_the_prefix_of_each_folder():
+    limit = swiftstack_helper.EXISTENCE_HEAD_LIMIT
+    existing = {f'golden/test_1/image_{index:03d}.png': b'' for index in range(limit)}
+    existing.update({f'renders/test_1/frame_{index:03d}.png': b'' for index in range(10)})
+    # objects outside the checked prefixes must not be listed
+    existing.update({f'golden/other/image_{index:03d}.png': b'' for index in range(50)})
+    client = FakeS3(existing, page_size=16)
+    helper = make_helper(client)
+    keys = [key for key in existing if not key.startswith('golden/other/')] + \
+        ['golden/test_1/image_missing.png', 'renders/test_1/frame_missing.png']
+
+    result = helper.keys_exist(BUCKET, keys)
+
+    assert result == {key: key in existing for key in keys}
+    assert client.requests['head'] == 0
+    assert set(client.prefixes) == {'golden/test_1/image_', 'renders/test_1/frame_'}
+    # the golden prefix holds 64 keys, read in pages of 16
+    assert client.prefixes.count('golden/test_1/image_') == limit // 16
+    assert helper.keys_exist(BUCKET, keys[:3]) == {key: True for key in keys[:3]}
+    assert client.requests['head'] == 0
+
+
+def sync(helper, workspace, cache):
+    return helper.sync_folder(BUCKET, 'golden/test_1', str(workspace), cache)
+
+
+def counts(summary):
+    return {key: summary[key] for key in ('objects', 'unchanged', 'from_cache', 'downloaded', 'removed')}
+
+
+def test_sync_folder_transfers_only_what_changed(tmp_path):
+    object_cache = pytest.importorskip('omniui.utils.object_cache')
+    images = {f'golden/test_1/image_{index}.png': bytes([index]) * 1024 for index in range(4)}
+    client = FakeS3(dict(images, **{'golden/test_1/sub/depth.exr': b'depth', 'golden/test_10/other.png': b'other'}))
+    helper = make_helper(client)
+    cache = object_cache.ObjectCache(str(tmp_path / 'cache'))
+    workspace = tmp_path / 'workspace'
+
+    # cold sync: everything is downloaded, the sibling folder test_10 is not
+    assert counts(sync(helper, workspace, cache)) == {'objects': 5, 'unchanged': 0, 'from_cache': 0, 'downloaded': 5, 'removed': 0}
+    assert (workspace / 'sub' / 'depth.exr').read_bytes() == b'depth'
+    assert client.requests['get'] == 5
+
+    # repeat sync: a listing only
+    assert counts(sync(helper, workspace, cache)) == {'objects': 5, 'unchanged': 5, 'from_cache': 0, 'downloaded': 0, 'removed': 0}
+    assert client.requests['get'] == 5
+
+    # new workspace: served from the cache
+    assert counts(sync(helper, tmp_path / 'other_workspace', cache)) == {'objects': 5, 'unchanged': 0, 'from_cache': 5, 'downloaded': 0, 'removed': 0}
+    assert client.requests['get'] == 5
+
+    # a changed image is downloaded again, a deleted one and a stray local file are removed
+    client.objects['golden/test_1/image_0.png'] = b'changed'
+    del client.objects['golden/test_1/image_1.png']
+    (workspace / 'stray.png').write_bytes(b'stray')
+    assert counts(sync(helper, workspace, cache)) == {'objects': 4, 'unchanged': 3, 'from_cache': 0, 'downloaded': 1, 'removed': 2}
+    assert client.requests['get'] == 6
+    assert (workspace / 'image_0.png').read_bytes() == b'changed'
+    assert sorted(path.name for path in workspace.rglob('*.png')) == ['image_0.png', 'image_2.png', 'image_3.png']
@@ -0,0 +1,106 @@
+'''Incremental tree mirror: placement methods and change detection'''
+
+# Standard library imports
+import os
+import errno
+
+# Third party imports
+import pytest
+
+# Local imports
+from generic_utils import tree_sync_util
+from generic_utils.tree_sync_util import sync_tree
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as data_file:
+        data_file.write(data)
+
+
+def inode(path):
+    return os.stat(path).st_ino
+
+
+def test_reflink_mirror_replaces_hardlinks_of_earlier_syncs(tmp_path):
+    source, destination = str(tmp_path / 'source'), str(tmp_path / 'destination')
+    write(os.path.join(source, 'images', 'frame.png'), b'frame')
+    sync_tree(source, destination)
+    assert inode(os.path.join(destination, 'images', 'frame.png')) == inode(os.path.join(source, 'images', 'frame.png'))
+
+    stats = sync_tree(source, destination, method='reflink')
+
+    assert stats['linked'] == 0 and stats['reflinked'] + stats['copied'] == 1
+    assert inode(os.path.join(destination, 'images', 'frame.png')) != inode(os.path.join(source, 'images', 'frame.png'))
+    # the source is rewritten in place, the snapshot keeps its content
+    with open(os.path.join(source, 'images', 'frame.png'), 'r+b') as data_file:
+        data_file.write(b'FRAME')
+    with open(os.path.join(destination, 'images', 'frame.png'), 'rb') as data_file:
+        assert data_file.read() == b'frame'
+
+
+def test_only_changed_and_new_files_are_placed_and_deleted_ones_removed(tmp_path):
+    source, destination = str(tmp_path / 'source'), str(tmp_path / 'destination')
+    for index in range(20):
+        write(os.path.join(source, f"tiles/{index % 4}/tile_{index:02d}.bin"), os.urandom(256 + index))
+    first = sync_tree(source, destination, method='copy')
+    assert (first['files'], first['copied'], first['failed']) == (20, 20, [])
+
+    second = sync_tree(source, destination, method='copy', verify_hash=True)
+    assert (second['unchanged'], second['copied']) == (20, 0)
+
+    os.remove(os.path.join(source, 'tiles/1/tile_01.bin'))
+    write(os.path.join(source, 'tiles/1/tile_01.bin'), b'changed')
+    write(os.path.join(source, 'tiles/new.bin'), b'new')
+    for name in os.listdir(os.path.join(source, 'tiles/3')):
+        os.remove(os.path.join(source, 'tiles/3', name))
+    os.rmdir(os.path.join(source, 'tiles/3'))
+
+    third = sync_tree(source, destination, method='copy')
+
+    assert (third['files'], third['unchanged'], third['copied'], third['removed']) == (16, 14, 2, 5)
+    assert not os.path.exists(os.path.join(destination, 'tiles/3'))
+    for root, _, names in os.walk(source):
+        for name in names:
+            relative = os.path.relpath(os.path.join(root, name), source)
+            with open(os.path.join(source, relative), 'rb') as left, open(os.path.join(destination, relative), 'rb') as right:
+                assert left.read() == right.read()
+
+
+def test_copies_keep_the_holes_of_sparse_files(tmp_path):
+    source, destination = str(tmp_path / 'source'), str(tmp_path / 'destination')
+    sparse_path = os.path.join(source, 'sparse.bin')
+    os.makedirs(source)
+    with open(sparse_path, 'wb') as data_file:
+        for offset in (0, 16 * 1024 * 1024):
+            data_file.seek(offset)
+            data_file.write(b'x' * 4096)
+        data_file.truncate(32 * 1024 * 1024)
+    if not hasattr(os, 'SEEK_DATA') or os.stat(sparse_path).st_blocks * 512 >= 1024 * 1024:
+        pytest.skip('file system without sparse files')
+
+    sync_tree(source, destination, method='copy')
+
+    copy_path = os.path.join(destination, 'sparse.bin')
+    assert os.path.getsize(copy_path) == 32 * 1024 * 1024
+    assert os.stat(copy_path).st_blocks * 512 < 1024 * 1024
+    with open(sparse_path, 'rb') as left, open(copy_path, 'rb') as right:
+        assert left.read() == right.read()
+
+
+def test_link_falls_back_to_a_copy(tmp_path, monkeypatch):
+    source, destination = str(tmp_path / 'source'), str(tmp_path / 'destination')
+    write(os.path.join(source, 'frame.png'), b'frame')
+
+    def cross_device(*args):
+        raise OSError(errno.EXDEV, 'cross-device link')
+
+    monkeypatch.setattr(os, 'link', cross_device)
+    monkeypatch.setattr(tree_sync_util, '_reflink', cross_device)
+
+    stats = sync_tree(source, destination)
+
+    assert (stats['linked'], stats['reflinked'], stats['copied'], stats['failed']) == (0, 0, 1, [])
+    assert inode(os.path.join(destination, 'frame.png')) != inode(os.path.join(source, 'frame.png'))
+    with open(os.path.join(destination, 'frame.png'), 'rb') as data_file:
+        assert data_file.read() == b'frame'
@@ -0,0 +1,85 @@
+'''Test folders are queued for upload only after their plots are rendered'''
+
+# Standard library imports
+import os
+import threading
+from concurrent.futures import Future
+
+# Third party imports
+import pytest
+
+# Local imports
+from fwk.shared.variables_util import varc
+from generic_utils.googledrive_upload_util import FakeDriveBackend
+
+pytest.importorskip('numpy')
+from analysis_utils.plot_worker_util import PlotWorker  # noqa: E402
+from generic_utils.upload_queue_util import UploadQueue, UploadQueueDB, UPLOAD_QUEUE_DEFAULTS  # noqa: E402
+
+
+def rendering_plot(png_path, delay=None):
+    '''Pending PlotWorker future for png_path that writes the png in two steps and finishes after delay (None: never)'''
+    future = Future()
+    future.png_path = os.path.abspath(png_path)
+    os.makedirs(os.path.dirname(png_path), exist_ok=True)
+    with open(png_path, 'wb') as png_file:
+        png_file.write(b'half')
+    PlotWorker._pending.append(future)
+
+    def finish():
+        with open(png_path, 'ab') as png_file:
+            png_file.write(b' and the rest')
+        future.set_result(png_path)
+
+    if delay is not None:
+        threading.Timer(delay, finish).start()
+    return future
+
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    suite = tmp_path / 'suite'
+    (suite / 'test_1').mkdir(parents=True)
+    (suite / 'test_1' / 'report.json').write_text('{}')
+    monkeypatch.setattr(varc, 'artifact_store_path', None, raising=False)
+    monkeypatch.setattr(varc, 'test_suite_path', str(suite), raising=False)
+    monkeypatch.setattr(PlotWorker, '_pending', [])
+    backend = FakeDriveBackend()
+    settings = dict(UPLOAD_QUEUE_DEFAULTS, enabled=True, workers=1, plot_wait_seconds=0.3)
+    assert UploadQueue.start(backend=backend, parent_id='parent', db_path=str(tmp_path / 'queue.db'), settings=settings)
+    yield backend, suite
+    UploadQueue.stop(timeout=10)
+
+
+def queued(tmp_path):
+    with UploadQueueDB(str(tmp_path / 'queue.db')) as db:
+        return {row[0] for row in db.connection.execute("SELECT relative_path FROM uploads")}
+
+
+def test_test_folder_is_queued_after_its_plots_are_rendered(queue, tmp_path):
+    backend, suite = queue
+    rendering_plot(str(suite / 'test_1' / 'plots' / 'vram.png'), delay=0.1)
+
+    UploadQueue.enqueue_test({'name': 'test_1', 'test_path': str(suite / 'test_1')})
+    assert UploadQueue.wait_for_pending(30)
+
+    assert b'half and the rest' in [item['data'] for item in backend.items.values()]
+
+
+def test_plot_still_rendering_after_the_timeout_is_left_for_the_suite_end(queue, tmp_path):
+    backend, suite = queue
+    future = rendering_plot(str(suite / 'test_1' / 'plots' / 'vram.png'))
+
+    UploadQueue.enqueue_test({'name': 'test_1', 'test_path': str(suite / 'test_1')})
+    assert queued(tmp_path) == {'test_1/report.json'}
+
+    future.set_result(future.png_path)
+    UploadQueue.enqueue_folder(str(suite))
+    assert 'test_1/plots/vram.png' in queued(tmp_path)
+
+
+def test_wait_for_folder_ignores_other_folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(PlotWorker, '_pending', [])
+    rendering_plot(str(tmp_path / 'test_10' / 'plot.png'))
+    assert PlotWorker.wait_for_folder(str(tmp_path / 'test_1'), timeout=0) == []
+    assert PlotWorker.wait_for_folder(str(tmp_path / 'test_10'), timeout=0) == [str(tmp_path / 'test_10' / 'plot.png')]